@@ -107,8 +107,10 @@ try:
         PDFService, PowerPointService, ConversionService, 
         EducationalContentService, LearningProfilesService, UploadService,
         DownloadsService, FileStoreService, AdaptationsService, TranslationsService,
-        AssessmentsService, SessionStoreService
+        AssessmentsService, SessionStoreService, ProcessingTaskService
     )
+    from services.service_registry import get_adaptations_service
+    from services.document_jobs import register_document_jobs, PDF_JOB, PPTX_JOB
 except ImportError as e:
     print(f"Error importing services: {e}")
     print("Some features may not be available. Please check your services module.")
@@ -121,6 +123,8 @@ except ImportError as e:
     EducationalContentService = LearningProfilesService = UploadService = DummyService
     DownloadsService = FileStoreService = AdaptationsService = DummyService
     TranslationsService = AssessmentsService = SessionStoreService = DummyService
+    ProcessingTaskService = get_adaptations_service = register_document_jobs = DummyService
+    PDF_JOB, PPTX_JOB = 'process_pdf', 'process_pptx'
 
 service_config = {
     'output_folder': app.config['OUTPUT_FOLDER'],
@@ -128,7 +132,9 @@ service_config = {
     'anthropic_api_key': api_utils.api_key,
     'upload_dir': app.config['UPLOAD_FOLDER'],
     'output_dir': app.config['OUTPUT_FOLDER'],
-    'temp_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp')
+    'temp_dir': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp'),
+    # Persist adaptations in Redis when available, otherwise in temp/ via SQLite
+    'adaptation_store': os.getenv('ADAPTATION_STORE', 'auto')
 }
 
 pdf_service = PDFService(service_config)
@@ -139,7 +145,7 @@ profiles_service = LearningProfilesService(service_config)
 upload_service = UploadService(service_config)
 downloads_service = DownloadsService(service_config)
 filestore_service = FileStoreService(service_config)
-adaptations_service = AdaptationsService(service_config)
+adaptations_service = get_adaptations_service(service_config)
 translations_service = TranslationsService(service_config)
 assessments_service = AssessmentsService(service_config)
 
@@ -159,10 +165,22 @@ def get_redis_url():
 
 session_store_config = {
     'redis_url': os.getenv('REDIS_URL', get_redis_url()),
-    'session_ttl_hours': 24
+    'session_ttl_hours': 24,
+    # Maximum progress writes per second per task (write-behind channel)
+    'progress_flush_rate': float(os.getenv('PROGRESS_FLUSH_RATE', 2))
 }
 session_store = SessionStoreService(session_store_config)
 
+# Background job scheduler: bounded worker pool with a persistent priority queue.
+# Shares the session store and task cache so status updates stay consistent.
+processing_task_service = ProcessingTaskService({
+    'session_store': session_store,
+    'task_cache': processing_tasks,
+    'job_workers': int(os.getenv('JOB_WORKERS', 2)),
+    'max_queued_jobs': int(os.getenv('MAX_QUEUED_JOBS', 50)),
+    'job_lease_seconds': int(os.getenv('JOB_LEASE_SECONDS', 300))
+})
+
 # Helper function to generate output file path
 def get_output_file_path(file_id, filename):
     """Generate output file path using consistent naming"""
@@ -176,9 +194,11 @@ def store_processing_task(file_id, task_data):
 
 def get_processing_task(file_id):
     """Get processing task from memory or persistent storage"""
-    # Try memory first
+    # Try memory first (in-flight tasks may be updated by a separate worker process)
     if file_id in processing_tasks:
-        return processing_tasks[file_id]
+        task_data = processing_tasks[file_id]
+        if not (session_store.redis_available and task_data.get('status') in ('queued', 'processing')):
+            return task_data
     
     # Try persistent storage
     task_data = session_store.get_file_metadata(file_id)
@@ -190,10 +210,11 @@ def get_processing_task(file_id):
     return None
 
 def update_processing_task(file_id, updates):
-    """Update processing task in both memory and persistent storage"""
+    """Update processing task in memory and (write-behind) persistent storage"""
     if file_id in processing_tasks:
         processing_tasks[file_id].update(updates)
-    session_store.update_file_metadata(file_id, updates)
+    # Progress ticks are coalesced; status changes are written immediately
+    session_store.queue_file_update(file_id, updates)
 
 def task_exists(file_id):
     """Check if task exists in memory or persistent storage"""
@@ -329,6 +350,8 @@ def upload():
         target_language = request.form.get('target_language', '')
         translation_mode = request.form.get('translation_mode', 'copy')  # Default to copy mode
         export_format = request.form.get('export_format', 'pdf')
+        # PDF raster quality tier: 'high', 'medium' or 'low' (empty uses PDF_OUTPUT_QUALITY)
+        output_quality = request.form.get('output_quality', '')
         
         # Debug form parameters
         print(f"DEBUG: Form parameters - profile: {profile}, action: {action}, target_language: '{target_language}', translation_mode: '{translation_mode}', export_format: {export_format}")
@@ -344,7 +367,8 @@ def upload():
             'action': action,
             'target_language': target_language,
             'translation_mode': translation_mode,
-            'export_format': export_format
+            'export_format': export_format,
+            'output_quality': output_quality
         }
         
         upload_result = upload_service.process_upload(file, metadata)
@@ -389,75 +413,27 @@ def upload():
             if file_ext == '.pdf':
                 # Use new service-based PDF processing
                 print(f"Processing PDF with service-based system: {filename}")
-                thread_target = process_pdf_with_services
-                thread_args = (file_path, file_id, filename, profile, export_format, target_language)
+                # Same job in this process's pool and in dedicated workers (worker.py)
+                job_type = PDF_JOB
+                job_params = {
+                    'file_path': file_path, 'file_id': file_id, 'filename': filename,
+                    'profile': profile, 'export_format': export_format,
+                    'target_language': target_language,
+                    'output_quality': output_quality or None
+                }
             else:  # .pptx
                 print(f"Processing PowerPoint: {filename}")
-                # Create wrapper function to pass processing_tasks
-                def pptx_thread_target():
-                    try:
-                        # Check if this is a translation request (any profile with target language)
-                        has_target_language = (target_language and target_language.strip())
-                        
-                        # Use translation method based on mode
-                        if has_target_language:
-                            # Determine which translation method to use based on mode
-                            if translation_mode == 'replace':
-                                print(f"Using replace mode translation to {target_language}")
-                                update_processing_task(file_id, {'message': f'Translating content to {target_language} (replace mode)...'})
-                                update_processing_task(file_id, {'progress': {'total': 100, 'processed': 5, 'percentage': 5}})
-                                
-                                # Use in-place translation (replaces original content)
-                                result = pptx_service.translate_presentation_in_place(
-                                    file_path, file_id, filename, target_language
-                                )
-                            else:  # copy mode (default)
-                                print(f"Using copy mode translation to {target_language}")
-                                update_processing_task(file_id, {'message': f'Creating translated copies for {target_language}...'})
-                                update_processing_task(file_id, {'progress': {'total': 100, 'processed': 5, 'percentage': 5}})
-                                
-                                # Use slide duplication method (keeps originals + adds translations)
-                                result = pptx_service.translate_presentation(
-                                    file_path, file_id, filename, target_language
-                                )
-                        else:
-                            # Use the standard adaptation method (with optional translation)
-                            print(f"Using standard adaptation method for profile: {profile}")
-                            result = pptx_service.process_presentation_efficiently(
-                                file_path, file_id, filename, profile, target_language,
-                                progress_callback=lambda msg, pct: update_processing_task(file_id, {
-                                    'message': msg,
-                                    'progress': {'total': 100, 'processed': pct, 'percentage': pct}
-                                })
-                            )
-                        
-                        if result:
-                            update_processing_task(file_id, {'adapted_path': result})
-                            update_processing_task(file_id, {'status': 'completed'})
-                            print(f"DEBUG: Processing completed successfully for {file_id}")
-                        else:
-                            update_processing_task(file_id, {'status': 'error'})
-                            update_processing_task(file_id, {'message': 'Processing returned no result'})
-                            print(f"DEBUG: Processing failed - no result returned for {file_id}")
-                            
-                    except Exception as e:
-                        print(f"ERROR in PowerPoint processing: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                        update_processing_task(file_id, {'status': 'error'})
-                        update_processing_task(file_id, {'message': f'Processing error: {str(e)}'})
-                
-                thread_target = pptx_thread_target
-                thread_args = ()
+                job_type = PPTX_JOB
+                job_params = {
+                    'file_path': file_path, 'file_id': file_id, 'filename': filename,
+                    'profile': profile, 'target_language': target_language,
+                    'translation_mode': translation_mode
+                }
             
-            # Start background processing
-            thread = threading.Thread(
-                target=thread_target,
-                args=thread_args,
-                name=f"process-{file_id}"
-            )
-            thread.daemon = True
-            thread.start()
+            # Queue background processing (bounded worker pool, survives restarts)
+            if not processing_task_service.submit_job(file_id, job_type, job_params):
+                return render_template_string(ERROR_TEMPLATE,
+                    message="The server is busy processing other documents. Please try again in a few minutes."), 503
             
             # Profile display names
             profile_names = get_profile_names()
@@ -486,76 +462,6 @@ def analyze_instructional_framework(pptx_path):
         print(f"Error in framework analysis: {str(e)}")
         return {"error": f"Analysis failed: {str(e)}"}
 
-def process_pdf_with_services(file_path, file_id, filename, profile, export_format='pdf', target_language=None):
-    """Service-based PDF processing function using the new architecture"""
-    print(f"Starting service-based PDF processing for {filename} with profile: {profile}")
-    
-    try:
-        update_processing_task(file_id, {'message': 'Initializing PDF processing services...'})
-        update_processing_task(file_id, {'progress': {'total': 100, 'processed': 5, 'percentage': 5}})
-        
-        # Use the migration helper to process the PDF
-        update_processing_task(file_id, {'message': 'Processing PDF with visual preservation...'})
-        update_processing_task(file_id, {'progress': {'total': 100, 'processed': 20, 'percentage': 20}})
-        
-        # Process with services - this handles adaptation and visual preservation
-        result = pdf_migration_helper.process_with_pdf_template_system(
-            file_path, 
-            profile, 
-            direct_adapt=True,
-            preserve_visuals=True,
-            translate=(target_language and target_language.strip() != ''),
-            target_language=target_language
-        )
-        
-        update_processing_task(file_id, {'progress': {'total': 100, 'processed': 60, 'percentage': 60}})
-        
-        if not result['success']:
-            raise Exception(f"PDF processing failed: {result.get('error', 'Unknown error')}")
-        
-        # Update processing status
-        update_processing_task(file_id, {'message': 'PDF adaptation completed successfully!'})
-        update_processing_task(file_id, {'progress': {'total': 100, 'processed': 90, 'percentage': 90}})
-        
-        # Store the output path for downloads
-        output_path = result['output_path']
-        update_processing_task(file_id, {'output_path': output_path})
-        update_processing_task(file_id, {'adapted_content': result.get('adapted_content', {})})
-        
-        # Handle translation if requested and available
-        if target_language and target_language.strip():
-            update_processing_task(file_id, {'message': f'Creating translation in {target_language}...'})
-            update_processing_task(file_id, {'progress': {'total': 100, 'processed': 95, 'percentage': 95}})
-            
-            # Check if translation was successful
-            if 'translated_output_path' in result:
-                update_processing_task(file_id, {'translated_output_path': result['translated_output_path']})
-                update_processing_task(file_id, {'translated_language': result['translated_language']})
-                update_processing_task(file_id, {'translation_languages': [target_language]})
-                print(f"✓ Translation completed: {result['translated_output_path']}")
-            else:
-                print(f"⚠ Translation was requested but failed for {target_language}")
-                update_processing_task(file_id, {'translation_error': f'Translation to {target_language} failed'})
-        
-        # Mark as completed
-        update_processing_task(file_id, {'status': 'completed'})
-        update_processing_task(file_id, {'message': 'Processing completed successfully!'})
-        update_processing_task(file_id, {'progress': {'total': 100, 'processed': 100, 'percentage': 100}})
-        
-        print(f"✓ Service-based PDF processing completed successfully for {filename}")
-        return True
-        
-    except Exception as e:
-        print(f"✗ Error in service-based PDF processing: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
-        # Update task with error
-        update_processing_task(file_id, {'status': 'error'})
-        update_processing_task(file_id, {'message': f'Error: {str(e)}'})
-        update_processing_task(file_id, {'error': str(e)})
-        return False
-
 # Original PDF processing function (kept for fallback)
 def update_processing_status(file_id, message, percentage):
     """Helper function to update processing status"""
@@ -1348,14 +1254,14 @@ def update_task_status(file_id, status, message=None, progress=None, **kwargs):
     if not task_exists(file_id):
         processing_tasks[file_id] = {}
     
-    update_processing_task(file_id, {'status': status})
+    updates = {'status': status}
     if message is not None:
-        update_processing_task(file_id, {'message': message})
+        updates['message'] = message
     if progress is not None:
-        update_processing_task(file_id, {'progress': progress})
+        updates['progress'] = progress
     # Add any additional fields
-    for key, value in kwargs.items():
-        update_processing_task(file_id, {key: value})
+    updates.update(kwargs)
+    update_processing_task(file_id, updates)
     
     # Debug logging
     print(f"Status update for {file_id}: {status} - {message}")
@@ -2240,6 +2146,12 @@ def generate_enriched_presentation(file_id, filename, adapted_file_path, profile
 # HTML templates module
 # Create a separate file html_templates.py with all the HTML templates
 
+# Register background job handlers and start this process's worker pool.
+# Set JOB_WORKERS=0 to leave queued jobs to dedicated worker processes.
+register_document_jobs(processing_task_service, service_config, pdf_service, pptx_service)
+if processing_task_service.num_job_workers > 0:
+    processing_task_service.start_job_workers()
+
 if __name__ == "__main__":
     # Run the Flask app with Railway's PORT environment variable
     port = int(os.environ.get("PORT", 5000))
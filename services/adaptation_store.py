@@ -0,0 +1,211 @@
+"""
+Adaptation Store
+
+Persistent second-tier cache for text adaptations. The in-memory
+AdaptationCache is lost whenever a worker restarts and is not shared between
+worker processes; this store sits behind it so identical text adapted for the
+same profile and model is only ever sent to the AI once.
+
+Two backends are provided: Redis (shared across the whole fleet) and a local
+SQLite file (shared between workers on one host).
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+
+class AdaptationStore(ABC):
+    """Base class for persistent adaptation stores"""
+
+    backend = 'none'
+
+    def __init__(self, ttl_seconds: int = 30 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.hit_count = 0
+        self.miss_count = 0
+        self.error_count = 0
+
+    @staticmethod
+    def make_key(text: str, profile: str, model: str) -> str:
+        """Build a stable key from the normalized text, profile and model"""
+        normalized = ' '.join((text or '').split()).lower()
+        text_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        profile_key = profile.lower() if profile else 'default'
+        return f"{model}:{profile_key}:{text_hash}"
+
+    def get(self, text: str, profile: str, model: str) -> Optional[str]:
+        """Look up an adaptation, returning None on a miss or backend error"""
+        try:
+            value = self._get(self.make_key(text, profile, model))
+        except Exception as e:
+            self.error_count += 1
+            self.logger.warning(f"Adaptation store read failed: {e}")
+            return None
+
+        if value is None:
+            self.miss_count += 1
+        else:
+            self.hit_count += 1
+        return value
+
+    def set(self, text: str, profile: str, model: str, adapted_text: str) -> bool:
+        """Store an adaptation; backend errors are logged and ignored"""
+        try:
+            self._set(self.make_key(text, profile, model), adapted_text)
+            return True
+        except Exception as e:
+            self.error_count += 1
+            self.logger.warning(f"Adaptation store write failed: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        total_requests = self.hit_count + self.miss_count
+        hit_rate = (self.hit_count / total_requests * 100) if total_requests > 0 else 0
+        return {
+            'backend': self.backend,
+            'hit_count': self.hit_count,
+            'miss_count': self.miss_count,
+            'error_count': self.error_count,
+            'hit_rate': f"{hit_rate:.1f}%",
+            'ttl_seconds': self.ttl_seconds
+        }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """Read the adaptation stored under key, or None"""
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, adapted_text: str) -> None:
+        """Store an adaptation under key"""
+        pass
+
+
+class RedisAdaptationStore(AdaptationStore):
+    """Adaptation store backed by Redis, shared by every worker and host"""
+
+    backend = 'redis'
+
+    def __init__(self, redis_client, ttl_seconds: int = 30 * 24 * 3600,
+                 prefix: str = "matcha:adaptations:"):
+        super().__init__(ttl_seconds)
+        self.redis_client = redis_client
+        self.prefix = prefix
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self.redis_client.get(f"{self.prefix}{key}")
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def _set(self, key: str, adapted_text: str) -> None:
+        if self.ttl_seconds:
+            self.redis_client.setex(f"{self.prefix}{key}", self.ttl_seconds, adapted_text)
+        else:
+            self.redis_client.set(f"{self.prefix}{key}", adapted_text)
+
+
+class SQLiteAdaptationStore(AdaptationStore):
+    """Adaptation store backed by a local SQLite file, shared by workers on one host"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str, ttl_seconds: int = 30 * 24 * 3600):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        # WAL lets several gunicorn workers read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS adaptations ("
+            " key TEXT PRIMARY KEY,"
+            " adapted_text TEXT NOT NULL,"
+            " expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT adapted_text, expires_at FROM adaptations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            adapted_text, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._conn.execute("DELETE FROM adaptations WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return adapted_text
+
+    def _set(self, key: str, adapted_text: str) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO adaptations (key, adapted_text, expires_at) VALUES (?, ?, ?)",
+                (key, adapted_text, expires_at)
+            )
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats['path'] = self.path
+        return stats
+
+
+def create_adaptation_store(config: Dict[str, Any]) -> Optional[AdaptationStore]:
+    """
+    Build the persistent adaptation store for the given service config
+
+    Config keys:
+        adaptation_store: 'auto', 'redis', 'sqlite' or 'none' (default)
+        adaptation_store_path: SQLite file path
+        adaptation_store_ttl_seconds: Entry lifetime (default 30 days)
+        redis_url: Redis connection URL (falls back to REDIS_URL)
+
+    Returns:
+        An AdaptationStore, or None if persistence is disabled
+    """
+    logger = logging.getLogger('AdaptationStore')
+    mode = config.get('adaptation_store', 'none')
+    ttl_seconds = config.get('adaptation_store_ttl_seconds', 30 * 24 * 3600)
+
+    if mode == 'none':
+        return None
+
+    if mode in ('auto', 'redis'):
+        from .session_store_service import SessionStoreService
+        session_config = {}
+        if config.get('redis_url'):
+            session_config['redis_url'] = config['redis_url']
+        session_store = SessionStoreService(session_config)
+        if session_store.redis_available:
+            logger.info("Using Redis adaptation store")
+            return RedisAdaptationStore(session_store.redis_client, ttl_seconds)
+        if mode == 'redis':
+            logger.warning("Redis adaptation store requested but Redis is unavailable")
+            return None
+
+    path = config.get('adaptation_store_path') or os.path.join(
+        config.get('temp_dir', 'temp'), 'adaptation_cache.sqlite3'
+    )
+    try:
+        store = SQLiteAdaptationStore(path, ttl_seconds)
+        logger.info(f"Using SQLite adaptation store at {path}")
+        return store
+    except Exception as e:
+        logger.warning(f"SQLite adaptation store unavailable: {e}")
+        return None
@@ -6,20 +6,37 @@ Core service for adapting content based on learning profiles.
 import re
 import hashlib
 import time
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from .base_service import BaseService
 from .profiles_service import LearningProfilesService
+from .batch_planner import (
+    estimate_tokens, predict_output_tokens, plan_batches, choose_max_tokens, MAX_MAX_TOKENS
+)
 import anthropic
 
 
 class AdaptationCache:
-    """Enhanced cache for storing text adaptation results with better hit rate"""
-    def __init__(self, max_size=2000):
-        self.cache = {}
+    """
+    LRU cache for text adaptation results with per-entry TTL and a byte budget.
+
+    Entries are kept in an OrderedDict in recency order, so lookups, inserts
+    and evictions are all O(1). The cache is bounded by the approximate size
+    of the stored keys and values rather than by a fixed item count.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl_seconds=24 * 3600, max_size=None):
+        self.cache = OrderedDict()  # key -> (adapted_text, expires_at, size)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
         self.max_size = max_size
-        self.access_times = {}
+        self.current_bytes = 0
         self.hit_count = 0
         self.miss_count = 0
+        self.eviction_count = 0
+        self.expired_count = 0
+        self._lock = threading.Lock()
     
     def get_key(self, text, profile):
         """Generate a cache key based on text content and profile"""
@@ -44,51 +61,91 @@ class AdaptationCache:
         
         return normalized
     
+    def _entry_size(self, key, adapted_text):
+        """Approximate memory footprint of an entry in bytes"""
+        return len(key) + len(adapted_text.encode('utf-8'))
+    
+    def _remove(self, key):
+        """Remove an entry and release its bytes (caller holds the lock)"""
+        _, _, size = self.cache.pop(key)
+        self.current_bytes -= size
+    
     def get(self, text, profile):
         """Get adaptation from cache if available with metrics tracking"""
         key = self.get_key(text, profile)
         
-        if key in self.cache:
-            self.hit_count += 1
-            self.access_times[key] = time.time()
-            return self.cache[key]
-        
-        self.miss_count += 1
-        return None
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                adapted_text, expires_at, _ = entry
+                if expires_at is None or expires_at > time.time():
+                    self.cache.move_to_end(key)
+                    self.hit_count += 1
+                    return adapted_text
+                
+                # Expired entries are dropped lazily on access
+                self._remove(key)
+                self.expired_count += 1
+            
+            self.miss_count += 1
+            return None
     
-    def set(self, text, profile, adapted_text):
-        """Store adaptation in cache with cache eviction logic"""
+    def set(self, text, profile, adapted_text, ttl_seconds=None):
+        """Store adaptation in cache, evicting least recently used entries"""
         key = self.get_key(text, profile)
+        size = self._entry_size(key, adapted_text)
+        
+        # Never let a single oversized entry flush the whole cache
+        if self.max_bytes and size > self.max_bytes:
+            return
         
-        # If cache is full, remove least recently used items
-        if len(self.cache) >= self.max_size:
-            # Find LRU key
-            lru_key = min(self.access_times.items(), key=lambda x: x[1])[0]
-            del self.cache[lru_key]
-            del self.access_times[lru_key]
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.time() + ttl if ttl else None
         
-        self.cache[key] = adapted_text
-        self.access_times[key] = time.time()
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+            
+            self.cache[key] = (adapted_text, expires_at, size)
+            self.current_bytes += size
+            
+            # Evict from the LRU end until we are back within budget
+            while self.cache and (
+                (self.max_bytes and self.current_bytes > self.max_bytes) or
+                (self.max_size and len(self.cache) > self.max_size)
+            ):
+                lru_key = next(iter(self.cache))
+                self._remove(lru_key)
+                self.eviction_count += 1
     
     def get_stats(self):
         """Get cache statistics"""
-        total_requests = self.hit_count + self.miss_count
-        hit_rate = (self.hit_count / total_requests * 100) if total_requests > 0 else 0
-        
-        return {
-            'hit_count': self.hit_count,
-            'miss_count': self.miss_count,
-            'hit_rate': f"{hit_rate:.1f}%",
-            'cache_size': len(self.cache),
-            'max_size': self.max_size
-        }
+        with self._lock:
+            total_requests = self.hit_count + self.miss_count
+            hit_rate = (self.hit_count / total_requests * 100) if total_requests > 0 else 0
+            
+            return {
+                'hit_count': self.hit_count,
+                'miss_count': self.miss_count,
+                'eviction_count': self.eviction_count,
+                'expired_count': self.expired_count,
+                'hit_rate': f"{hit_rate:.1f}%",
+                'cache_size': len(self.cache),
+                'max_size': self.max_size,
+                'cache_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds
+            }
     
     def clear(self):
         """Clear the cache"""
-        self.cache.clear()
-        self.access_times.clear()
-        self.hit_count = 0
-        self.miss_count = 0
+        with self._lock:
+            self.cache.clear()
+            self.current_bytes = 0
+            self.hit_count = 0
+            self.miss_count = 0
+            self.eviction_count = 0
+            self.expired_count = 0
 
 
 class AdaptationsService(BaseService):
@@ -98,6 +155,7 @@ class AdaptationsService(BaseService):
         """Initialize adaptation service"""
         self.profiles_service = LearningProfilesService(self.config)
         self.api_key = self.config.get('anthropic_api_key')
+        self.model = self.config.get('adaptation_model', 'claude-3-5-sonnet-20240620')
         if self.api_key:
             self.client = anthropic.Anthropic(api_key=self.api_key)
         else:
@@ -105,7 +163,31 @@ class AdaptationsService(BaseService):
             self.logger.warning("No Anthropic API key provided")
         
         # Initialize adaptation cache
-        self.cache = AdaptationCache(max_size=2000)
+        self.cache = AdaptationCache(
+            max_bytes=self.config.get('cache_max_bytes', 32 * 1024 * 1024),
+            ttl_seconds=self.config.get('cache_ttl_seconds', 24 * 3600),
+            max_size=self.config.get('cache_max_size')
+        )
+        
+        # Bounded pool for sending independent batches concurrently
+        self.max_concurrent_batches = max(1, int(self.config.get('max_concurrent_batches', 4)))
+        self._batch_executor = None
+        self._executor_lock = threading.Lock()
+        
+        # Cumulative intra-document deduplication savings
+        self.dedup_stats = {'texts_seen': 0, 'duplicates_collapsed': 0,
+                            'input_tokens_saved': 0, 'output_tokens_saved': 0}
+        self._dedup_lock = threading.Lock()
+        
+        # Single-flight registry: normalized key -> (Future, owning thread id)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Persistent second-tier cache, only useful when we call the AI
+        self.store = None
+        if self.client:
+            from .adaptation_store import create_adaptation_store
+            self.store = create_adaptation_store(self.config)
         
         # Initialize scientific dictionary
         try:
@@ -167,7 +249,70 @@ class AdaptationsService(BaseService):
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        return self.cache.get_stats()
+        stats = self.cache.get_stats()
+        with self._dedup_lock:
+            stats['deduplication'] = dict(self.dedup_stats)
+        if self.store:
+            stats['persistent'] = self.store.get_stats()
+        return stats
+    
+    def _get_cached_adaptation(self, text: str, profile_id: str) -> Optional[str]:
+        """Look up an adaptation in the in-memory cache, then the persistent store"""
+        cached_result = self.cache.get(text, profile_id)
+        if cached_result:
+            return cached_result
+        
+        if self.store:
+            stored_result = self.store.get(text, profile_id, self.model)
+            if stored_result:
+                # Promote to the in-memory tier for subsequent hits
+                self.cache.set(text, profile_id, stored_result)
+                return stored_result
+        
+        return None
+    
+    def _begin_flight(self, text: str, profile_id: str) -> Tuple[str, Optional[Future], bool]:
+        """
+        Claim the in-flight slot for a (normalized text, profile) pair
+        
+        Returns:
+            (key, future, is_owner). Owners must resolve the future with
+            _end_flight; non-owners wait on it. A thread that already owns the
+            key (e.g. a batch falling back to individual requests) is treated
+            as the owner and gets no future to resolve.
+        """
+        key = self.cache.get_key(text, profile_id)
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is not None:
+                future, owner = entry
+                if owner == threading.get_ident():
+                    return key, None, True
+                return key, future, False
+            
+            future = Future()
+            self._inflight[key] = (future, threading.get_ident())
+            return key, future, True
+    
+    def _end_flight(self, key: str, future: Optional[Future], result: Optional[str] = None,
+                    error: Optional[BaseException] = None):
+        """Release an in-flight slot and wake any waiters"""
+        if future is None or future.done():
+            return
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is future:
+                del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    
+    def _store_adaptation(self, text: str, profile_id: str, adapted_text: str):
+        """Write an adaptation through to both cache tiers"""
+        self.cache.set(text, profile_id, adapted_text)
+        if self.store:
+            self.store.set(text, profile_id, self.model, adapted_text)
     
     def get_dictionary_stats(self) -> Dict[str, Any]:
         """Get scientific dictionary statistics"""
@@ -393,25 +538,24 @@ class AdaptationsService(BaseService):
         profile_id = profile_id.lower() if profile_id else "dyslexia"
         
         # Check cache first
-        cached_result = self.cache.get(text, profile_id)
+        cached_result = self._get_cached_adaptation(text, profile_id)
         if cached_result:
             self.logger.debug(f"Cache hit for {profile_id} adaptation")
             return cached_result
         
+        # Coalesce with an identical request already in flight on another thread
+        flight_key, flight, is_owner = self._begin_flight(text, profile_id)
+        if not is_owner:
+            self.logger.debug(f"Waiting on in-flight {profile_id} adaptation")
+            return flight.result()
+        
         try:
             # Build adaptation prompt using efficient format
             prompt = self._build_efficient_prompt(text, profile_id)
             
             self.logger.info(f"Calling AI for {profile_id} adaptation of {len(text)} chars")
             
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20240620",
-                max_tokens=4000,
-                temperature=0.3,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            response = self._create_message(prompt, [text], profile_id)
             
             adapted_text = response.content[0].text.strip()
             
@@ -454,15 +598,50 @@ class AdaptationsService(BaseService):
                 self.logger.warning(f"Adapted text may not be simplified (avg word length: {original_avg_word_len:.1f} -> {adapted_avg_word_len:.1f})")
             
             # Store in cache for future use
-            self.cache.set(text, profile_id, adapted_text)
+            self._store_adaptation(text, profile_id, adapted_text)
+            self._end_flight(flight_key, flight, result=adapted_text)
             
             self.logger.info(f"AI adaptation successful: {len(text)} -> {len(adapted_text)} chars")
             return adapted_text
             
         except Exception as e:
             self.logger.error(f"AI adaptation failed: {str(e)}")
+            self._end_flight(flight_key, flight, error=e)
             raise  # Re-raise the exception instead of silently returning original
     
+    def _create_message(self, prompt: str, texts: List[str], profile_id: str):
+        """
+        Call the API with max_tokens sized to the predicted output
+        
+        A response cut off at max_tokens is retried once with the largest
+        budget. If that is truncated too, ValueError is raised so callers never
+        parse or cache partial adaptations.
+        
+        Args:
+            prompt: User message
+            texts: Texts being adapted, used to size max_tokens
+            profile_id: Learning profile ID
+            
+        Returns:
+            API response that finished within its budget
+        """
+        max_tokens = choose_max_tokens(texts, profile_id)
+        while True:
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=0.3,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            if getattr(response, 'stop_reason', None) != 'max_tokens':
+                return response
+            if max_tokens >= MAX_MAX_TOKENS:
+                raise ValueError(f"AI response truncated at max_tokens={max_tokens}")
+            self.logger.warning(f"AI response truncated at max_tokens={max_tokens}, retrying with {MAX_MAX_TOKENS}")
+            max_tokens = MAX_MAX_TOKENS
+    
     def _adapt_text_rules(self, text: str, profile_id: str) -> str:
         """Adapt text using rule-based methods"""
         adaptations = self.profiles_service.get_adaptations(profile_id)
@@ -576,51 +755,187 @@ class AdaptationsService(BaseService):
         return count
     
     def process_text_batch(self, texts: List[str], profile_id: str, 
-                          max_batch_size: int = 5, max_tokens_per_batch: int = 4000) -> List[str]:
+                          max_batch_size: int = 10, max_tokens_per_batch: int = 4000,
+                          max_concurrency: Optional[int] = None,
+                          deduplicate: bool = True,
+                          max_output_tokens_per_batch: int = 5000,
+                          progress_callback: Optional[Callable[[List[int], List[str]], None]] = None,
+                          groups: Optional[List[int]] = None) -> List[str]:
         """
         Process multiple text elements in efficient batches
         
+        Repeated texts (headers, footers, page numbers) are collapsed first so
+        each unique text is adapted once and the result is fanned back out to
+        every original position. The remaining texts are bin-packed into as
+        few requests as possible by estimated token size. Independent batches are sent to the API
+        concurrently through the service's shared thread pool, so the number
+        of requests in flight is bounded per worker process. Results are
+        returned in input order.
+        
         Args:
             texts: List of texts to adapt
             profile_id: Learning profile ID
             max_batch_size: Maximum texts per batch
-            max_tokens_per_batch: Maximum estimated tokens per batch
+            max_tokens_per_batch: Maximum estimated input tokens per batch
+            max_concurrency: Maximum batches in flight for this call
+                (defaults to the service's max_concurrent_batches; 1 is sequential)
+            deduplicate: Collapse identical texts before batching
+            max_output_tokens_per_batch: Maximum predicted output tokens per batch
+            progress_callback: Called on the calling thread with the indices of
+                texts whose results are ready and those results, once per
+                batch in the order batches complete
+            groups: Group of each text (e.g. its slide), with each group's
+                texts adjacent; batches are packed a few groups at a time so
+                early groups are complete after the first batches
             
         Returns:
             List of adapted texts
         """
-        results = []
-        current_batch = []
-        current_batch_tokens = 0
+        if deduplicate and len(texts) > 1:
+            unique_texts, positions = self.deduplicate_texts(texts, profile_id)
+            if len(unique_texts) < len(texts):
+                unique_callback = None
+                if progress_callback:
+                    # Report every original position a unique text stands for
+                    members = [[] for _ in unique_texts]
+                    for index, position in enumerate(positions):
+                        members[position].append(index)
+                    
+                    def unique_callback(unique_indices, adapted_texts):
+                        progress_callback(
+                            [index for unique in unique_indices for index in members[unique]],
+                            [adapted for unique, adapted in zip(unique_indices, adapted_texts)
+                             for _ in members[unique]]
+                        )
+                
+                unique_groups = None
+                if groups is not None:
+                    # A unique text belongs to the group it first appears in
+                    unique_groups = [None] * len(unique_texts)
+                    for index, position in enumerate(positions):
+                        if unique_groups[position] is None:
+                            unique_groups[position] = groups[index]
+                
+                unique_results = self.process_text_batch(
+                    unique_texts, profile_id, max_batch_size, max_tokens_per_batch,
+                    max_concurrency, deduplicate=False,
+                    max_output_tokens_per_batch=max_output_tokens_per_batch,
+                    progress_callback=unique_callback, groups=unique_groups
+                )
+                return [unique_results[position] for position in positions]
         
-        def estimate_tokens(text: str) -> int:
-            """Roughly estimate token count based on character count"""
-            return len(text) // 4  # Approximation: ~4 chars per token
+        batches = plan_batches(texts, profile_id, max_batch_size, max_tokens_per_batch,
+                               max_output_tokens_per_batch, groups=groups)
+        if max_concurrency is None:
+            max_concurrency = self.max_concurrent_batches
         
-        # Group texts into efficient batches
-        for text in texts:
-            text_tokens = estimate_tokens(text)
-            
-            # If this text would make the batch too large, process the current batch first
-            if (len(current_batch) >= max_batch_size or 
-                (current_batch_tokens + text_tokens > max_tokens_per_batch and current_batch)):
-                # Process the current batch
-                batch_results = self._process_single_batch(current_batch, profile_id)
-                results.extend(batch_results)
-                current_batch = []
-                current_batch_tokens = 0
-            
-            # Add this text to the current batch
-            current_batch.append(text)
-            current_batch_tokens += text_tokens
-        
-        # Process any remaining texts in the final batch
-        if current_batch:
-            batch_results = self._process_single_batch(current_batch, profile_id)
-            results.extend(batch_results)
+        results = [None] * len(texts)
+        
+        def place(indices, adapted_texts):
+            for index, adapted in zip(indices, adapted_texts):
+                results[index] = adapted
+            if progress_callback:
+                progress_callback(indices, adapted_texts)
+        
+        # Rule-based adaptation is CPU-only; threads would not help
+        if not self.client or max_concurrency <= 1 or len(batches) <= 1:
+            for indices in batches:
+                place(indices, self._process_single_batch([texts[i] for i in indices], profile_id))
+            return results
+        
+        executor = self._get_batch_executor()
+        pending = {}
+        
+        def collect(indices, future):
+            try:
+                adapted_texts = future.result()
+            except Exception as e:
+                # Keep per-batch fallback semantics if a worker thread fails
+                self.logger.error(f"Concurrent batch failed: {str(e)}")
+                adapted_texts = [self._adapt_text(texts[i], profile_id) for i in indices]
+            place(indices, adapted_texts)
+        
+        def collect_completed():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda finished: pending[finished][0]):
+                collect(pending.pop(future), future)
+        
+        # Sliding window: never more than max_concurrency batches of this call in
+        # flight. Batches are collected as they complete, so a slow batch does
+        # not hold back results (or free slots) behind it
+        for indices in batches:
+            while len(pending) >= max_concurrency:
+                collect_completed()
+            batch = [texts[i] for i in indices]
+            pending[executor.submit(self._process_single_batch, batch, profile_id)] = indices
+        
+        while pending:
+            collect_completed()
         
         return results
     
+    def deduplicate_texts(self, texts: List[str],
+                          profile_id: Optional[str] = None) -> Tuple[List[str], List[int]]:
+        """
+        Collapse texts that are identical after whitespace normalization
+        
+        Args:
+            texts: Texts in document order
+            profile_id: Learning profile ID (for the predicted output saved)
+            
+        Returns:
+            (unique_texts, positions) where texts[i] is adapted by
+            unique_texts[positions[i]]. The first occurrence of each text is
+            kept as the representative.
+        """
+        unique_texts = []
+        positions = []
+        index_by_key = {}
+        duplicate_tokens = 0
+        duplicate_output_tokens = 0
+        
+        for text in texts:
+            key = ' '.join(text.split()) if text else ''
+            index = index_by_key.get(key)
+            if index is None:
+                index = len(unique_texts)
+                index_by_key[key] = index
+                unique_texts.append(text)
+            else:
+                input_tokens = self._estimate_tokens(text)
+                duplicate_tokens += input_tokens
+                duplicate_output_tokens += predict_output_tokens(text, profile_id, input_tokens)
+            positions.append(index)
+        
+        duplicates = len(texts) - len(unique_texts)
+        with self._dedup_lock:
+            self.dedup_stats['texts_seen'] += len(texts)
+            self.dedup_stats['duplicates_collapsed'] += duplicates
+            self.dedup_stats['input_tokens_saved'] += duplicate_tokens
+            self.dedup_stats['output_tokens_saved'] += duplicate_output_tokens
+        
+        if duplicates:
+            self.logger.info(
+                f"Deduplicated {len(texts)} texts to {len(unique_texts)} unique "
+                f"(~{duplicate_tokens} input and ~{duplicate_output_tokens} output tokens saved)"
+            )
+        
+        return unique_texts, positions
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimate token count with the per-script tokenizer approximation"""
+        return estimate_tokens(text)
+    
+    def _get_batch_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the shared pool used for concurrent batch requests"""
+        with self._executor_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent_batches,
+                    thread_name_prefix='adaptation-batch'
+                )
+            return self._batch_executor
+    
     def _process_single_batch(self, texts: List[str], profile_id: str) -> List[str]:
         """
         Process a single batch of texts using one API call
@@ -641,6 +956,59 @@ class AdaptationsService(BaseService):
             # Fallback to rule-based processing
             return [self._adapt_text_rules(text, profile_id) for text in texts]
         
+        # Serve what we can from the cache tiers and only send the misses
+        cache_profile = profile_id.lower() if profile_id else "dyslexia"
+        cached = [self._get_cached_adaptation(text, cache_profile) for text in texts]
+        missing = [i for i, result in enumerate(cached) if not result]
+        if not missing:
+            return cached
+        
+        # Coalesce with identical adaptations already in flight on other threads
+        owned = []
+        waiting = []
+        for i in missing:
+            key, future, is_owner = self._begin_flight(texts[i], cache_profile)
+            if is_owner:
+                owned.append((i, key, future))
+            else:
+                waiting.append((i, future))
+        
+        if owned:
+            try:
+                adapted_owned = self._request_batch([texts[i] for i, _, _ in owned], profile_id)
+            except Exception as e:
+                for _, key, future in owned:
+                    self._end_flight(key, future, error=e)
+                raise
+            for (i, key, future), adapted in zip(owned, adapted_owned):
+                cached[i] = adapted
+                self._end_flight(key, future, result=adapted)
+        
+        for i, future in waiting:
+            try:
+                cached[i] = future.result()
+            except Exception as e:
+                self.logger.error(f"Coalesced adaptation failed, returning original: {str(e)}")
+                cached[i] = texts[i]
+        
+        return cached
+    
+    def _request_batch(self, texts: List[str], profile_id: str) -> List[str]:
+        """
+        Send one batch request for texts that missed the cache
+        
+        Args:
+            texts: List of texts in the batch
+            profile_id: Learning profile ID
+            
+        Returns:
+            List of adapted texts
+        """
+        if len(texts) <= 1:
+            return [self._adapt_text(texts[0], profile_id)] if texts else []
+        
+        cache_profile = profile_id.lower() if profile_id else "dyslexia"
+        
         # Create a single prompt with multiple texts
         profile_name = profile_id.title()
         instructions = self._get_batch_instructions(profile_id)
@@ -651,15 +1019,8 @@ class AdaptationsService(BaseService):
             combined_prompt += f"### TEXT {i+1} ###\n{text}\n\n"
         
         try:
-            # Call API with the combined prompt
-            response = self.client.messages.create(
-                model="claude-3-5-sonnet-20240620",
-                max_tokens=8000,  # Larger token limit for batch processing
-                temperature=0.3,
-                messages=[
-                    {"role": "user", "content": combined_prompt}
-                ]
-            )
+            # Call API with the combined prompt, sized to the predicted output
+            response = self._create_message(combined_prompt, texts, profile_id)
             
             # Parse the response to extract individual adapted texts
             content = response.content[0].text
@@ -686,6 +1047,7 @@ class AdaptationsService(BaseService):
             for i in range(1, len(texts) + 1):
                 if i in text_dict:
                     adapted_texts.append(text_dict[i])
+                    self._store_adaptation(texts[i-1], cache_profile, text_dict[i])
                 else:
                     # If missing a specific text, adapt it individually
                     adapted_texts.append(self._adapt_text(texts[i-1], profile_id))
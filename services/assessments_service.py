@@ -8,7 +8,7 @@ from typing import Dict, Any, List, Optional, Tuple
 from collections import Counter
 from .base_service import BaseService
 from .profiles_service import LearningProfilesService
-from .adaptations_service import AdaptationsService
+from .service_registry import get_adaptations_service
 
 
 class AssessmentsService(BaseService):
@@ -17,7 +17,7 @@ class AssessmentsService(BaseService):
     def _initialize(self):
         """Initialize assessment service"""
         self.profiles_service = LearningProfilesService(self.config)
-        self.adaptations_service = AdaptationsService(self.config)
+        self.adaptations_service = get_adaptations_service(self.config)
     
     def assess_content(self, content: Dict[str, Any], profile_id: Optional[str] = None) -> Dict[str, Any]:
         """
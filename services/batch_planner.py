@@ -0,0 +1,186 @@
+"""
+Batch Planner
+
+Token estimation and batch packing for AI adaptation requests.
+
+Token counts are estimated locally with per-script rules that approximate how
+BPE tokenizers split text: CJK characters are roughly one token each, Latin
+words one token per few characters, digits and symbols (common in scientific
+text) almost a token each. Texts are then bin-packed into as few requests as
+possible under input and predicted-output token budgets.
+"""
+import math
+import re
+from typing import List, Optional
+
+# Order matters: earlier alternatives win
+_TOKEN_PATTERN = re.compile(
+    r'(?P<cjk>[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+)'
+    r'|(?P<latin>[A-Za-zÀ-ɏ]+)'
+    r'|(?P<other>[^\W\d_]+)'
+    r'|(?P<digits>\d+)'
+    r'|(?P<space>\s+)'
+    r'|(?P<symbol>.)',
+    re.DOTALL
+)
+
+# Approximate adapted/original length ratio per profile
+OUTPUT_RATIOS = {
+    'dyslexia': 1.3,
+    'adhd': 1.2,
+    'esl': 1.6,  # ESL keeps originals in parentheses
+}
+DEFAULT_OUTPUT_RATIO = 1.4
+
+# "### TEXT N ###" marker plus surrounding newlines
+MARKER_TOKENS = 8
+
+MIN_MAX_TOKENS = 512
+MAX_MAX_TOKENS = 8000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in text
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+
+    tokens = 0.0
+    for match in _TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        length = match.end() - match.start()
+        if kind == 'cjk':
+            tokens += length
+        elif kind == 'latin':
+            tokens += math.ceil(length / 5)
+        elif kind == 'other':
+            # Cyrillic, Greek, Arabic, Devanagari... split into short pieces
+            tokens += math.ceil(length / 2)
+        elif kind == 'digits':
+            tokens += math.ceil(length / 3)
+        elif kind == 'space':
+            tokens += match.group().count('\n') * 0.5
+        else:
+            tokens += 1
+    return max(1, int(math.ceil(tokens)))
+
+
+def predict_output_tokens(text: str, profile_id: Optional[str] = None,
+                          input_tokens: Optional[int] = None) -> int:
+    """
+    Predict the tokens needed for the adapted version of text
+
+    Args:
+        text: Original text
+        profile_id: Learning profile ID
+        input_tokens: Precomputed estimate_tokens(text), if available
+
+    Returns:
+        Predicted output token count including the batch marker
+    """
+    if input_tokens is None:
+        input_tokens = estimate_tokens(text)
+    ratio = OUTPUT_RATIOS.get((profile_id or '').lower(), DEFAULT_OUTPUT_RATIO)
+    return int(math.ceil(input_tokens * ratio)) + MARKER_TOKENS
+
+
+def choose_max_tokens(texts: List[str], profile_id: Optional[str] = None,
+                      headroom: float = 1.5) -> int:
+    """
+    Choose max_tokens for a request from the predicted output size
+
+    Args:
+        texts: Texts in the request
+        profile_id: Learning profile ID
+        headroom: Multiplier over the prediction to avoid truncation
+
+    Returns:
+        max_tokens value clamped to a sensible range
+    """
+    predicted = sum(predict_output_tokens(text, profile_id) for text in texts)
+    return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, int(predicted * headroom) + 128))
+
+
+def plan_batches(texts: List[str], profile_id: Optional[str] = None,
+                 max_batch_size: int = 10, max_input_tokens: int = 4000,
+                 max_output_tokens: int = 5000, groups: Optional[List[int]] = None,
+                 window_batches: int = 2) -> List[List[int]]:
+    """
+    Bin-pack texts into as few requests as possible
+
+    Uses first-fit decreasing on estimated input tokens, subject to the
+    per-request text count, input budget and predicted output budget. A text
+    that exceeds a budget on its own gets a request to itself.
+
+    With groups (e.g. the slide each text is on), texts are packed in windows
+    of consecutive groups holding about window_batches full requests, cut at
+    group boundaries. A group's texts then share the requests of their window
+    instead of being spread over the whole input, so early groups complete
+    with the first requests.
+
+    Args:
+        texts: Texts to adapt
+        profile_id: Learning profile ID (drives output prediction)
+        max_batch_size: Maximum texts per request
+        max_input_tokens: Input token budget per request
+        max_output_tokens: Predicted output token budget per request
+        groups: Group of each text, with each group's texts adjacent
+        window_batches: Requests' worth of texts per window when grouping
+
+    Returns:
+        Lists of indices into texts, one list per request. Indices within a
+        request are ascending and requests are ordered by their first index.
+    """
+    sizes = []
+    for index, text in enumerate(texts):
+        input_tokens = estimate_tokens(text) + MARKER_TOKENS
+        output_tokens = predict_output_tokens(text, profile_id, input_tokens - MARKER_TOKENS)
+        sizes.append((input_tokens, output_tokens, index))
+
+    budgets = (max_batch_size, max_input_tokens, max_output_tokens)
+    if groups is None:
+        return _pack(sizes, *budgets)
+
+    batches = []
+    window = []
+    window_tokens = 0
+    for index, size in enumerate(sizes):
+        if (window and groups[index] != groups[index - 1] and
+                (len(window) >= window_batches * max_batch_size or
+                 window_tokens >= window_batches * max_input_tokens)):
+            batches.extend(_pack(window, *budgets))
+            window = []
+            window_tokens = 0
+        window.append(size)
+        window_tokens += size[0]
+    if window:
+        batches.extend(_pack(window, *budgets))
+    return batches
+
+
+def _pack(sizes, max_batch_size: int, max_input_tokens: int,
+          max_output_tokens: int) -> List[List[int]]:
+    """First-fit decreasing over (input_tokens, output_tokens, index) entries"""
+    bins = []  # [input_total, output_total, [indices]]
+    for input_tokens, output_tokens, index in sorted(sizes, key=lambda item: (-item[0], item[2])):
+        for current in bins:
+            if (len(current[2]) < max_batch_size and
+                    current[0] + input_tokens <= max_input_tokens and
+                    current[1] + output_tokens <= max_output_tokens):
+                current[0] += input_tokens
+                current[1] += output_tokens
+                current[2].append(index)
+                break
+        else:
+            bins.append([input_tokens, output_tokens, [index]])
+
+    batches = [sorted(current[2]) for current in bins]
+    batches.sort(key=lambda indices: indices[0])
+    return batches
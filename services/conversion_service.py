@@ -10,6 +10,7 @@ import tempfile
 import shutil
 from typing import Optional, Dict, Any, List, Tuple
 from .base_service import BaseService
+from .output_quality import QUALITY_SETTINGS
 from pptx import Presentation
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
@@ -26,24 +27,8 @@ class ConversionService(BaseService):
         self.system = platform.system()
         self.libreoffice_path = self._find_libreoffice()
         
-        # Quality settings
-        self.quality_settings = {
-            'high': {
-                'dpi': 300,
-                'image_quality': 95,
-                'compress': False
-            },
-            'medium': {
-                'dpi': 150,
-                'image_quality': 85,
-                'compress': True
-            },
-            'low': {
-                'dpi': 96,
-                'image_quality': 70,
-                'compress': True
-            }
-        }
+        # Quality settings (tiers shared with the PDF output raster policy)
+        self.quality_settings = {tier: dict(settings) for tier, settings in QUALITY_SETTINGS.items()}
     
     def _find_libreoffice(self) -> Optional[str]:
         """Find LibreOffice installation"""
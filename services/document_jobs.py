@@ -0,0 +1,126 @@
+"""
+Document Jobs
+
+Background job handlers for document processing. These run wherever a
+ProcessingTaskService has them registered: inside the web process's worker
+pool, or in a dedicated worker process (worker.py) pulling from the shared
+Redis queue. Progress and results are written back through the
+ProcessingTaskService so the web tier can report them.
+"""
+import os
+import logging
+from typing import Dict, Any, Optional
+
+from .processing_task_service import ProcessingTaskService
+
+
+PDF_JOB = 'process_pdf'
+PPTX_JOB = 'process_pptx'
+
+logger = logging.getLogger('DocumentJobs')
+
+
+def register_document_jobs(task_service: ProcessingTaskService, config: Dict[str, Any],
+                           pdf_service=None, pptx_service=None):
+    """
+    Register the PDF and PowerPoint job handlers on a task service
+
+    Args:
+        task_service: Service that owns the job queue and task state
+        config: Service configuration used to build missing services
+        pdf_service: Existing PDFService to reuse (optional)
+        pptx_service: Existing PowerPointService to reuse (optional)
+    """
+    if pdf_service is None:
+        from .pdf_service import PDFService
+        pdf_service = PDFService(config)
+    if pptx_service is None:
+        from .pptx_service import PowerPointService
+        pptx_service = PowerPointService(config)
+
+    def report(file_id: str, message: str, percentage: int):
+        task_service.update_progress(file_id, percentage, 100, message)
+
+    def finish(file_id: str, output_path: Optional[str], error: Optional[str] = None, **extra):
+        if not output_path:
+            # Recorded on the task by ProcessingTaskService.run_next_job
+            raise RuntimeError(error or 'Processing returned no result')
+        updates = {
+            'status': 'completed',
+            'message': 'Processing completed successfully!',
+            'adapted_path': output_path,
+            'output_path': output_path,
+            'output_bytes': os.path.getsize(output_path) if os.path.exists(output_path) else None,
+            'progress': {'total': 100, 'processed': 100, 'percentage': 100}
+        }
+        updates.update(extra)
+        task_service.update_task(file_id, updates)
+
+    def process_pdf(file_path: str, file_id: str, filename: str, profile: str,
+                    export_format: str = 'pdf', target_language: Optional[str] = None,
+                    output_quality: Optional[str] = None):
+        """Adapt (and optionally translate) a PDF with the template system"""
+        logger.info(f"Processing PDF job for {file_id} ({filename})")
+        output_dir = config.get('output_folder', config.get('output_dir', 'outputs'))
+        failure = {}
+        details = {}
+
+        def on_progress(fid: str, message: str, percentage: int):
+            # The template system reports failures as a negative percentage
+            if percentage < 0:
+                failure['error'] = message
+            else:
+                report(fid, message, percentage)
+
+        output_path = pdf_service.process_with_template_system(
+            file_path, file_id, filename, profile, export_format, target_language,
+            processing_callback=on_progress,
+            output_path_callback=lambda fid, name: os.path.join(output_dir, f"{fid}_{name}"),
+            output_quality=output_quality,
+            result_callback=lambda fid, result: details.update(result)
+        )
+
+        extra = {
+            'export_format': export_format,
+            'output_quality': output_quality,
+            'adapted_content': details.get('adapted_content', {})
+        }
+        if output_path and target_language and target_language.strip():
+            translated_path = details.get('translated_output_path')
+            if translated_path:
+                extra.update({
+                    'translated_output_path': translated_path,
+                    'translated_path': translated_path,
+                    'translated_filename': os.path.basename(translated_path)[len(f"{file_id}_"):],
+                    'translated_language': target_language.title(),
+                    'translation_languages': [target_language],
+                    'has_translation': True
+                })
+            else:
+                logger.warning(f"Translation to {target_language} failed for {file_id}")
+                extra['translation_error'] = f'Translation to {target_language} failed'
+        finish(file_id, output_path, failure.get('error'), **extra)
+
+    def process_pptx(file_path: str, file_id: str, filename: str, profile: str,
+                     target_language: Optional[str] = None, translation_mode: str = 'copy'):
+        """Adapt or translate a PowerPoint presentation"""
+        logger.info(f"Processing PowerPoint job for {file_id} ({filename})")
+        if target_language and target_language.strip():
+            report(file_id, f'Translating content to {target_language}...', 5)
+            if translation_mode == 'replace':
+                output_path = pptx_service.translate_presentation_in_place(
+                    file_path, file_id, filename, target_language
+                )
+            else:
+                output_path = pptx_service.translate_presentation(
+                    file_path, file_id, filename, target_language
+                )
+        else:
+            output_path = pptx_service.process_presentation_efficiently(
+                file_path, file_id, filename, profile, target_language,
+                progress_callback=lambda message, percentage: report(file_id, message, percentage)
+            )
+        finish(file_id, output_path)
+
+    task_service.register_job_handler(PDF_JOB, process_pdf)
+    task_service.register_job_handler(PPTX_JOB, process_pptx)
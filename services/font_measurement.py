@@ -0,0 +1,227 @@
+"""
+Font Measurement
+
+Text measurement for fitting adapted text into PowerPoint shapes. Loaded
+PIL fonts are kept in an LRU keyed by (font, size), including the fallback
+used when a font cannot be found, so each size is loaded once rather than on
+every probe. Text is measured on one reusable draw context per thread, and
+bounding boxes are memoized per (font, size, text), so fitting the same
+lines again (another probe, another shape, another slide) is a lookup.
+
+Each font's advance widths are also tabulated once at REFERENCE_SIZE and
+scaled linearly, which predicts the size (or the amount of text) that fits
+a box without measuring. Rendered widths are hinted and rounded to pixels,
+so the prediction only seeds find_boundary, which settles the answer with a
+few exact measurements.
+"""
+import os
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+BBox = Tuple[int, int, int, int]
+
+# Pixel size at which advance widths are tabulated
+REFERENCE_SIZE = 100
+
+
+class FontAdvances:
+    """
+    Advance widths of one font, tabulated at REFERENCE_SIZE
+
+    Widths at other sizes are the reference widths times scale(size). PIL's
+    bitmap fallback font ignores the requested size, so its scale is 1.
+    """
+
+    def __init__(self, font):
+        """
+        Args:
+            font: Font loaded at REFERENCE_SIZE
+        """
+        self.font = font
+        self.scalable = isinstance(font, ImageFont.FreeTypeFont)
+        self._advances: Dict[str, float] = {}
+        left, top, right, bottom = font.getbbox('Ag')
+        self.line_height = bottom - top
+
+    def scale(self, size: float) -> float:
+        """Factor from reference widths to widths at a pixel size"""
+        return size / REFERENCE_SIZE if self.scalable else 1.0
+
+    def char_width(self, char: str) -> float:
+        """Advance width of one character at the reference size"""
+        width = self._advances.get(char)
+        if width is None:
+            width = self._advances[char] = self.font.getlength(char)
+        return width
+
+    def text_width(self, text: str) -> float:
+        """Width of a single line at the reference size (no kerning)"""
+        return sum([self.char_width(c) for c in text])
+
+
+def find_boundary(fits: Callable[[int], bool], guess: int, low: int, high: int) -> int:
+    """
+    Largest n in [low, high] for which fits(n) holds
+
+    fits must hold up to some point and fail after it (like text fitting at
+    growing font sizes, or growing prefixes of a text). The search gallops
+    outward from guess and then bisects, so a good guess costs two calls
+    and a bad one no more than a plain binary search over the range.
+
+    Args:
+        fits: Monotone predicate
+        guess: Predicted answer
+        low: Smallest candidate
+        high: Largest candidate
+
+    Returns:
+        The largest fitting n, or low - 1 if nothing fits
+    """
+    if high < low:
+        return low - 1
+    guess = min(max(guess, low), high)
+    step = 1
+    if fits(guess):
+        good, bad = guess, None
+        while good < high:
+            probe = min(good + step, high)
+            if not fits(probe):
+                bad = probe
+                break
+            good = probe
+            step *= 2
+        if bad is None:
+            return good
+    else:
+        good, bad = None, guess
+        while bad > low:
+            probe = max(bad - step, low)
+            if fits(probe):
+                good = probe
+                break
+            bad = probe
+            step *= 2
+        if good is None:
+            return low - 1
+
+    while bad - good > 1:
+        middle = (good + bad) // 2
+        if fits(middle):
+            good = middle
+        else:
+            bad = middle
+    return good
+
+
+class TextMeasurer:
+    """Cached font loading and text bounding boxes"""
+
+    def __init__(self, font_cache_size: int = 128, measure_cache_size: int = 16384):
+        """
+        Create a measurer
+
+        Args:
+            font_cache_size: Loaded (font, size) pairs to keep
+            measure_cache_size: Memoized (font, size, text) measurements to keep
+        """
+        self.font_cache_size = font_cache_size
+        self.measure_cache_size = measure_cache_size
+        self.get_font = functools.lru_cache(maxsize=font_cache_size)(self._load_font)
+        self.text_bbox = functools.lru_cache(maxsize=measure_cache_size)(self._measure)
+        self.get_advances = functools.lru_cache(maxsize=font_cache_size)(self._load_advances)
+        self._local = threading.local()
+
+    def _load_font(self, font_name: str, size: int):
+        """
+        Load a font at a size
+
+        Args:
+            font_name: Font file or family name understood by ImageFont.truetype
+            size: Size in pixels
+
+        Returns:
+            The font, PIL's default font if it cannot be loaded, or None if
+            neither is available
+        """
+        try:
+            return ImageFont.truetype(font_name, size)
+        except (OSError, IOError):
+            # Fallback to default font if specified font not found
+            try:
+                return ImageFont.load_default()
+            except Exception:
+                return None
+
+    def _load_advances(self, font_name: str) -> Optional[FontAdvances]:
+        """Advance table of a font (see get_font), or None if no font is available"""
+        font = self.get_font(font_name, REFERENCE_SIZE)
+        return FontAdvances(font) if font is not None else None
+
+    def _draw(self) -> ImageDraw.ImageDraw:
+        """Draw context for measuring, one per thread"""
+        draw = getattr(self._local, 'draw', None)
+        if draw is None:
+            draw = self._local.draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        return draw
+
+    def _measure(self, font_name: str, size: int, text: str) -> Optional[BBox]:
+        """
+        Bounding box of text as ImageDraw.textbbox reports it at (0, 0)
+
+        Args:
+            font_name: Font name (see get_font)
+            size: Size in pixels
+            text: Text to measure; line breaks are laid out as multiline text
+
+        Returns:
+            (left, top, right, bottom) in pixels, or None if no font is available
+        """
+        font = self.get_font(font_name, size)
+        if font is None:
+            return None
+        return tuple(self._draw().textbbox((0, 0), text, font=font))
+
+    def text_size(self, font_name: str, size: int, text: str) -> Optional[Tuple[int, int]]:
+        """(width, height) in pixels of text, or None if no font is available"""
+        bbox = self.text_bbox(font_name, size, text)
+        if bbox is None:
+            return None
+        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+    def clear(self):
+        self.get_font.cache_clear()
+        self.text_bbox.cache_clear()
+        self.get_advances.cache_clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics for fonts and measurements"""
+        fonts = self.get_font.cache_info()
+        measurements = self.text_bbox.cache_info()
+        return {
+            'fonts_loaded': fonts.currsize,
+            'font_hits': fonts.hits,
+            'font_misses': fonts.misses,
+            'measurements_cached': measurements.currsize,
+            'measure_hits': measurements.hits,
+            'measure_misses': measurements.misses
+        }
+
+
+_measurer = None
+_measurer_lock = threading.Lock()
+
+
+def get_text_measurer() -> TextMeasurer:
+    """Process-wide measurer (sized by PPTX_FONT_CACHE_SIZE / PPTX_MEASURE_CACHE_SIZE)"""
+    global _measurer
+    with _measurer_lock:
+        if _measurer is None:
+            _measurer = TextMeasurer(
+                int(os.getenv('PPTX_FONT_CACHE_SIZE', 128)),
+                int(os.getenv('PPTX_MEASURE_CACHE_SIZE', 16384))
+            )
+        return _measurer
@@ -19,6 +19,7 @@ from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_JUSTIFY
 from .base_service import BaseService
 from .pdf_visual_handler import PDFVisualHandler
+from .pdf_layout import get_document_layout
 
 
 class FormatsService(BaseService):
@@ -27,7 +28,7 @@ class FormatsService(BaseService):
     def _initialize(self):
         """Initialize format handlers"""
         self.pdf_handler = PDFHandler()
-        self.pdf_visual_handler = PDFVisualHandler()
+        self.pdf_visual_handler = PDFVisualHandler(service_config=self.config)
         self.pptx_handler = PowerPointHandler()
     
     def extract_content(self, file_path: str, file_type: str, 
@@ -163,38 +164,41 @@ class PDFHandler:
         }
         
         try:
-            doc = fitz.open(file_path)
+            # Shared cached layout, so later stages do not parse the PDF again
+            layout = get_document_layout(file_path)
             
             # Extract metadata
+            metadata = layout.get_metadata()
             content['metadata'] = {
-                'page_count': doc.page_count,
-                'title': doc.metadata.get('title', ''),
-                'author': doc.metadata.get('author', ''),
-                'subject': doc.metadata.get('subject', '')
+                'page_count': layout.page_count,
+                'title': metadata.get('title', ''),
+                'author': metadata.get('author', ''),
+                'subject': metadata.get('subject', '')
             }
             
             # Extract pages
-            for page_num, page in enumerate(doc):
+            for page_num, page_layout in enumerate(layout.pages):
                 page_content = {
                     'page_number': page_num + 1,
-                    'text': page.get_text(),
+                    'text': page_layout.text,
                     'images': [],
                     'tables': []
                 }
                 
-                # Extract images
-                image_list = page.get_images()
-                for img_index, img in enumerate(image_list):
+                # Extract images (each image once, however often it is placed)
+                seen_xrefs = set()
+                for image in page_layout.images:
+                    if image.xref in seen_xrefs:
+                        continue
+                    seen_xrefs.add(image.xref)
                     page_content['images'].append({
-                        'index': img_index,
-                        'width': img[2],
-                        'height': img[3]
+                        'index': len(page_content['images']),
+                        'width': image.width,
+                        'height': image.height
                     })
                 
                 content['pages'].append(page_content)
             
-            doc.close()
-            
         except Exception as e:
             raise Exception(f"Error extracting PDF content: {str(e)}")
         
@@ -0,0 +1,194 @@
+"""
+Output Quality
+
+Quality tiers for rendered document output and the raster policy the PDF
+handlers use when a page background has to be rasterized. The tiers are the
+ones ConversionService uses for slide images; here they cap the resolution
+of a page and pick how its background image is encoded.
+"""
+import io
+import logging
+from collections import Counter
+from typing import Dict, Any, Optional
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+
+# Shared quality tiers (ConversionService.quality_settings)
+QUALITY_SETTINGS = {
+    'high': {
+        'dpi': 300,
+        'image_quality': 95,
+        'compress': False
+    },
+    'medium': {
+        'dpi': 150,
+        'image_quality': 85,
+        'compress': True
+    },
+    'low': {
+        'dpi': 96,
+        'image_quality': 70,
+        'compress': True
+    }
+}
+
+# Resolution of flat pages (text, plain fills); PDF user space is 72 dpi
+MIN_RASTER_DPI = 72
+
+# Vector drawings on a page that count as fully complex
+COMPLEX_DRAWING_COUNT = 200
+
+# Renders with at most this many distinct colors are stored as palette PNGs
+PALETTE_COLORS = 256
+
+# PIL modes for (components, alpha) of fitz pixmaps
+_PIXMAP_MODES = {(1, 0): 'L', (3, 0): 'RGB', (4, 1): 'RGBA'}
+
+
+def get_quality_settings(quality: Optional[str]) -> Dict[str, Any]:
+    """
+    Settings for a quality tier
+
+    Args:
+        quality: 'high', 'medium' or 'low'; unknown values fall back to 'high'
+
+    Returns:
+        Tier settings (dpi, image_quality, compress)
+    """
+    return QUALITY_SETTINGS.get(quality, QUALITY_SETTINGS['high'])
+
+
+class RasterPolicy:
+    """
+    Per-document rasterization policy for one quality tier
+
+    Pages get a resolution between MIN_RASTER_DPI and the tier's dpi depending
+    on how much image and vector content they have. Renders are encoded as
+    palette PNG when they have few colors, otherwise as JPEG at the tier's
+    image_quality (or lossless PNG for tiers without compression). Encoded
+    sizes are tallied so callers can report what a tier costs.
+    """
+
+    def __init__(self, quality: Optional[str] = 'medium'):
+        """
+        Create a policy
+
+        Args:
+            quality: Quality tier name (see QUALITY_SETTINGS)
+        """
+        self.quality = quality if quality in QUALITY_SETTINGS else 'high'
+        self.settings = QUALITY_SETTINGS[self.quality]
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.pages = 0
+        self.encoded_bytes = 0
+        self.formats = Counter()
+
+    def page_complexity(self, page, page_layout=None) -> float:
+        """
+        Estimate how much detail a page's background carries
+
+        Args:
+            page: PyMuPDF page (the original, not a rendered copy)
+            page_layout: The page's PageLayout, used instead of re-reading the page
+
+        Returns:
+            0.0 for flat pages up to 1.0 for pages with images or dense vector art
+        """
+        try:
+            if page_layout is not None:
+                images, drawing_count = page_layout.images, len(page_layout.drawings)
+            else:
+                images, drawing_count = page.get_images(), len(page.get_drawings())
+            if images:
+                return 1.0
+            return min(1.0, drawing_count / COMPLEX_DRAWING_COUNT)
+        except Exception as e:
+            self.logger.debug(f"Could not inspect page content: {e}")
+            return 1.0
+
+    def page_dpi(self, page, page_layout=None) -> int:
+        """
+        Choose the render resolution for a page
+
+        Args:
+            page: PyMuPDF page (the original, not a rendered copy)
+            page_layout: The page's PageLayout (optional)
+
+        Returns:
+            Resolution in dpi, at most the tier's dpi
+        """
+        tier_dpi = self.settings['dpi']
+        floor_dpi = min(MIN_RASTER_DPI, tier_dpi)
+        return int(round(floor_dpi + (tier_dpi - floor_dpi) * self.page_complexity(page, page_layout)))
+
+    def render(self, page, dpi: Optional[int] = None) -> bytes:
+        """
+        Render a page and encode it
+
+        Args:
+            page: Page to render
+            dpi: Resolution (chosen with page_dpi if omitted)
+
+        Returns:
+            Encoded image bytes for fitz.Page.insert_image(stream=...)
+        """
+        zoom = (dpi or self.page_dpi(page)) / 72.0
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return self.encode(pixmap)
+
+    def encode(self, pixmap) -> bytes:
+        """
+        Encode a rendered page
+
+        Args:
+            pixmap: fitz.Pixmap to encode
+
+        Returns:
+            PNG or JPEG bytes
+        """
+        mode = _PIXMAP_MODES.get((pixmap.n, int(pixmap.alpha)))
+        if mode is None:
+            # Other colorspaces (e.g. CMYK) are kept lossless as PyMuPDF writes them
+            data = pixmap.tobytes('png')
+            self.record(data)
+            return data
+
+        image = Image.frombuffer(
+            mode, (pixmap.width, pixmap.height), pixmap.samples_mv, 'raw', mode, pixmap.stride, 1
+        )
+        if image.mode == 'RGBA':
+            image = image.convert('RGB')
+
+        buffer = io.BytesIO()
+        colors = image.getcolors(PALETTE_COLORS)
+        if colors is not None:
+            # Few colors (flat backgrounds): lossless and small as a palette PNG
+            if image.mode != 'L':
+                image = image.convert('P', palette=Image.ADAPTIVE, colors=len(colors))
+            image.save(buffer, format='PNG', optimize=True)
+        elif self.settings['compress']:
+            image.save(buffer, format='JPEG', quality=self.settings['image_quality'], optimize=True)
+        else:
+            image.save(buffer, format='PNG')
+
+        data = buffer.getvalue()
+        self.record(data)
+        return data
+
+    def record(self, data: bytes):
+        """Count an encoded page (including ones encoded in another process)"""
+        self.pages += 1
+        self.encoded_bytes += len(data)
+        self.formats['jpeg' if data[:3] == b'\xff\xd8\xff' else 'png'] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals for the pages encoded with this policy"""
+        return {
+            'quality': self.quality,
+            'pages': self.pages,
+            'encoded_bytes': self.encoded_bytes,
+            'formats': dict(self.formats)
+        }
@@ -0,0 +1,144 @@
+"""
+Page Geometry Index
+
+Spatial index over the image and filled-rectangle areas of a PDF page. The
+page's images and drawings are read once when the index is built; overlap
+queries then only look at the grid cells a rectangle touches instead of
+re-parsing the page for every text block.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+
+# Filled rectangles at least this large (in points) are treated as image placeholders
+MIN_PLACEHOLDER_SIZE = 50
+
+
+class PageGeometryIndex:
+    """Uniform-grid index of image and filled-rectangle bounding boxes on a page"""
+
+    def __init__(self, page_rect: fitz.Rect, cell_size: float = 64.0):
+        """
+        Create an empty index
+
+        Args:
+            page_rect: Page bounds; indexed rects are clipped to them
+            cell_size: Grid cell edge length in points
+        """
+        self.page_rect = fitz.Rect(page_rect)
+        self.cell_size = cell_size
+        self.image_rects: List[fitz.Rect] = []
+        self.fill_rects: List[fitz.Rect] = []
+        self._cells: Dict[Tuple[int, int], List[Tuple[str, int]]] = defaultdict(list)
+
+    @classmethod
+    def from_page(cls, page, cell_size: float = 64.0) -> 'PageGeometryIndex':
+        """
+        Build the index for a page, reading its images and drawings once
+
+        Args:
+            page: PyMuPDF page
+            cell_size: Grid cell edge length in points
+
+        Returns:
+            Populated PageGeometryIndex
+        """
+        index = cls(page.rect, cell_size)
+
+        try:
+            drawings = page.get_drawings()
+        except Exception as e:
+            print(f"    Error reading drawings: {e}")
+            drawings = []
+
+        # Rect of the first image-type drawing, used when an image has no bbox
+        drawing_image_rect = None
+        for drawing in drawings:
+            if drawing.get('type') == 'image':
+                drawing_image_rect = fitz.Rect(drawing['rect'])
+                break
+
+        try:
+            images = page.get_images()
+        except Exception as e:
+            print(f"    Error reading images: {e}")
+            images = []
+
+        for img in images:
+            img_rect = None
+            try:
+                img_rect = page.get_image_bbox(img[0])
+            except Exception:
+                pass
+            if not img_rect:
+                img_rect = drawing_image_rect
+            if img_rect:
+                index.add_image(img_rect)
+
+        for drawing in drawings:
+            if drawing.get('type') == 'rect' and drawing.get('fill'):
+                rect = fitz.Rect(drawing['rect'])
+                if rect.width > MIN_PLACEHOLDER_SIZE and rect.height > MIN_PLACEHOLDER_SIZE:
+                    index.add_fill(rect)
+
+        return index
+
+    def add_image(self, rect: fitz.Rect):
+        """Index an image bounding box"""
+        self._add('image', self.image_rects, rect)
+
+    def add_fill(self, rect: fitz.Rect):
+        """Index a filled rectangle that may stand in for an image"""
+        self._add('fill', self.fill_rects, rect)
+
+    def find_covering(self, text_rect: fitz.Rect, min_overlap: float = 0.5) -> Optional[Tuple[str, fitz.Rect, float]]:
+        """
+        Find an indexed area covering more than min_overlap of a rectangle
+
+        Images are preferred over filled rectangles.
+
+        Args:
+            text_rect: Rectangle to test (usually a text block)
+            min_overlap: Fraction of text_rect's area that must be covered
+
+        Returns:
+            (kind, rect, overlap_ratio) for the first match, or None
+        """
+        text_rect = fitz.Rect(text_rect)
+        area = text_rect.get_area()
+        if area <= 0:
+            return None
+
+        candidates = set()
+        for cell in self._cells_for(text_rect):
+            candidates.update(self._cells.get(cell, ()))
+
+        for kind, rects in (('image', self.image_rects), ('fill', self.fill_rects)):
+            for position in sorted(pos for entry_kind, pos in candidates if entry_kind == kind):
+                rect = rects[position]
+                if text_rect.intersects(rect):
+                    overlap_ratio = (text_rect & rect).get_area() / area
+                    if overlap_ratio > min_overlap:
+                        return kind, rect, overlap_ratio
+        return None
+
+    def _add(self, kind: str, rects: List[fitz.Rect], rect: fitz.Rect):
+        # Clip to the page so unbounded rects still land in finitely many cells
+        rect = fitz.Rect(rect) & self.page_rect
+        if rect.is_empty:
+            return
+        rects.append(rect)
+        for cell in self._cells_for(rect):
+            self._cells[cell].append((kind, len(rects) - 1))
+
+    def _cells_for(self, rect: fitz.Rect):
+        """Grid cells overlapped by rect"""
+        x0 = int(max(rect.x0, self.page_rect.x0) // self.cell_size)
+        y0 = int(max(rect.y0, self.page_rect.y0) // self.cell_size)
+        x1 = int(min(rect.x1, self.page_rect.x1) // self.cell_size)
+        y1 = int(min(rect.y1, self.page_rect.y1) // self.cell_size)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
@@ -0,0 +1,131 @@
+"""
+Page Sample Cache
+
+Bounded, process-wide cache for values derived from what a PDF page looks
+like: background colors sampled around text blocks and the image/filled-rect
+geometry used to decide which blocks to mask. Entries are keyed by a hash of
+the page's content (content stream, images, forms and fonts) and quantized
+rectangles, never by object identity, so they stay valid across documents
+and jobs. Sampled regions are also keyed by a digest of their pixels, which
+lets recurring templates (the same worksheet header on every page, a slide
+master exported to PDF) reuse colors even when the rest of the page differs.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+
+# Rect coordinates are rounded to this many points before they become keys
+RECT_QUANTUM = 0.25
+
+
+def quantize_rect(rect, quantum: float = RECT_QUANTUM) -> Tuple[int, ...]:
+    """Rect (or point) coordinates as integer multiples of quantum"""
+    return tuple(int(round(value / quantum)) for value in rect)
+
+
+def page_content_hash(page) -> str:
+    """
+    Hash of everything that determines how a page renders
+
+    Covers the page size and rotation, its content stream, and the
+    definitions and data of the images, form XObjects and fonts it uses.
+    Resource digests are remembered on the page object, so only the content
+    stream is re-read when a page is hashed again (e.g. after drawing on it).
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        Hex digest
+    """
+    resource_digest = getattr(page, '_resource_digest', None)
+    if resource_digest is None:
+        doc = page.parent
+        digest = hashlib.blake2b(digest_size=16)
+        xrefs = sorted(
+            {item[0] for item in page.get_images(full=True)}
+            | {item[0] for item in page.get_xobjects()}
+            | {item[0] for item in page.get_fonts(full=True)}
+        )
+        for xref in xrefs:
+            if xref <= 0:
+                continue
+            digest.update(doc.xref_object(xref, compressed=True).encode('utf-8', 'replace'))
+            if doc.xref_is_stream(xref):
+                digest.update(doc.xref_stream_raw(xref) or b'')
+        resource_digest = digest.digest()
+        page._resource_digest = resource_digest
+
+    digest = hashlib.blake2b(resource_digest, digest_size=16)
+    digest.update(repr((tuple(page.rect), page.rotation)).encode('ascii'))
+    digest.update(page.read_contents())
+    return digest.hexdigest()
+
+
+def region_digest(region) -> str:
+    """Digest of a sampled pixel region (a NumPy array)"""
+    digest = hashlib.blake2b(repr(region.shape).encode('ascii'), digest_size=16)
+    digest.update(region.tobytes())
+    return digest.hexdigest()
+
+
+class PageSampleCache:
+    """LRU cache for page-derived samples, bounded by entry count"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(1, max_entries)
+        self.entries = OrderedDict()
+        self.hit_count = 0
+        self.miss_count = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value for key, or default"""
+        with self._lock:
+            if key not in self.entries:
+                self.miss_count += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hit_count += 1
+            return self.entries[key]
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries"""
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            total_requests = self.hit_count + self.miss_count
+            hit_rate = (self.hit_count / total_requests * 100) if total_requests > 0 else 0
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hit_count': self.hit_count,
+                'miss_count': self.miss_count,
+                'hit_rate': f"{hit_rate:.1f}%"
+            }
+
+
+_sample_cache = None
+_sample_cache_lock = threading.Lock()
+
+
+def get_page_sample_cache() -> PageSampleCache:
+    """Process-wide sample cache (sized by PDF_SAMPLE_CACHE_SIZE)"""
+    global _sample_cache
+    with _sample_cache_lock:
+        if _sample_cache is None:
+            _sample_cache = PageSampleCache(int(os.getenv('PDF_SAMPLE_CACHE_SIZE', 4096)))
+        return _sample_cache
@@ -0,0 +1,932 @@
+"""
+PDF Layout Model
+
+Immutable per-document layout (pages -> blocks -> lines -> spans, plus the
+images and vector drawings of each page) extracted from a PDF in a single
+pass. Layouts are cached by the file's content hash, so every stage of a job
+(content extraction, diagnosis, text removal, placement, quality metrics)
+works from the same parse instead of calling page.get_text("dict") again.
+
+The layout is stored column-wise in a LayoutStore: NumPy arrays for the
+boxes, sizes, flags and colors of every span, line, block and page, an
+interned string table for font names, and one text buffer with offsets.
+PageLayout, BlockLayout, LineLayout and SpanLayout are lightweight views
+into the store, so a cached document holds a few dozen arrays rather than a
+Python object per span, per-page and per-block column slices are NumPy
+views, and the whole store serializes to a compact binary blob.
+"""
+import os
+import json
+import struct
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, NamedTuple
+
+import numpy as np
+import fitz  # PyMuPDF
+
+
+# Same text extraction flags as get_text("dict"), without embedding image data
+LAYOUT_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Serialized layout: magic, format version, header length, JSON header, buffers
+LAYOUT_MAGIC = b'PDFLAYT'
+LAYOUT_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct('<7sBI')
+_ALIGNMENT = 8
+
+Rect = Tuple[float, float, float, float]
+
+# Column name -> (dtype, trailing shape). Columns ending in _start hold one
+# extra entry: row i of the parent owns children [start[i], start[i + 1]).
+_COLUMNS = OrderedDict([
+    ('page_number', (np.int32, ())),
+    ('page_size', (np.float64, (2,))),
+    ('page_rotation', (np.int16, ())),
+    ('page_block_start', (np.int64, ())),
+    ('page_image_start', (np.int64, ())),
+    ('page_drawing_start', (np.int64, ())),
+    ('block_number', (np.int32, ())),
+    ('block_bbox', (np.float64, (4,))),
+    ('block_line_start', (np.int64, ())),
+    ('line_bbox', (np.float64, (4,))),
+    ('line_wmode', (np.int8, ())),
+    ('line_dir', (np.float64, (2,))),
+    ('line_span_start', (np.int64, ())),
+    ('span_bbox', (np.float64, (4,))),
+    ('span_origin', (np.float64, (2,))),
+    ('span_size', (np.float64, ())),
+    ('span_ascender', (np.float64, ())),
+    ('span_descender', (np.float64, ())),
+    ('span_flags', (np.int32, ())),
+    ('span_color', (np.int64, ())),
+    ('span_font', (np.int32, ())),
+    ('span_text_start', (np.int64, ())),
+    ('image_xref', (np.int32, ())),
+    ('image_bbox', (np.float64, (4,))),
+    ('image_size', (np.int32, (2,))),
+    ('drawing_type', (np.int32, ())),
+    ('drawing_rect', (np.float64, (4,))),
+    ('drawing_fill', (np.float64, (4,))),
+    ('drawing_fill_len', (np.int8, ())),
+])
+
+
+class SpanColumns(NamedTuple):
+    """Column views over a range of spans (no copies are made)"""
+    bbox: np.ndarray
+    origin: np.ndarray
+    size: np.ndarray
+    flags: np.ndarray
+    color: np.ndarray
+    font_ids: np.ndarray
+    fonts: Tuple[str, ...]
+
+
+class ImageLayout(NamedTuple):
+    """An image placed on a page"""
+    xref: int
+    bbox: Rect
+    width: int
+    height: int
+
+
+class DrawingLayout(NamedTuple):
+    """A vector path on a page"""
+    type: str
+    rect: Rect
+    fill: Optional[Tuple[float, ...]]
+
+
+class LayoutStore:
+    """
+    Columnar storage for the layout of one or more pages
+
+    Arrays are read-only; views returned by page() and the span_columns()
+    helpers share memory with the store.
+    """
+
+    __slots__ = ('strings', 'text', '_columns')
+
+    def __init__(self, strings: Tuple[str, ...], text: str, columns: Dict[str, np.ndarray]):
+        """
+        Create a store
+
+        Args:
+            strings: Interned font names and drawing types, indexed by the *_font/*_type columns
+            text: All span text, concatenated in document order
+            columns: Arrays for every name in _COLUMNS
+        """
+        self.strings = tuple(strings)
+        self.text = text
+        self._columns = {}
+        for name in _COLUMNS:
+            array = columns[name]
+            if array.flags.writeable:
+                array.flags.writeable = False
+            self._columns[name] = array
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __reduce__(self):
+        return _load_store, (self.to_bytes(),)
+
+    @property
+    def page_count(self) -> int:
+        return len(self._columns['page_number'])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays and text buffer"""
+        return sum(array.nbytes for array in self._columns.values()) + len(self.text)
+
+    def page(self, index: int) -> 'PageLayout':
+        """View of one page"""
+        return PageLayout(self, index)
+
+    def span_columns(self, start: int, stop: int) -> SpanColumns:
+        """Column views for spans [start, stop)"""
+        return SpanColumns(
+            self.span_bbox[start:stop], self.span_origin[start:stop], self.span_size[start:stop],
+            self.span_flags[start:stop], self.span_color[start:stop], self.span_font[start:stop],
+            self.strings
+        )
+
+    def span_text(self, index: int) -> str:
+        starts = self.span_text_start
+        return self.text[starts[index]:starts[index + 1]]
+
+    def text_range(self, first_span: int, stop_span: int) -> str:
+        """Concatenated text of spans [first_span, stop_span)"""
+        starts = self.span_text_start
+        return self.text[starts[first_span]:starts[stop_span]]
+
+    def slice_pages(self, start: int, stop: int) -> 'LayoutStore':
+        """
+        Store holding only pages [start, stop)
+
+        Data columns are views into this store; only the offset columns are
+        rebased (copied).
+
+        Args:
+            start: First page index
+            stop: Page index after the last page
+
+        Returns:
+            New LayoutStore
+        """
+        c = self._columns
+        block_lo, block_hi = c['page_block_start'][start], c['page_block_start'][stop]
+        line_lo, line_hi = c['block_line_start'][block_lo], c['block_line_start'][block_hi]
+        span_lo, span_hi = c['line_span_start'][line_lo], c['line_span_start'][line_hi]
+        image_lo, image_hi = c['page_image_start'][start], c['page_image_start'][stop]
+        drawing_lo, drawing_hi = c['page_drawing_start'][start], c['page_drawing_start'][stop]
+        text_lo, text_hi = c['span_text_start'][span_lo], c['span_text_start'][span_hi]
+
+        ranges = {
+            'page': (start, stop), 'block': (block_lo, block_hi), 'line': (line_lo, line_hi),
+            'span': (span_lo, span_hi), 'image': (image_lo, image_hi),
+            'drawing': (drawing_lo, drawing_hi)
+        }
+        offsets = {
+            'page_block_start': block_lo, 'page_image_start': image_lo,
+            'page_drawing_start': drawing_lo, 'block_line_start': line_lo,
+            'line_span_start': span_lo, 'span_text_start': text_lo
+        }
+
+        columns = {}
+        for name, array in c.items():
+            lo, hi = ranges[name.split('_', 1)[0]]
+            if name in offsets:
+                columns[name] = array[lo:hi + 1] - offsets[name]
+            else:
+                columns[name] = array[lo:hi]
+        return LayoutStore(self.strings, self.text[text_lo:text_hi], columns)
+
+    def to_bytes(self, header: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Serialize the store
+
+        Args:
+            header: Extra JSON-serializable fields stored with the arrays
+
+        Returns:
+            Binary layout readable by LayoutStore.from_bytes
+        """
+        text_bytes = self.text.encode('utf-8')
+        arrays = {}
+        buffers = []
+        offset = 0
+
+        def add(data: bytes) -> int:
+            nonlocal offset
+            start = offset
+            buffers.append(data)
+            offset += len(data)
+            pad = -offset % _ALIGNMENT
+            if pad:
+                buffers.append(b'\0' * pad)
+                offset += pad
+            return start
+
+        text_offset = add(text_bytes)
+        for name, array in self._columns.items():
+            array = np.ascontiguousarray(array)
+            arrays[name] = [array.dtype.str, list(array.shape), add(array.tobytes())]
+
+        meta = dict(header or {})
+        meta.update({
+            'strings': list(self.strings),
+            'text': [text_offset, len(text_bytes)],
+            'arrays': arrays
+        })
+        meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+        meta_bytes += b' ' * (-(_PREAMBLE.size + len(meta_bytes)) % _ALIGNMENT)
+        preamble = _PREAMBLE.pack(LAYOUT_MAGIC, LAYOUT_FORMAT_VERSION, len(meta_bytes))
+        return b''.join([preamble, meta_bytes] + buffers)
+
+    @classmethod
+    def from_bytes(cls, data) -> Tuple['LayoutStore', Dict[str, Any]]:
+        """
+        Load a serialized store
+
+        Arrays are read directly from data without copying.
+
+        Args:
+            data: Bytes (or any buffer) written by to_bytes
+
+        Returns:
+            (store, header) where header holds the extra fields passed to to_bytes
+
+        Raises:
+            ValueError: If data is not a serialized layout of this version
+        """
+        if len(data) < _PREAMBLE.size:
+            raise ValueError("Truncated layout data")
+        magic, version, meta_len = _PREAMBLE.unpack_from(data, 0)
+        if magic != LAYOUT_MAGIC or version != LAYOUT_FORMAT_VERSION:
+            raise ValueError("Not a serialized PDF layout (or an unsupported version)")
+
+        base = _PREAMBLE.size + meta_len
+        meta = json.loads(bytes(data[_PREAMBLE.size:base]).decode('utf-8'))
+        text_offset, text_len = meta.pop('text')
+        text = bytes(data[base + text_offset:base + text_offset + text_len]).decode('utf-8')
+
+        columns = {}
+        for name, (dtype, shape, offset) in meta.pop('arrays').items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape)) if shape else 1
+            columns[name] = np.frombuffer(data, dtype=dtype, count=count,
+                                          offset=base + offset).reshape(shape)
+        strings = meta.pop('strings')
+        return cls(strings, text, columns), meta
+
+
+class SpanLayout:
+    """A run of text with one font, size and color (view into a LayoutStore)"""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: LayoutStore, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def text(self) -> str:
+        return self._store.span_text(self._index)
+
+    @property
+    def font(self) -> str:
+        return self._store.strings[self._store.span_font[self._index]]
+
+    @property
+    def size(self) -> float:
+        return float(self._store.span_size[self._index])
+
+    @property
+    def flags(self) -> int:
+        return int(self._store.span_flags[self._index])
+
+    @property
+    def color(self) -> int:
+        return int(self._store.span_color[self._index])
+
+    @property
+    def ascender(self) -> float:
+        return float(self._store.span_ascender[self._index])
+
+    @property
+    def descender(self) -> float:
+        return float(self._store.span_descender[self._index])
+
+    @property
+    def origin(self) -> Tuple[float, float]:
+        return tuple(self._store.span_origin[self._index].tolist())
+
+    @property
+    def bbox(self) -> Rect:
+        return tuple(self._store.span_bbox[self._index].tolist())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span in page.get_text("dict") form"""
+        return {
+            'size': self.size,
+            'flags': self.flags,
+            'font': self.font,
+            'color': self.color,
+            'ascender': self.ascender,
+            'descender': self.descender,
+            'text': self.text,
+            'origin': self.origin,
+            'bbox': self.bbox
+        }
+
+
+class LineLayout:
+    """A line of spans (view into a LayoutStore)"""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: LayoutStore, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def bbox(self) -> Rect:
+        return tuple(self._store.line_bbox[self._index].tolist())
+
+    @property
+    def wmode(self) -> int:
+        return int(self._store.line_wmode[self._index])
+
+    @property
+    def dir(self) -> Tuple[float, float]:
+        return tuple(self._store.line_dir[self._index].tolist())
+
+    @property
+    def span_range(self) -> Tuple[int, int]:
+        starts = self._store.line_span_start
+        return int(starts[self._index]), int(starts[self._index + 1])
+
+    @property
+    def spans(self) -> Tuple[SpanLayout, ...]:
+        start, stop = self.span_range
+        return tuple(SpanLayout(self._store, i) for i in range(start, stop))
+
+    @property
+    def text(self) -> str:
+        return self._store.text_range(*self.span_range)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Line in page.get_text("dict") form"""
+        return {
+            'spans': [span.to_dict() for span in self.spans],
+            'wmode': self.wmode,
+            'dir': self.dir,
+            'bbox': self.bbox
+        }
+
+
+class BlockLayout:
+    """A text block (view into a LayoutStore)"""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: LayoutStore, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def number(self) -> int:
+        return int(self._store.block_number[self._index])
+
+    @property
+    def bbox(self) -> Rect:
+        return tuple(self._store.block_bbox[self._index].tolist())
+
+    @property
+    def lines(self) -> Tuple[LineLayout, ...]:
+        starts = self._store.block_line_start
+        return tuple(LineLayout(self._store, i)
+                     for i in range(starts[self._index], starts[self._index + 1]))
+
+    @property
+    def span_range(self) -> Tuple[int, int]:
+        store = self._store
+        first_line, stop_line = store.block_line_start[self._index:self._index + 2]
+        return int(store.line_span_start[first_line]), int(store.line_span_start[stop_line])
+
+    def span_columns(self) -> SpanColumns:
+        """Column views for the spans of this block"""
+        return self._store.span_columns(*self.span_range)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Block in page.get_text("dict") form"""
+        return {
+            'number': self.number,
+            'type': 0,
+            'bbox': self.bbox,
+            'lines': [line.to_dict() for line in self.lines]
+        }
+
+
+class PageLayout:
+    """Layout of one page (view into a LayoutStore)"""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: LayoutStore, index: int):
+        self._store = store
+        self._index = index
+
+    def __reduce__(self):
+        # Pickle only this page's slice of the store (e.g. for render workers)
+        store = self._store.slice_pages(self._index, self._index + 1)
+        return _load_page, (store.to_bytes(),)
+
+    @property
+    def store(self) -> LayoutStore:
+        return self._store
+
+    @property
+    def number(self) -> int:
+        return int(self._store.page_number[self._index])
+
+    @property
+    def width(self) -> float:
+        return float(self._store.page_size[self._index, 0])
+
+    @property
+    def height(self) -> float:
+        return float(self._store.page_size[self._index, 1])
+
+    @property
+    def rotation(self) -> int:
+        return int(self._store.page_rotation[self._index])
+
+    @property
+    def block_range(self) -> Tuple[int, int]:
+        starts = self._store.page_block_start
+        return int(starts[self._index]), int(starts[self._index + 1])
+
+    @property
+    def blocks(self) -> Tuple[BlockLayout, ...]:
+        start, stop = self.block_range
+        return tuple(BlockLayout(self._store, i) for i in range(start, stop))
+
+    @property
+    def block_bboxes(self) -> np.ndarray:
+        """(blocks, 4) view of the text block boxes"""
+        return self._store.block_bbox[slice(*self.block_range)]
+
+    @property
+    def span_range(self) -> Tuple[int, int]:
+        store = self._store
+        first_block, stop_block = self.block_range
+        first_line, stop_line = store.block_line_start[first_block], store.block_line_start[stop_block]
+        return int(store.line_span_start[first_line]), int(store.line_span_start[stop_line])
+
+    def span_columns(self) -> SpanColumns:
+        """Column views for every span on the page"""
+        return self._store.span_columns(*self.span_range)
+
+    @property
+    def images(self) -> Tuple[ImageLayout, ...]:
+        store = self._store
+        starts = store.page_image_start
+        return tuple(
+            ImageLayout(int(store.image_xref[i]), tuple(store.image_bbox[i].tolist()),
+                        int(store.image_size[i, 0]), int(store.image_size[i, 1]))
+            for i in range(starts[self._index], starts[self._index + 1])
+        )
+
+    @property
+    def drawings(self) -> Tuple[DrawingLayout, ...]:
+        store = self._store
+        starts = store.page_drawing_start
+        drawings = []
+        for i in range(starts[self._index], starts[self._index + 1]):
+            fill_len = int(store.drawing_fill_len[i])
+            drawings.append(DrawingLayout(
+                store.strings[store.drawing_type[i]],
+                tuple(store.drawing_rect[i].tolist()),
+                tuple(store.drawing_fill[i, :fill_len].tolist()) if fill_len else None
+            ))
+        return tuple(drawings)
+
+    @property
+    def text(self) -> str:
+        """Plain text of the page, as page.get_text() returns it"""
+        store = self._store
+        first_block, stop_block = self.block_range
+        first_line, stop_line = store.block_line_start[first_block], store.block_line_start[stop_block]
+        span_starts = store.line_span_start[first_line:stop_line + 1]
+        text_starts = store.span_text_start[span_starts].tolist()
+        return ''.join(store.text[start:stop] + '\n' for start, stop in zip(text_starts, text_starts[1:]))
+
+    def text_dict(self) -> Dict[str, Any]:
+        """Text blocks in page.get_text("dict") form"""
+        return {
+            'width': self.width,
+            'height': self.height,
+            'blocks': [block.to_dict() for block in self.blocks]
+        }
+
+
+def _load_store(data: bytes) -> LayoutStore:
+    store, _ = LayoutStore.from_bytes(data)
+    return store
+
+
+def _load_page(data: bytes) -> PageLayout:
+    store, _ = LayoutStore.from_bytes(data)
+    return store.page(0)
+
+
+class DocumentLayout:
+    """Layout of a whole PDF"""
+
+    __slots__ = ('_file_hash', '_metadata', '_store', '_pages')
+
+    def __init__(self, file_hash: str, metadata: Tuple[Tuple[str, str], ...], store: LayoutStore):
+        self._file_hash = file_hash
+        self._metadata = tuple(tuple(item) for item in metadata)
+        self._store = store
+        self._pages = tuple(store.page(i) for i in range(store.page_count))
+
+    def __reduce__(self):
+        return DocumentLayout.from_bytes, (self.to_bytes(),)
+
+    @property
+    def file_hash(self) -> str:
+        return self._file_hash
+
+    @property
+    def metadata(self) -> Tuple[Tuple[str, str], ...]:
+        return self._metadata
+
+    @property
+    def store(self) -> LayoutStore:
+        return self._store
+
+    @property
+    def pages(self) -> Tuple[PageLayout, ...]:
+        return self._pages
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def get_metadata(self) -> Dict[str, str]:
+        """Document metadata as a new dict"""
+        return dict(self._metadata)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the layout (see DocumentLayout.from_bytes)"""
+        return self._store.to_bytes({'file_hash': self._file_hash, 'metadata': self._metadata})
+
+    @classmethod
+    def from_bytes(cls, data) -> 'DocumentLayout':
+        """
+        Load a layout written by to_bytes
+
+        Args:
+            data: Serialized layout (bytes, memoryview or mmap)
+
+        Returns:
+            DocumentLayout whose arrays read directly from data
+        """
+        store, header = LayoutStore.from_bytes(data)
+        return cls(header.get('file_hash', ''), header.get('metadata', ()), store)
+
+
+class _LayoutBuilder:
+    """Accumulates parsed pages and packs them into a LayoutStore"""
+
+    def __init__(self):
+        self.strings = {}
+        self.text_parts = []
+        self.text_length = 0
+        self.rows = {name: [] for name in _COLUMNS}
+        for name in _COLUMNS:
+            if name.endswith('_start'):
+                self.rows[name].append(0)
+
+    def intern(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def add_page(self, page):
+        """Parse a page's text, images and drawings"""
+        rows = self.rows
+        for block in page.get_text("dict", flags=LAYOUT_TEXT_FLAGS).get('blocks', []):
+            if block.get('type') != 0:
+                continue
+            rows['block_number'].append(block.get('number', len(rows['block_number'])))
+            rows['block_bbox'].append(block['bbox'])
+            for line in block.get('lines', []):
+                rows['line_bbox'].append(line['bbox'])
+                rows['line_wmode'].append(line.get('wmode', 0))
+                rows['line_dir'].append(line.get('dir', (1.0, 0.0)))
+                for span in line.get('spans', []):
+                    text = span.get('text', '')
+                    self.text_parts.append(text)
+                    self.text_length += len(text)
+                    rows['span_text_start'].append(self.text_length)
+                    rows['span_bbox'].append(span.get('bbox', (0, 0, 0, 0)))
+                    rows['span_origin'].append(span.get('origin', (0.0, 0.0)))
+                    rows['span_size'].append(span.get('size', 12))
+                    rows['span_ascender'].append(span.get('ascender', 1.0))
+                    rows['span_descender'].append(span.get('descender', 0.0))
+                    rows['span_flags'].append(span.get('flags', 0))
+                    rows['span_color'].append(span.get('color', 0))
+                    rows['span_font'].append(self.intern(span.get('font', '')))
+                rows['line_span_start'].append(len(rows['span_size']))
+            rows['block_line_start'].append(len(rows['line_wmode']))
+
+        for info in page.get_image_info(xrefs=True):
+            rows['image_xref'].append(info.get('xref', 0))
+            rows['image_bbox'].append(info['bbox'])
+            rows['image_size'].append((info.get('width', 0), info.get('height', 0)))
+
+        for drawing in page.get_drawings():
+            fill = tuple(drawing['fill'])[:4] if drawing.get('fill') else ()
+            rows['drawing_type'].append(self.intern(drawing.get('type', '')))
+            rows['drawing_rect'].append(tuple(drawing['rect']))
+            rows['drawing_fill'].append(fill + (0.0,) * (4 - len(fill)))
+            rows['drawing_fill_len'].append(len(fill))
+
+        rows['page_number'].append(int(page.number))
+        rows['page_size'].append((float(page.rect.width), float(page.rect.height)))
+        rows['page_rotation'].append(int(page.rotation))
+        rows['page_block_start'].append(len(rows['block_number']))
+        rows['page_image_start'].append(len(rows['image_xref']))
+        rows['page_drawing_start'].append(len(rows['drawing_type']))
+
+    def build(self) -> LayoutStore:
+        columns = {}
+        for name, (dtype, shape) in _COLUMNS.items():
+            rows = self.rows[name]
+            columns[name] = np.array(rows, dtype=dtype).reshape((len(rows),) + shape)
+        return LayoutStore(tuple(self.strings), ''.join(self.text_parts), columns)
+
+
+def extract_page_layout(page) -> PageLayout:
+    """
+    Parse one page's text, images and drawings
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        PageLayout for the page
+    """
+    builder = _LayoutBuilder()
+    builder.add_page(page)
+    return builder.build().page(0)
+
+
+def extract_document_layout(doc, file_hash: str = '') -> DocumentLayout:
+    """
+    Parse every page of an open document
+
+    Args:
+        doc: Open fitz document
+        file_hash: Content hash recorded on the layout
+
+    Returns:
+        DocumentLayout for the document
+    """
+    metadata = tuple(sorted((key, value or '') for key, value in (doc.metadata or {}).items()))
+    builder = _LayoutBuilder()
+    for page in doc:
+        builder.add_page(page)
+    return DocumentLayout(file_hash, metadata, builder.build())
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentLayoutCache:
+    """
+    LRU cache of document layouts keyed by file content hash
+
+    File hashes are remembered per (path, size, mtime), so repeated lookups
+    of an unchanged file within a job do not re-read it. With a cache_dir,
+    parsed layouts are also written there in binary form and loaded on a
+    memory miss, so other worker processes on the host skip the parse. Each
+    save prunes the directory: files unused for disk_max_age_seconds go
+    first, then the least recently used until it fits in disk_max_bytes.
+    """
+
+    def __init__(self, max_entries: int = 8, cache_dir: Optional[str] = None,
+                 disk_max_bytes: int = 256 * 1024 * 1024,
+                 disk_max_age_seconds: float = 7 * 24 * 3600):
+        self.max_entries = max(1, max_entries)
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_max_age_seconds = disk_max_age_seconds
+        self.layouts = OrderedDict()  # file hash -> DocumentLayout
+        self.hit_count = 0
+        self.disk_hit_count = 0
+        self.miss_count = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._hashes = {}  # (path, size, mtime_ns) -> file hash
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def file_hash(self, pdf_path: str) -> str:
+        """Content hash of a file, memoized while the file is unchanged"""
+        stat = os.stat(pdf_path)
+        stamp = (os.path.realpath(pdf_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(stamp)
+        if cached is not None:
+            return cached
+
+        digest = hash_file(pdf_path)
+        with self._lock:
+            if len(self._hashes) >= 256:
+                self._hashes.clear()
+            self._hashes[stamp] = digest
+        return digest
+
+    def get(self, pdf_path: str, doc=None) -> DocumentLayout:
+        """
+        Layout of a PDF, parsing it only on a cache miss
+
+        Args:
+            pdf_path: PDF file
+            doc: Already-open document for pdf_path, used on a miss instead of reopening
+
+        Returns:
+            DocumentLayout for the file's current contents
+        """
+        try:
+            digest = self.file_hash(pdf_path)
+        except OSError:
+            if doc is None:
+                raise
+            # No file to hash (e.g. the document was opened from memory): parse uncached
+            return extract_document_layout(doc)
+        with self._lock:
+            layout = self.layouts.get(digest)
+            if layout is not None:
+                self.layouts.move_to_end(digest)
+                self.hit_count += 1
+                return layout
+
+        layout = self._load(digest)
+        if layout is not None:
+            with self._lock:
+                self.disk_hit_count += 1
+        else:
+            with self._lock:
+                self.miss_count += 1
+            if doc is not None:
+                layout = extract_document_layout(doc, digest)
+            else:
+                with fitz.open(pdf_path) as opened:
+                    layout = extract_document_layout(opened, digest)
+            self._save(layout)
+
+        with self._lock:
+            self.layouts[digest] = layout
+            self.layouts.move_to_end(digest)
+            while len(self.layouts) > self.max_entries:
+                self.layouts.popitem(last=False)
+        return layout
+
+    def clear(self):
+        with self._lock:
+            self.layouts.clear()
+            self._hashes.clear()
+
+    def _layout_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.layout")
+
+    def _load(self, digest: str) -> Optional[DocumentLayout]:
+        """Read a serialized layout from cache_dir, if there is one"""
+        if not self.cache_dir:
+            return None
+        path = self._layout_path(digest)
+        try:
+            with open(path, 'rb') as f:
+                layout = DocumentLayout.from_bytes(f.read())
+            # Mark the entry as recently used for pruning
+            os.utime(path)
+            return layout
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable layout cache entry {digest}: {e}")
+            return None
+
+    def _save(self, layout: DocumentLayout):
+        """Write a layout to cache_dir (atomically, errors are logged)"""
+        if not self.cache_dir or not layout.file_hash:
+            return
+        path = self._layout_path(layout.file_hash)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(layout.to_bytes())
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write layout cache entry: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self) -> int:
+        """Delete expired layout files, then the least recently used over disk_max_bytes"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.layout'):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            self.logger.warning(f"Could not list layout cache: {e}")
+            return 0
+
+        entries.sort()
+        cutoff = time.time() - self.disk_max_age_seconds
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                # Pruned by another process
+                pass
+            except OSError as e:
+                self.logger.warning(f"Could not prune layout cache entry {path}: {e}")
+                continue
+            total -= size
+        if removed:
+            self.logger.info(f"Pruned {removed} layout cache files")
+        return removed
+
+
+_layout_cache = None
+_layout_cache_lock = threading.Lock()
+
+
+def get_layout_cache() -> DocumentLayoutCache:
+    """
+    Process-wide layout cache (sized by PDF_LAYOUT_CACHE_SIZE, persisted to
+    PDF_LAYOUT_CACHE_DIR, which is capped by PDF_LAYOUT_CACHE_DIR_MB and
+    PDF_LAYOUT_CACHE_DIR_DAYS)
+    """
+    global _layout_cache
+    with _layout_cache_lock:
+        if _layout_cache is None:
+            _layout_cache = DocumentLayoutCache(
+                int(os.getenv('PDF_LAYOUT_CACHE_SIZE', 8)),
+                os.getenv('PDF_LAYOUT_CACHE_DIR') or None,
+                int(float(os.getenv('PDF_LAYOUT_CACHE_DIR_MB', 256)) * 1024 * 1024),
+                float(os.getenv('PDF_LAYOUT_CACHE_DIR_DAYS', 7)) * 24 * 3600
+            )
+        return _layout_cache
+
+
+def get_document_layout(pdf_path: str, doc=None) -> DocumentLayout:
+    """
+    Layout of a PDF from the process-wide cache
+
+    Args:
+        pdf_path: PDF file
+        doc: Already-open document for pdf_path (optional)
+
+    Returns:
+        DocumentLayout, parsed once per distinct file content
+    """
+    return get_layout_cache().get(pdf_path, doc)
@@ -12,7 +12,8 @@ import io
 import re
 from .base_service import BaseService
 from .pdf_visual_handler_enhanced import PDFVisualHandlerEnhanced
-from .adaptations_service import AdaptationsService
+from .pdf_layout import get_document_layout
+from .service_registry import get_adaptations_service
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -28,8 +29,8 @@ class PDFService(BaseService):
     
     def _initialize(self):
         """Initialize PDF service resources"""
-        self.visual_handler = PDFVisualHandlerEnhanced()
-        self.adaptations_service = AdaptationsService(self.config)
+        self.visual_handler = PDFVisualHandlerEnhanced(service_config=self.config)
+        self.adaptations_service = get_adaptations_service(self.config)
         self.api_key = self.config.get('anthropic_api_key')
         if self.api_key:
             self.client = anthropic.Anthropic(api_key=self.api_key)
@@ -76,6 +77,9 @@ class PDFService(BaseService):
         """
         Extract content from PDF file
         
+        Reads the cached document layout, so later stages of the job reuse
+        this parse.
+        
         Args:
             pdf_path: Path to PDF file
             include_formatting: Whether to include formatting information
@@ -93,38 +97,40 @@ class PDFService(BaseService):
         }
         
         try:
-            doc = fitz.open(pdf_path)
+            layout = get_document_layout(pdf_path)
             
             # Extract metadata
+            metadata = layout.get_metadata()
             content['metadata'] = {
-                'page_count': doc.page_count,
-                'title': doc.metadata.get('title', ''),
-                'author': doc.metadata.get('author', ''),
-                'subject': doc.metadata.get('subject', '')
+                'page_count': layout.page_count,
+                'title': metadata.get('title', ''),
+                'author': metadata.get('author', ''),
+                'subject': metadata.get('subject', '')
             }
             
             # Extract pages
-            for page_num, page in enumerate(doc):
+            for page_num, page_layout in enumerate(layout.pages):
                 page_content = {
                     'page_number': page_num + 1,
-                    'text': page.get_text(),
+                    'text': page_layout.text,
                     'images': [],
                     'tables': []
                 }
                 
-                # Extract images
-                image_list = page.get_images()
-                for img_index, img in enumerate(image_list):
+                # Extract images (each image once, however often it is placed)
+                seen_xrefs = set()
+                for image in page_layout.images:
+                    if image.xref in seen_xrefs:
+                        continue
+                    seen_xrefs.add(image.xref)
                     page_content['images'].append({
-                        'index': img_index,
-                        'width': img[2] if len(img) > 2 else 0,
-                        'height': img[3] if len(img) > 3 else 0
+                        'index': len(page_content['images']),
+                        'width': image.width,
+                        'height': image.height
                     })
                 
                 content['pages'].append(page_content)
             
-            doc.close()
-            
         except Exception as e:
             self.logger.error(f"Error extracting PDF content: {str(e)}")
             raise Exception(f"Error extracting PDF content: {str(e)}")
@@ -217,45 +223,42 @@ class PDFService(BaseService):
         }
         
         try:
-            doc = fitz.open(pdf_path)
+            layout = get_document_layout(pdf_path)
             
-            for page_num, page in enumerate(doc):
+            for page_num, page_layout in enumerate(layout.pages):
                 page_info = {
                     'page_number': page_num + 1,
                     'text_length': 0,
                     'image_count': 0,
                     'text_blocks': 0,
-                    'rect': list(page.rect)
+                    'rect': [0.0, 0.0, page_layout.width, page_layout.height]
                 }
                 
                 # Get text
-                text = page.get_text()
+                text = page_layout.text
                 page_info['text_length'] = len(text)
                 diagnosis['total_text_length'] += len(text)
                 if text.strip():
                     diagnosis['has_text'] = True
                 
-                # Get text blocks
-                text_dict = page.get_text("dict")
-                page_info['text_blocks'] = len(text_dict.get('blocks', []))
+                # Get text and image blocks
+                page_info['text_blocks'] = len(page_layout.blocks) + len(page_layout.images)
                 
                 # Get images
-                images = page.get_images()
-                page_info['image_count'] = len(images)
-                if images:
+                page_info['image_count'] = len({image.xref for image in page_layout.images})
+                if page_layout.images:
                     diagnosis['has_images'] = True
                 
                 diagnosis['pages'].append(page_info)
             
-            doc.close()
-            
         except Exception as e:
             diagnosis['errors'].append(str(e))
         
         return diagnosis
     
     def create_visual_preserved_pdf(self, original_path: str, adapted_content: Dict[str, Any],
-                                  output_path: str, profile: str = 'default') -> bool:
+                                  output_path: str, profile: str = 'default',
+                                  output_quality: Optional[str] = None) -> bool:
         """
         Create PDF with visual preservation
         
@@ -264,12 +267,13 @@ class PDFService(BaseService):
             adapted_content: Adapted content
             output_path: Output path
             profile: Learning profile
+            output_quality: Quality tier for rasterized pages ('high', 'medium', 'low')
             
         Returns:
             bool: Success status
         """
         return self.visual_handler.create_visual_preserved_pdf(
-            original_path, adapted_content, output_path, profile
+            original_path, adapted_content, output_path, profile, output_quality
         )
     
     def adapt_pdf_content(self, pdf_content: Dict[str, Any], profile: str,
@@ -438,7 +442,9 @@ class PDFService(BaseService):
                                    profile: str, export_format: str = 'pdf', 
                                    target_language: Optional[str] = None,
                                    processing_callback: Optional[callable] = None,
-                                   output_path_callback: Optional[callable] = None) -> Optional[str]:
+                                   output_path_callback: Optional[callable] = None,
+                                   output_quality: Optional[str] = None,
+                                   result_callback: Optional[callable] = None) -> Optional[str]:
         """
         Main PDF processing function with template system support
         
@@ -451,6 +457,10 @@ class PDFService(BaseService):
             target_language: Target language for translation
             processing_callback: Callback for progress updates
             output_path_callback: Callback to generate output paths
+            output_quality: Quality tier for rasterized pages ('high', 'medium', 'low')
+            result_callback: Called with (file_id, details) once the output exists;
+                details hold adapted_content and, when a translation was written,
+                translated_output_path
             
         Returns:
             Path to created file or None on error
@@ -493,7 +503,7 @@ class PDFService(BaseService):
                 output_path = self._create_pdf_output(
                     file_path, file_id, filename, profile, 
                     adapted_content, translated_content, target_language,
-                    output_path_callback
+                    output_path_callback, output_quality
                 )
             elif export_format.lower() == 'pptx':
                 output_path = self._create_pptx_output(
@@ -509,6 +519,16 @@ class PDFService(BaseService):
             if not os.path.exists(output_path):
                 raise Exception(f"File creation reported success but file not found")
             
+            if result_callback:
+                details = {'adapted_content': adapted_content}
+                if translated_content and target_language:
+                    translated_path = self._translated_output_path(
+                        file_path, file_id, filename, target_language, output_path_callback
+                    )
+                    if os.path.exists(translated_path):
+                        details['translated_output_path'] = translated_path
+                result_callback(file_id, details)
+            
             if processing_callback:
                 processing_callback(file_id, f'PDF content successfully adapted to {export_format.upper()}', 100)
             
@@ -525,7 +545,8 @@ class PDFService(BaseService):
                           profile: str, adapted_content: Dict[str, Any],
                           translated_content: Optional[Dict[str, Any]] = None,
                           target_language: Optional[str] = None,
-                          output_path_callback: Optional[callable] = None) -> Optional[str]:
+                          output_path_callback: Optional[callable] = None,
+                          output_quality: Optional[str] = None) -> Optional[str]:
         """Create PDF output with optional translation"""
         # Generate output filename
         base_name = os.path.splitext(filename)[0]
@@ -576,7 +597,8 @@ class PDFService(BaseService):
             
             # Try visual-preserving method
             self.logger.info("Using visual-preserving PDF adaptation method")
-            success = self.create_visual_preserved_pdf(original_path, adapted_content, output_path, profile)
+            success = self.create_visual_preserved_pdf(original_path, adapted_content, output_path, profile,
+                                                       output_quality)
             
             if success and os.path.exists(output_path):
                 # Validate the output file has reasonable content
@@ -613,33 +635,24 @@ class PDFService(BaseService):
         if translated_content and target_language:
             self._create_translated_pdf(
                 original_path, file_id, filename, profile,
-                translated_content, target_language, output_path_callback
+                translated_content, target_language, output_path_callback, output_quality
             )
         
         return output_path
     
     def _create_translated_pdf(self, original_path: str, file_id: str, filename: str,
                               profile: str, translated_content: Dict[str, Any],
-                              target_language: str, output_path_callback: Optional[callable] = None) -> Optional[str]:
+                              target_language: str, output_path_callback: Optional[callable] = None,
+                              output_quality: Optional[str] = None) -> Optional[str]:
         """Create translated PDF"""
-        # Clean the base filename
-        base_name = os.path.splitext(filename)[0]
-        if base_name.startswith('adapted_'):
-            base_name = base_name[8:]  # Remove 'adapted_' prefix
-        
-        translated_filename = f"translated_{target_language}_{base_name}.pdf"
-        
-        # Get output path using callback or default
-        if output_path_callback:
-            translated_path = output_path_callback(file_id, translated_filename)
-        else:
-            output_dir = os.path.join(os.path.dirname(original_path), '..', 'outputs')
-            translated_path = os.path.join(output_dir, f"{file_id}_{translated_filename}")
+        translated_path = self._translated_output_path(
+            original_path, file_id, filename, target_language, output_path_callback
+        )
         
         success = False
         try:
             success = self.create_visual_preserved_pdf(
-                original_path, translated_content, translated_path, profile
+                original_path, translated_content, translated_path, profile, output_quality
             )
             # Text overlay method not yet implemented
             # if not success:
@@ -653,6 +666,23 @@ class PDFService(BaseService):
         
         return translated_path if success else None
     
+    def _translated_output_path(self, original_path: str, file_id: str, filename: str,
+                                target_language: str,
+                                output_path_callback: Optional[callable] = None) -> str:
+        """Output path of the translated PDF for a file"""
+        # Clean the base filename
+        base_name = os.path.splitext(filename)[0]
+        if base_name.startswith('adapted_'):
+            base_name = base_name[8:]  # Remove 'adapted_' prefix
+        
+        translated_filename = f"translated_{target_language}_{base_name}.pdf"
+        
+        # Get output path using callback or default
+        if output_path_callback:
+            return output_path_callback(file_id, translated_filename)
+        output_dir = os.path.join(os.path.dirname(original_path), '..', 'outputs')
+        return os.path.join(output_dir, f"{file_id}_{translated_filename}")
+    
     def _create_pptx_output(self, file_id: str, filename: str, profile: str,
                            adapted_content: Dict[str, Any]) -> Optional[str]:
         """Create PowerPoint output from PDF content"""
@@ -0,0 +1,306 @@
+"""
+Streaming PDF Writer
+
+Builds an output PDF a chunk of pages at a time. Finished chunks are written
+to disk (the first with a full save, later ones appended with incremental
+saves) and released, so memory is bounded by the chunk size rather than by
+the document size.
+
+Pages copied from a source document share one graft map per chunk, so
+images, fonts and forms used on many pages are copied once per chunk. The
+writer also remembers which source resources earlier chunks already wrote;
+when a later chunk is appended those resources are pointed at the existing
+output objects instead of being copied again, so each is written once.
+"""
+import os
+import re
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+# Page resource categories whose entries are shared across chunks
+SHARED_RESOURCE_CATEGORIES = ('XObject', 'Font')
+
+# Tokens of a PDF dictionary: nesting brackets and "/Name 12 0 R" entries
+_DICT_TOKEN = re.compile(r'<<|>>|\[|\]|/(?P<name>[\w.+-]+)\s*(?P<xref>\d+)\s+\d+\s+R')
+
+import fitz  # PyMuPDF
+
+
+class StreamingPDFWriter:
+    """Page-by-page PDF output that flushes finished chunks to disk"""
+
+    def __init__(self, output_path: str, chunk_pages: int = 20,
+                 save_options: Optional[Dict[str, Any]] = None):
+        """
+        Create a writer
+
+        Args:
+            output_path: Destination PDF path
+            chunk_pages: Pages kept in memory before they are flushed
+            save_options: Options for the initial fitz save (e.g. garbage, deflate)
+        """
+        self.output_path = output_path
+        self.chunk_pages = max(1, chunk_pages)
+        self.save_options = save_options or {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.page_count = 0
+        self.flush_count = 0
+        self._chunk = None
+        self._chunk_page_count = 0
+        self._written = False
+        self._closed = False
+        # (source key, source xref) -> output xref of resources already written
+        self._shared = {}
+        # chunk xref -> (source key, source xref) for the current chunk
+        self._chunk_sources = {}
+        self._chunk_has_copies = False
+        # Sources without a file name, kept alive so their ids stay unique
+        self._anonymous_sources = {}
+
+    def new_page(self, width: float, height: float):
+        """
+        Add a blank page to draw on
+
+        The page stays valid until the next new_page/insert_pdf call or close.
+
+        Args:
+            width: Page width in points
+            height: Page height in points
+
+        Returns:
+            fitz.Page in the current chunk
+        """
+        chunk = self._current_chunk()
+        page = chunk.new_page(width=width, height=height)
+        self._chunk_page_count += 1
+        self.page_count += 1
+        return page
+
+    def insert_pdf(self, source_doc, from_page: int, to_page: int):
+        """
+        Copy a page range from another document
+
+        Args:
+            source_doc: Open fitz document
+            from_page: First page (inclusive)
+            to_page: Last page (inclusive)
+        """
+        chunk = self._current_chunk()
+        first_new = chunk.page_count
+        # final=0 keeps the chunk's graft map for source_doc, so resources
+        # shared with earlier copied pages are referenced, not copied again
+        chunk.insert_pdf(source_doc, from_page=from_page, to_page=to_page, final=0)
+        self._chunk_has_copies = True
+        added = to_page - from_page + 1
+        source_key = self._source_key(source_doc)
+        for offset in range(added):
+            source_refs = _resource_refs(source_doc, source_doc[from_page + offset].xref)
+            chunk_refs = _resource_refs(chunk, chunk[first_new + offset].xref)
+            for entry, chunk_xref in chunk_refs.items():
+                if entry in source_refs:
+                    self._chunk_sources[chunk_xref] = (source_key, source_refs[entry])
+        self._chunk_page_count += added
+        self.page_count += added
+
+    def copy_page(self, source_doc, page_number: int):
+        """
+        Copy one page from another document and return the copy to draw on
+
+        Args:
+            source_doc: Open fitz document
+            page_number: Page to copy
+
+        Returns:
+            fitz.Page in the current chunk
+        """
+        self.insert_pdf(source_doc, page_number, page_number)
+        return self._chunk[self._chunk.page_count - 1]
+
+    def close(self, metadata: Optional[Dict[str, str]] = None):
+        """
+        Flush remaining pages and finish the output file
+
+        Args:
+            metadata: Document metadata to set on the output
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._flush(metadata)
+        self._anonymous_sources.clear()
+        self.logger.info(f"Wrote {self.page_count} pages to {self.output_path} in {self.flush_count} flushes")
+
+    def abort(self):
+        """Discard buffered pages and any partially written output"""
+        self._closed = True
+        self._anonymous_sources.clear()
+        if self._chunk is not None:
+            self._chunk.close()
+            self._chunk = None
+        if self._written and os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _current_chunk(self):
+        """Chunk document for new pages, flushing the previous one when full"""
+        if self._closed:
+            raise ValueError("StreamingPDFWriter is closed")
+        if self._chunk is not None and self._chunk_page_count >= self.chunk_pages:
+            self._flush()
+        if self._chunk is None:
+            self._chunk = fitz.open()
+            self._chunk_page_count = 0
+        return self._chunk
+
+    def _source_key(self, source_doc):
+        """Stable identity for a source document, across reopens of the same file"""
+        if source_doc.name:
+            return source_doc.name
+        self._anonymous_sources[id(source_doc)] = source_doc
+        return id(source_doc)
+
+    def _flush(self, metadata: Optional[Dict[str, str]] = None):
+        """Write the current chunk to the output file and release it"""
+        chunk = self._chunk
+        if chunk is None:
+            if metadata and self._written:
+                self._append(None, metadata)
+            return
+        self._chunk = None
+        chunk_sources = self._chunk_sources
+        has_copies = self._chunk_has_copies
+        self._chunk_sources = {}
+        self._chunk_has_copies = False
+
+        try:
+            if not self._written:
+                # First chunk becomes the output file
+                if metadata:
+                    chunk.set_metadata(metadata)
+                save_options = dict(self.save_options)
+                if has_copies:
+                    # Copied pages edited in place (e.g. redacted) leave
+                    # unreferenced objects; appends only copy what pages use
+                    save_options['garbage'] = max(1, save_options.get('garbage', 0))
+                chunk.save(self.output_path, **save_options)
+                self._written = True
+                if chunk_sources:
+                    page_refs = [_resource_refs(chunk, page.xref) for page in chunk]
+                    with fitz.open(self.output_path) as output:
+                        self._remember_shared(output, 0, page_refs, chunk_sources)
+            else:
+                self._append(chunk, metadata, chunk_sources)
+            self.flush_count += 1
+        finally:
+            chunk.close()
+
+    def _append(self, chunk, metadata: Optional[Dict[str, str]] = None,
+                chunk_sources: Optional[Dict[int, Tuple]] = None):
+        """Append a chunk's pages to the output with an incremental save"""
+        output = fitz.open(self.output_path)
+        try:
+            if chunk is not None and chunk_sources:
+                self._insert_sharing(output, chunk, chunk_sources)
+            elif chunk is not None:
+                output.insert_pdf(chunk)
+            if metadata:
+                output.set_metadata(metadata)
+            output.save(
+                self.output_path,
+                incremental=True,
+                encryption=fitz.PDF_ENCRYPT_KEEP,
+                deflate=self.save_options.get('deflate', False)
+            )
+        finally:
+            output.close()
+
+    def _insert_sharing(self, output, chunk, chunk_sources):
+        """Append a chunk, reusing source resources earlier chunks wrote"""
+        page_refs = [_resource_refs(chunk, page.xref) for page in chunk]
+        reused = self._detach_shared(chunk, page_refs, chunk_sources)
+        first_page = output.page_count
+        output.insert_pdf(chunk)
+        # Point detached entries at the copies earlier chunks wrote
+        for offset, entries in enumerate(reused):
+            page_xref = output[first_page + offset].xref
+            for (category, name), output_xref in entries.items():
+                output.xref_set_key(page_xref, f"Resources/{category}/{name}", f"{output_xref} 0 R")
+        self._remember_shared(output, first_page, page_refs, chunk_sources)
+
+    def _detach_shared(self, chunk, page_refs, chunk_sources):
+        """
+        Unlink resources the output already holds from the chunk's pages
+
+        Returns, per page, the resource entries to re-link and the output
+        xref each should point at.
+        """
+        reused = []
+        for page, refs in zip(chunk, page_refs):
+            entries = {}
+            for entry, chunk_xref in refs.items():
+                output_xref = self._shared.get(chunk_sources.get(chunk_xref))
+                if output_xref:
+                    category, name = entry
+                    chunk.xref_set_key(page.xref, f"Resources/{category}/{name}", "null")
+                    entries[entry] = output_xref
+            reused.append(entries)
+        return reused
+
+    def _remember_shared(self, output, first_page, page_refs, chunk_sources):
+        """Record the output xrefs of source resources this chunk wrote"""
+        for offset, refs in enumerate(page_refs):
+            output_refs = _resource_refs(output, output[first_page + offset].xref)
+            for entry, chunk_xref in refs.items():
+                source = chunk_sources.get(chunk_xref)
+                if source and source not in self._shared and entry in output_refs:
+                    self._shared[source] = output_refs[entry]
+
+
+def _resource_refs(doc, page_xref: int) -> Dict[Tuple[str, str], int]:
+    """
+    Indirect resources a page uses
+
+    Args:
+        doc: Open fitz document
+        page_xref: Page object xref
+
+    Returns:
+        (category, name) -> xref for the page's shared resource categories
+    """
+    xref = page_xref
+    # Resources may be inherited from the page tree
+    for _ in range(32):
+        if doc.xref_get_key(xref, 'Resources')[0] != 'null':
+            break
+        kind, parent = doc.xref_get_key(xref, 'Parent')
+        if kind != 'xref':
+            return {}
+        xref = int(parent.split()[0])
+
+    refs = {}
+    for category in SHARED_RESOURCE_CATEGORIES:
+        kind, value = doc.xref_get_key(xref, f'Resources/{category}')
+        if kind == 'xref':
+            value = doc.xref_object(int(value.split()[0]), compressed=True)
+        elif kind != 'dict':
+            continue
+        depth = 0
+        for token in _DICT_TOKEN.finditer(value):
+            if token.group('name'):
+                if depth == 1:
+                    refs[(category, token.group('name'))] = int(token.group('xref'))
+            elif token.group(0) in ('<<', '['):
+                depth += 1
+            else:
+                depth -= 1
+    return refs
@@ -6,20 +6,120 @@ This module contains the migrated PDF text overlay functionality.
 """
 import os
 import fitz  # PyMuPDF
+import numpy as np
 from PIL import Image, ImageDraw, ImageEnhance
 from pdf2image import convert_from_path
 from typing import Dict, Any, List, Optional, Tuple
 import io
+import math
 import logging
 import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .page_geometry import PageGeometryIndex
+from .pdf_stream_writer import StreamingPDFWriter
+from .output_quality import RasterPolicy
+from .pdf_layout import PageLayout, get_document_layout, extract_page_layout
+from .text_metrics import MIN_FONT_SCALE, get_font_metrics
+
+
+# Shared process pool for rendering cleaned page backgrounds (see _get_render_pool)
+_render_pool = None
+_render_pool_pid = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Get the per-process pool used to render pages in parallel
+    
+    PyMuPDF rendering is CPU-bound and holds the GIL, so pages are rendered in
+    separate processes. Workers are spawned rather than forked so they never
+    inherit open documents or locks from the web process.
+    """
+    global _render_pool, _render_pool_pid
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_pid != os.getpid():
+            _render_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _render_pool_pid = os.getpid()
+        return _render_pool
+
+
+def _default_render_workers() -> int:
+    """
+    Render pool size when PDF_RENDER_WORKERS is not set
+    
+    Every process that renders pages (each gunicorn worker, each worker.py)
+    starts its own pool, so the CPUs are shared between the web workers
+    (WEB_CONCURRENCY). Under gunicorn without WEB_CONCURRENCY the worker
+    count is unknown and pages render in-process.
+    """
+    web_workers = int(os.getenv('WEB_CONCURRENCY') or 0)
+    if web_workers <= 0:
+        if os.getenv('SERVER_SOFTWARE', '').startswith('gunicorn'):
+            return 1
+        web_workers = 1
+    return max(1, min(4, (os.cpu_count() or 1) // web_workers))
+
+
+def _discard_render_pool():
+    """Drop a broken render pool so the next document starts a fresh one"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+
+def _render_cleaned_page_range(pdf_path: str, page_indices: List[int],
+                               quality: Optional[str] = None,
+                               page_layouts: Optional[List[PageLayout]] = None) -> List[Tuple[int, bytes]]:
+    """
+    Render text-free backgrounds for pages of a PDF (runs in a worker process)
+    
+    Args:
+        pdf_path: PDF to open in this process
+        page_indices: Pages to render
+        quality: Output quality tier (handler default if omitted)
+        page_layouts: Parent's layouts of those pages, so they are not parsed again here
+        
+    Returns:
+        (page index, encoded image bytes) for each page
+    """
+    handler = PDFVisualHandler()
+    policy = handler._raster_policy(quality)
+    doc = fitz.open(pdf_path)
+    try:
+        rendered = []
+        for position, page_idx in enumerate(page_indices):
+            page_layout = page_layouts[position] if page_layouts else None
+            rendered.append((page_idx, handler._render_text_free_background(doc[page_idx], policy, page_layout)))
+        return rendered
+    finally:
+        doc.close()
 
 
 class PDFVisualHandler:
     """Enhanced PDF handler with visual preservation capabilities"""
     
-    def __init__(self, profile_configs: Optional[Dict[str, Dict[str, Any]]] = None):
-        """Initialize with profile configurations"""
+    def __init__(self, profile_configs: Optional[Dict[str, Dict[str, Any]]] = None,
+                 service_config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize with profile configurations
+        
+        Args:
+            profile_configs: Visual settings per learning profile
+            service_config: Configuration of the owning service; selects the
+                shared AdaptationsService (and its API key) text is adapted with
+        """
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.service_config = service_config or {}
         
         # Profile-specific visual settings
         self.profile_configs = profile_configs or {
@@ -48,11 +148,29 @@ class PDFVisualHandler:
                 'reading_guide': False
             }
         }
+        
+        # Processes used to render cleaned page backgrounds (1 renders in-process)
+        self.render_workers = int(os.getenv('PDF_RENDER_WORKERS') or _default_render_workers())
+        
+        # Output pages held in memory before they are flushed to disk
+        self.output_chunk_pages = int(os.getenv('PDF_OUTPUT_CHUNK_PAGES', 20))
+        
+        # How the anchor pipeline removes original text: 'redact' keeps the page's
+        # vector graphics and images, 'raster' replaces the page with a rendered image
+        self.text_removal_mode = os.getenv('PDF_TEXT_REMOVAL', 'redact')
+        
+        # Quality tier for rasterized page backgrounds: 'high', 'medium' or 'low'
+        # (caps the per-page dpi and sets the JPEG quality, see RasterPolicy)
+        self.output_quality = os.getenv('PDF_OUTPUT_QUALITY', 'medium')
     
     def extract_text_blocks_with_formatting(self, pdf_path: str) -> List[Dict[str, Any]]:
         """
         Extract text blocks with formatting information from PDF
         
+        Built from the cached document layout (see pdf_layout), so the PDF is
+        only parsed once per job. Span fields are read from the layout's
+        columns one page at a time rather than one span at a time.
+        
         Args:
             pdf_path: Path to the PDF file
             
@@ -60,52 +178,58 @@ class PDFVisualHandler:
             List of pages, each containing text blocks with formatting
         """
         try:
-            doc = fitz.open(pdf_path)
+            layout = get_document_layout(pdf_path)
+            store = layout.store
             pages_data = []
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text_blocks = page.get_text("dict")
-                
+            for page_num, page_layout in enumerate(layout.pages):
                 # Extract structured text information
                 page_data = {
                     'page_num': page_num,
-                    'width': page.rect.width,
-                    'height': page.rect.height,
+                    'width': page_layout.width,
+                    'height': page_layout.height,
                     'blocks': []
                 }
                 
-                for block in text_blocks.get('blocks', []):
-                    if block.get('type') == 0:  # Text block
-                        block_data = {
-                            'bbox': block['bbox'],
-                            'lines': []
+                span_start, span_stop = page_layout.span_range
+                columns = page_layout.span_columns()
+                span_bboxes = columns.bbox.tolist()
+                span_sizes = columns.size.tolist()
+                span_flags = columns.flags.tolist()
+                span_colors = columns.color.tolist()
+                span_fonts = [columns.fonts[font_id] for font_id in columns.font_ids.tolist()]
+                text_starts = store.span_text_start[span_start:span_stop + 1].tolist()
+                
+                for block in page_layout.blocks:
+                    block_data = {
+                        'bbox': block.bbox,
+                        'lines': []
+                    }
+                    
+                    for line in block.lines:
+                        line_data = {
+                            'bbox': line.bbox,
+                            'spans': []
                         }
                         
-                        for line in block.get('lines', []):
-                            line_data = {
-                                'bbox': line['bbox'],
-                                'spans': []
+                        first, stop = line.span_range
+                        for i in range(first - span_start, stop - span_start):
+                            span_data = {
+                                'text': store.text[text_starts[i]:text_starts[i + 1]],
+                                'font': span_fonts[i],
+                                'size': span_sizes[i],
+                                'flags': span_flags[i],
+                                'color': span_colors[i],
+                                'bbox': tuple(span_bboxes[i])
                             }
-                            
-                            for span in line.get('spans', []):
-                                span_data = {
-                                    'text': span.get('text', ''),
-                                    'font': span.get('font', ''),
-                                    'size': span.get('size', 12),
-                                    'flags': span.get('flags', 0),
-                                    'color': span.get('color', 0),
-                                    'bbox': span.get('bbox', [])
-                                }
-                                line_data['spans'].append(span_data)
-                            
-                            block_data['lines'].append(line_data)
+                            line_data['spans'].append(span_data)
                         
-                        page_data['blocks'].append(block_data)
+                        block_data['lines'].append(line_data)
+                    
+                    page_data['blocks'].append(block_data)
                 
                 pages_data.append(page_data)
             
-            doc.close()
             return pages_data
             
         except Exception as e:
@@ -132,36 +256,39 @@ class PDFVisualHandler:
         return [min_x, min_y, max_x, max_y]
     
     def create_visual_preserved_pdf_with_overlays(self, original_path: str, adapted_content: Dict[str, Any], 
-                                                   output_path: str, profile: str = 'default') -> bool:
+                                                   output_path: str, profile: str = 'default',
+                                                   quality: Optional[str] = None) -> bool:
         """
         Create PDF with text overlays while preserving visual elements
         """
+        output_writer = None
         try:
             # Get profile configuration
             profile_config = self.profile_configs.get(profile, self.profile_configs['default'])
             
             # Open the original PDF
             original_doc = fitz.open(original_path)
-            output_doc = fitz.open()  # Create new document
+            # Finished pages are flushed to output_path in chunks to bound memory
+            output_writer = self._open_output_writer(output_path)
+            raster_policy = self._raster_policy(quality)
             
             # Process each page
             for page_idx in range(original_doc.page_count):
                 original_page = original_doc[page_idx]
                 
-                # Use pixmap to copy the entire page content
+                # Render the entire page content at the policy's resolution
                 # This preserves all visual elements including backgrounds
-                mat = fitz.Matrix(1, 1)  # Identity matrix (no scaling)
-                pix = original_page.get_pixmap(matrix=mat)
+                background = raster_policy.render(original_page)
                 
                 # Create new page with same dimensions
-                new_page = output_doc.new_page(
+                new_page = output_writer.new_page(
                     width=original_page.rect.width,
                     height=original_page.rect.height
                 )
                 
-                # Insert the pixmap as the page background
+                # Insert the render as the page background
                 # This includes all original visual elements
-                new_page.insert_image(new_page.rect, pixmap=pix)
+                new_page.insert_image(new_page.rect, stream=background)
                 
                 # Now overlay adapted text if available
                 if page_idx < len(adapted_content.get('pages', [])):
@@ -200,15 +327,17 @@ class PDFVisualHandler:
                             new_page, adapted_text, original_blocks, profile_config
                         )
             
-            # Save the output document
-            output_doc.save(output_path)
-            output_doc.close()
+            # Flush the remaining pages
+            output_writer.close()
             original_doc.close()
+            self._log_raster_summary(raster_policy, output_path)
             
             return True
             
         except Exception as e:
             self.logger.error(f"Error creating visual preserved PDF: {str(e)}")
+            if output_writer is not None:
+                output_writer.abort()
             return False
     
     def _update_page_text_with_overlays(self, page, adapted_text: str, 
@@ -338,16 +467,19 @@ class PDFVisualHandler:
         highlight_color = profile_config['highlight_color']
         text_color = tuple(c/255 for c in highlight_color) if highlight_color else (0, 0, 0)
         
-        # Clear text areas with sampled background colors
+        # Clear text areas with sampled background colors (one render for all blocks)
+        page_pix = page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+        page_pixels = self._pixmap_array(page_pix)
+        geometry = self._get_page_geometry(page)
         for block in original_blocks:
             block_rect = fitz.Rect(block['bbox'])
             
             # Skip blocks in image areas
-            if self._is_text_in_image_area(page, block_rect):
+            if self._is_text_in_image_area(page, block_rect, geometry):
                 continue
             
             # Sample background color for better blending
-            bg_color = self._sample_background_color(page, block_rect)
+            bg_color = self._sample_background_color(page, block_rect, page_pixels)
             page.draw_rect(block_rect, color=bg_color, fill=bg_color, width=0)
         
         # Calculate the overall text area for better text flow
@@ -468,7 +600,8 @@ class PDFVisualHandler:
             return None
     
     def create_visual_preserved_pdf_with_anchors(self, original_path: str, adapted_content: Dict[str, Any], 
-                                                  output_path: str, profile: str = 'default') -> bool:
+                                                  output_path: str, profile: str = 'default',
+                                                  quality: Optional[str] = None) -> bool:
         """
         Create PDF with anchor-based text replacement using proper text removal
         
@@ -478,222 +611,114 @@ class PDFVisualHandler:
         3. Convert cleaned pages to images (backgrounds preserved, no text)
         4. Adapt each text block individually 
         5. Place adapted text at original anchor positions
+        
+        In 'redact' text_removal_mode (the default) steps 2-3 copy the page
+        and redact its text, keeping vector graphics and images. In 'raster'
+        mode the text-free page is rendered in worker processes
+        (render_workers) for page ranges. Text adaptation of upcoming pages
+        runs on a background thread while this process assembles the output
+        pages in order. Rendered backgrounds follow the RasterPolicy of the
+        quality tier (output_quality unless quality is given).
         """
+        output_writer = None
         try:
             import traceback
-            from .adaptations_service import AdaptationsService
+            from .service_registry import get_adaptations_service
             
             # Get profile configuration
             profile_config = self.profile_configs.get(profile, self.profile_configs['default'])
             
             # Open the original PDF
             original_doc = fitz.open(original_path)
-            output_doc = fitz.open()  # Create new document
+            # Finished pages are flushed to output_path in chunks to bound memory
+            output_writer = self._open_output_writer(output_path)
+            raster_policy = self._raster_policy(quality)
             
-            # Initialize adaptation service for text adaptation
-            adaptations_service = AdaptationsService({})
+            # Use the owning service's shared adaptation service so cache hits
+            # carry across documents and requests use its API key
+            adaptations_service = get_adaptations_service(self.service_config)
             
             print(f"Creating anchor-based PDF with {original_doc.page_count} pages")
             
-            # Process each page
-            for page_idx in range(original_doc.page_count):
-                original_page = original_doc[page_idx]
-                
-                # Step 1: Extract original text blocks with positions BEFORE any modifications
-                original_text_dict = original_page.get_text("dict")
-                original_blocks = []
-                
-                for block in original_text_dict.get('blocks', []):
-                    if block.get('type') == 0:  # Text block
-                        # Extract text from this block
-                        block_text = ""
-                        for line in block.get('lines', []):
-                            for span in line.get('spans', []):
-                                block_text += span.get('text', '')
-                            block_text += " "  # Add space between lines
-                        
-                        if block_text.strip():
-                            block_id = f"page{page_idx}_block{len(original_blocks)}"
-                            original_blocks.append({
-                                'id': block_id,
-                                'bbox': block['bbox'],
-                                'text': block_text.strip(),
-                                'lines': block.get('lines', []),
-                                'hash': hashlib.md5(block_text.strip().encode()).hexdigest()
-                            })
-                
-                print(f"Page {page_idx}: {len(original_blocks)} text blocks to process")
-                
-                # Step 2: Create a text-free version of the page using structure removal
-                cleaned_page = self._create_text_free_page(original_page)
-                
-                # Step 3: Convert the cleaned page to final image (no text, backgrounds preserved)
-                cleaned_pix = cleaned_page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
-                
-                # Create the final output page
-                new_page = output_doc.new_page(
-                    width=original_page.rect.width,
-                    height=original_page.rect.height
+            # Step 1: Extract original text blocks with positions BEFORE any modifications
+            # (from the job's cached layout; nothing below parses the page text again)
+            layout = get_document_layout(original_path, original_doc)
+            page_blocks = [
+                self._extract_anchor_blocks(page_layout, page_idx)
+                for page_idx, page_layout in enumerate(layout.pages)
+            ]
+            
+            # Steps 2-3: start rendering cleaned backgrounds in worker processes
+            redact_text = self.text_removal_mode == 'redact'
+            if redact_text:
+                render_futures = {}
+            else:
+                render_futures = self._submit_page_renders(original_path, original_doc.page_count,
+                                                           raster_policy.quality, layout)
+            
+            # Step 4A: adapt the whole document ahead of assembly; the API wait overlaps
+            # rendering and placement, and each page is placed as soon as its texts are back
+            adapt_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anchor-adapt")
+            try:
+                adapt_futures = [Future() for _ in page_blocks]
+                adapt_executor.submit(
+                    self._adapt_anchor_pages, adaptations_service,
+                    [[block['text'] for block in original_blocks] for original_blocks in page_blocks],
+                    profile, adapt_futures
                 )
                 
-                # Insert the cleaned background
-                new_page.insert_image(new_page.rect, pixmap=cleaned_pix)
-                
-                # Step 4A: Collect all block texts for batch adaptation
-                block_texts = [block['text'] for block in original_blocks]
-                adapted_block_texts = []
-                
-                if block_texts:
-                    try:
-                        print(f"  🚀 Batch adapting {len(block_texts)} text blocks for page {page_idx}")
-                        adapted_block_texts = adaptations_service.process_text_batch(block_texts, profile)
-                        print(f"  ✅ Batch adaptation completed for page {page_idx}")
-                    except Exception as batch_error:
-                        print(f"  ⚠️ Batch adaptation failed for page {page_idx}: {batch_error}. Using individual processing.")
-                        # Fallback to individual processing
-                        adapted_block_texts = []
-                        for block_text in block_texts:
-                            try:
-                                adapted_text = adaptations_service.adapt_text(block_text, profile)
-                                adapted_block_texts.append(adapted_text)
-                            except Exception as e:
-                                print(f"    Individual adaptation failed: {e}")
-                                adapted_block_texts.append(block_text)
-                
-                # Step 4B: Place adapted texts at EXACT original positions
-                for block_idx, block in enumerate(original_blocks):
-                    block_rect = fitz.Rect(block['bbox'])
-                    original_text = block['text']
+                # Process each page
+                for page_idx in range(original_doc.page_count):
+                    original_page = original_doc[page_idx]
+                    original_blocks = page_blocks[page_idx]
+                    print(f"Page {page_idx}: {len(original_blocks)} text blocks to process")
                     
-                    # Get the adapted text for this block
-                    if block_idx < len(adapted_block_texts):
-                        adapted_block_text = adapted_block_texts[block_idx]
-                        print(f"  Block {block_idx}: '{original_text[:30]}...' -> '{adapted_block_text[:30]}...'")
+                    if redact_text and original_page.rotation == 0:
+                        # Copy the page and strip its text; graphics stay vectors. Copies
+                        # go through the writer's graft map for original_doc, so images and
+                        # fonts shared across pages are not duplicated per page
+                        new_page = output_writer.copy_page(original_doc, page_idx)
+                        self._redact_page_text(new_page, layout.pages[page_idx])
                     else:
-                        adapted_block_text = original_text
-                        print(f"  Block {block_idx}: No adaptation available, using original")
-                    
-                    if adapted_block_text and adapted_block_text.strip():
-                        # Try multiple placement methods with progressively simpler approaches
-                        success = False
+                        # Create the final output page
+                        new_page = output_writer.new_page(
+                            width=original_page.rect.width,
+                            height=original_page.rect.height
+                        )
                         
-                        # Method 1: PIXEL-PERFECT alignment 
-                        try:
-                            success = self._place_text_with_perfect_alignment(
-                                new_page, block, adapted_block_text, profile_config, block['id']
+                        # Insert the cleaned background (no text, backgrounds preserved)
+                        background = self._collect_page_render(render_futures, page_idx)
+                        if background is not None:
+                            raster_policy.record(background)
+                        else:
+                            background = self._render_text_free_background(
+                                original_page, raster_policy, layout.pages[page_idx]
                             )
-                        except Exception as e:
-                            print(f"  ⚠️ Block {block['id']}: Perfect alignment failed with error: {e}")
-                        
-                        # Method 2: Simple textbox fallback
-                        if not success:
-                            print(f"  🔄 Block {block['id']}: Trying simple textbox fallback")
-                            try:
-                                # Use the block's bounding box with generous padding
-                                text_rect = fitz.Rect(block['bbox'])
-                                text_rect.x1 += 150  # Add more width padding
-                                text_rect.y1 += 30   # Add more height padding
-                                
-                                result = new_page.insert_textbox(
-                                    text_rect,
-                                    adapted_block_text,
-                                    fontname="helv",
-                                    fontsize=11,  # Slightly smaller font
-                                    color=(0, 0, 0),
-                                    align=0  # Left align
-                                )
-                                
-                                if result > 0:
-                                    print(f"  ✅ Block {block['id']}: Textbox fallback successful")
-                                    success = True
-                                elif result < 0:
-                                    print(f"  ⚠️ Block {block['id']}: Textbox overflow ({result}), trying with smaller font")
-                                    # Try again with even smaller font and more space
-                                    text_rect.x1 += 100  # Add even more width
-                                    result2 = new_page.insert_textbox(
-                                        text_rect,
-                                        adapted_block_text,
-                                        fontname="helv",
-                                        fontsize=9,  # Even smaller font
-                                        color=(0, 0, 0),
-                                        align=0
-                                    )
-                                    if result2 > 0:
-                                        print(f"  ✅ Block {block['id']}: Smaller font worked")
-                                        success = True
-                                    else:
-                                        print(f"  ❌ Block {block['id']}: Still overflowing with smaller font")
-                                else:
-                                    print(f"  ⚠️ Block {block['id']}: Textbox returned {result}")
-                                    
-                            except Exception as e:
-                                print(f"  ❌ Block {block['id']}: Textbox fallback failed: {e}")
-                        
-                        # Method 3: Basic text insertion with manual wrapping
-                        if not success:
-                            print(f"  🔄 Block {block['id']}: Trying basic text insertion with wrapping")
-                            try:
-                                block_rect = fitz.Rect(block['bbox'])
-                                font_size = self._get_average_font_size(block)
-                                
-                                # Calculate approximate characters per line
-                                avg_char_width = font_size * 0.5  # Rough estimate
-                                chars_per_line = int(block_rect.width / avg_char_width)
-                                
-                                # Wrap text manually
-                                words = adapted_block_text.split()
-                                lines = []
-                                current_line = []
-                                current_length = 0
-                                
-                                for word in words:
-                                    if current_length + len(word) + 1 <= chars_per_line:
-                                        current_line.append(word)
-                                        current_length += len(word) + 1
-                                    else:
-                                        if current_line:
-                                            lines.append(' '.join(current_line))
-                                        current_line = [word]
-                                        current_length = len(word)
-                                
-                                if current_line:
-                                    lines.append(' '.join(current_line))
-                                
-                                # Insert each line
-                                y_offset = block_rect.y0 + font_size
-                                line_height = font_size * 1.2
-                                
-                                for line in lines:
-                                    if y_offset < block_rect.y1 + line_height:  # Still within block bounds (with some overflow allowed)
-                                        new_page.insert_text(
-                                            (block_rect.x0, y_offset),
-                                            line,
-                                            fontname="helv",
-                                            fontsize=font_size * 0.9,  # Slightly smaller
-                                            color=(0, 0, 0)
-                                        )
-                                        y_offset += line_height
-                                
-                                print(f"  ✅ Block {block['id']}: Used basic text insertion with {len(lines)} lines")
-                                success = True
-                            except Exception as fallback_err:
-                                print(f"  ✗ Block {block['id']}: All placement methods failed: {fallback_err}")
-                
-                # Add profile indicator at bottom right
-                indicator_text = f"[Adapted: {profile.upper()}]"
-                indicator_color = tuple(c/255 for c in profile_config['highlight_color']) if profile_config['highlight_color'] else (0.5, 0.5, 0.5)
-                new_page.insert_text(
-                    (new_page.rect.width - 120, new_page.rect.height - 15),
-                    indicator_text,
-                    fontname='helv',
-                    fontsize=8,
-                    color=indicator_color
-                )
+                        new_page.insert_image(new_page.rect, stream=background)
+                    
+                    # Step 4B: Place adapted texts at EXACT original positions
+                    adapted_block_texts = adapt_futures[page_idx].result()
+                    self._place_anchor_blocks(new_page, original_blocks, adapted_block_texts, profile_config)
+                    
+                    # Add profile indicator at bottom right
+                    indicator_text = f"[Adapted: {profile.upper()}]"
+                    indicator_color = tuple(c/255 for c in profile_config['highlight_color']) if profile_config['highlight_color'] else (0.5, 0.5, 0.5)
+                    new_page.insert_text(
+                        (new_page.rect.width - 120, new_page.rect.height - 15),
+                        indicator_text,
+                        fontname='helv',
+                        fontsize=8,
+                        color=indicator_color
+                    )
+            finally:
+                adapt_executor.shutdown(wait=False, cancel_futures=True)
+                for future in render_futures.values():
+                    future.cancel()
             
-            # Save the output document
-            output_doc.save(output_path)
-            output_doc.close()
+            # Flush the remaining pages
+            output_writer.close()
             original_doc.close()
+            self._log_raster_summary(raster_policy, output_path)
             
             print(f"✓ Anchor-based PDF created successfully: {output_path}")
             return True
@@ -701,9 +726,309 @@ class PDFVisualHandler:
         except Exception as e:
             print(f"✗ Error in anchor-based PDF creation: {str(e)}")
             traceback.print_exc()
+            if output_writer is not None:
+                output_writer.abort()
             return False
     
-    def _create_text_free_page(self, original_page):
+    def _extract_anchor_blocks(self, page_layout: PageLayout, page_idx: int) -> List[Dict[str, Any]]:
+        """
+        Extract text blocks with position anchors from a page
+        
+        Args:
+            page_layout: Layout of the original (unmodified) page
+            page_idx: Page number, used in block IDs
+            
+        Returns:
+            Blocks with id, bbox, text, lines and hash
+        """
+        original_blocks = []
+        
+        for block in page_layout.blocks:
+            # Extract text from this block
+            block_text = ""
+            for line in block.lines:
+                block_text += line.text
+                block_text += " "  # Add space between lines
+            
+            if block_text.strip():
+                block_id = f"page{page_idx}_block{len(original_blocks)}"
+                original_blocks.append({
+                    'id': block_id,
+                    'bbox': block.bbox,
+                    'text': block_text.strip(),
+                    'lines': [line.to_dict() for line in block.lines],
+                    'hash': hashlib.md5(block_text.strip().encode()).hexdigest()
+                })
+        
+        return original_blocks
+    
+    def _adapt_anchor_pages(self, adaptations_service, page_texts: List[List[str]], profile: str,
+                            page_futures: List[Future]):
+        """
+        Adapt every page's block texts in one batched call
+        
+        Blocks from all pages go to the adaptation service together, so
+        headers and footers repeated across pages are adapted once, and
+        batches are packed a few pages at a time so early pages come back
+        first. Each page's future is resolved with its adapted texts as soon
+        as all of its blocks are back; blocks whose batch fails fall back to
+        one request per block (originals where that fails too).
+        
+        Args:
+            adaptations_service: Service used to adapt the texts
+            page_texts: Block texts of each page
+            profile: Learning profile for text adaptation
+            page_futures: One future per page, resolved with its adapted texts
+        """
+        texts = [text for block_texts in page_texts for text in block_texts]
+        groups = [page_idx for page_idx, block_texts in enumerate(page_texts) for _ in block_texts]
+        starts = [0]
+        for block_texts in page_texts[:-1]:
+            starts.append(starts[-1] + len(block_texts))
+        results = [None] * len(texts)
+        reported = [False] * len(texts)
+        remaining = [len(block_texts) for block_texts in page_texts]
+        
+        def texts_ready(indices, adapted_texts):
+            for index, adapted_text in zip(indices, adapted_texts):
+                if reported[index]:
+                    continue
+                reported[index] = True
+                results[index] = adapted_text
+                page_idx = groups[index]
+                remaining[page_idx] -= 1
+                if remaining[page_idx] == 0:
+                    start = starts[page_idx]
+                    page_futures[page_idx].set_result(results[start:start + len(page_texts[page_idx])])
+        
+        try:
+            for page_idx, block_texts in enumerate(page_texts):
+                if not block_texts:
+                    page_futures[page_idx].set_result([])
+            
+            if texts:
+                try:
+                    print(f"  🚀 Batch adapting {len(texts)} text blocks across {len(page_texts)} pages")
+                    adapted_texts = adaptations_service.process_text_batch(
+                        texts, profile, progress_callback=texts_ready, groups=groups
+                    )
+                    texts_ready(range(len(texts)), adapted_texts)
+                    print(f"  ✅ Batch adaptation completed")
+                except Exception as batch_error:
+                    print(f"  ⚠️ Batch adaptation failed: {batch_error}. Using individual processing.")
+            
+            # Fallback to individual processing for whatever has not come back
+            for index, text in enumerate(texts):
+                if reported[index]:
+                    continue
+                try:
+                    adapted_text = adaptations_service.adapt_text(text, profile)
+                except Exception as e:
+                    print(f"    Individual adaptation failed: {e}")
+                    adapted_text = text
+                texts_ready([index], [adapted_text])
+        except Exception as e:
+            # Never leave the assembling thread waiting on a page
+            for future in page_futures:
+                if not future.done():
+                    future.set_exception(e)
+    
+    def _place_anchor_blocks(self, new_page, original_blocks: List[Dict[str, Any]],
+                             adapted_block_texts: List[str], profile_config: Dict[str, Any]):
+        """
+        Place adapted block texts at their original anchor positions
+        """
+        for block_idx, block in enumerate(original_blocks):
+            block_rect = fitz.Rect(block['bbox'])
+            original_text = block['text']
+            
+            # Get the adapted text for this block
+            if block_idx < len(adapted_block_texts):
+                adapted_block_text = adapted_block_texts[block_idx]
+                print(f"  Block {block_idx}: '{original_text[:30]}...' -> '{adapted_block_text[:30]}...'")
+            else:
+                adapted_block_text = original_text
+                print(f"  Block {block_idx}: No adaptation available, using original")
+            
+            if adapted_block_text and adapted_block_text.strip():
+                # Try multiple placement methods with progressively simpler approaches
+                success = False
+                
+                # Method 1: PIXEL-PERFECT alignment 
+                try:
+                    success = self._place_text_with_perfect_alignment(
+                        new_page, block, adapted_block_text, profile_config, block['id']
+                    )
+                except Exception as e:
+                    print(f"  ⚠️ Block {block['id']}: Perfect alignment failed with error: {e}")
+                
+                # Method 2: Simple textbox fallback
+                if not success:
+                    print(f"  🔄 Block {block['id']}: Trying simple textbox fallback")
+                    try:
+                        # Use the block's bounding box with generous padding
+                        text_rect = fitz.Rect(block['bbox'])
+                        text_rect.x1 += 150  # Add more width padding
+                        text_rect.y1 += 30   # Add more height padding
+                        
+                        # Slightly smaller font (11pt, down to 9pt), then more width
+                        helv_metrics = get_font_metrics("helv")
+                        fit = helv_metrics.fit(adapted_block_text, text_rect, 11, 9)
+                        if fit is None:
+                            print(f"  ⚠️ Block {block['id']}: Textbox overflow, trying with more width")
+                            text_rect.x1 += 100  # Add even more width
+                            fit = helv_metrics.fit(adapted_block_text, text_rect, 9, 9)
+                        
+                        if fit is None:
+                            print(f"  ❌ Block {block['id']}: Still overflowing with smaller font")
+                        else:
+                            result = new_page.insert_textbox(
+                                text_rect,
+                                adapted_block_text,
+                                fontname="helv",
+                                fontsize=fit.font_size,
+                                color=(0, 0, 0),
+                                align=0  # Left align
+                            )
+                            if result >= 0:
+                                print(f"  ✅ Block {block['id']}: Textbox fallback successful at {fit.font_size:.1f}pt")
+                                success = True
+                            else:
+                                print(f"  ⚠️ Block {block['id']}: Textbox returned {result}")
+                            
+                    except Exception as e:
+                        print(f"  ❌ Block {block['id']}: Textbox fallback failed: {e}")
+                
+                # Method 3: Basic text insertion with manual wrapping
+                if not success:
+                    print(f"  🔄 Block {block['id']}: Trying basic text insertion with wrapping")
+                    try:
+                        block_rect = fitz.Rect(block['bbox'])
+                        font_size = self._get_average_font_size(block)
+                        
+                        # Wrap text by measured word widths
+                        lines = get_font_metrics("helv").wrap(
+                            ' '.join(adapted_block_text.split()), block_rect.width, font_size * 0.9
+                        )
+                        
+                        # Insert each line
+                        y_offset = block_rect.y0 + font_size
+                        line_height = font_size * 1.2
+                        
+                        for line in lines:
+                            if y_offset < block_rect.y1 + line_height:  # Still within block bounds (with some overflow allowed)
+                                new_page.insert_text(
+                                    (block_rect.x0, y_offset),
+                                    line,
+                                    fontname="helv",
+                                    fontsize=font_size * 0.9,  # Slightly smaller
+                                    color=(0, 0, 0)
+                                )
+                                y_offset += line_height
+                        
+                        print(f"  ✅ Block {block['id']}: Used basic text insertion with {len(lines)} lines")
+                        success = True
+                    except Exception as fallback_err:
+                        print(f"  ✗ Block {block['id']}: All placement methods failed: {fallback_err}")
+    
+    def _submit_page_renders(self, pdf_path: str, page_count: int,
+                             quality: Optional[str] = None, layout=None) -> Dict[int, Any]:
+        """
+        Start rendering cleaned page backgrounds in worker processes
+        
+        Pages are split into contiguous ranges so each worker opens the PDF
+        once per range, with ranges small enough that early pages are ready
+        soon.
+        
+        Args:
+            pdf_path: PDF being processed
+            page_count: Number of pages
+            quality: Output quality tier for the renders
+            layout: DocumentLayout of the PDF, shipped with each range
+            
+        Returns:
+            Page index -> future of that page's range ({} to render in-process)
+        """
+        workers = min(self.render_workers, page_count)
+        if workers <= 1:
+            return {}
+        
+        range_size = max(1, min(4, math.ceil(page_count / (workers * 2))))
+        try:
+            pool = _get_render_pool(self.render_workers)
+            futures = {}
+            for start in range(0, page_count, range_size):
+                page_indices = list(range(start, min(start + range_size, page_count)))
+                future = pool.submit(
+                    _render_cleaned_page_range, pdf_path, page_indices, quality,
+                    [layout.pages[i] for i in page_indices] if layout else None
+                )
+                for page_idx in page_indices:
+                    futures[page_idx] = future
+            return futures
+        except Exception as e:
+            print(f"  Warning: parallel page rendering unavailable ({e}), rendering in-process")
+            _discard_render_pool()
+            return {}
+    
+    def _collect_page_render(self, render_futures: Dict[int, Any], page_idx: int) -> Optional[bytes]:
+        """
+        Wait for a page's background from the render workers
+        
+        Returns:
+            Encoded image bytes, or None if the page should be rendered in-process
+        """
+        future = render_futures.get(page_idx)
+        if future is None:
+            return None
+        try:
+            return dict(future.result())[page_idx]
+        except Exception as e:
+            print(f"  Warning: worker rendering failed for page {page_idx} ({e}), rendering in-process")
+            if isinstance(e, BrokenProcessPool):
+                _discard_render_pool()
+            # Remaining pages of a failed range are rendered in-process too
+            for other_idx, other_future in list(render_futures.items()):
+                if other_future is future:
+                    del render_futures[other_idx]
+            return None
+    
+    def _redact_page_text(self, page, page_layout: Optional[PageLayout] = None) -> int:
+        """
+        Remove text from a page in place with redactions
+        
+        Only text operators are removed: images are left untouched
+        (PDF_REDACT_IMAGE_NONE), vector graphics are not affected and nothing
+        is painted over the removed text. Blocks inside image areas are kept,
+        as in the raster text removal.
+        
+        Args:
+            page: Page to clean (a copy, never the source document's page)
+            page_layout: Layout of the source page (parsed from page if omitted)
+            
+        Returns:
+            Number of text spans removed
+        """
+        if page_layout is None:
+            page_layout = extract_page_layout(page)
+        geometry = self._get_page_geometry(page)
+        redacted = 0
+        
+        for block in page_layout.blocks:
+            if self._is_text_in_image_area(page, fitz.Rect(block.bbox), geometry):
+                continue
+            for line in block.lines:
+                for span in line.spans:
+                    if span.text.strip():
+                        page.add_redact_annot(fitz.Rect(span.bbox), fill=False)
+                        redacted += 1
+        
+        if redacted:
+            page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+        return redacted
+    
+    def _create_text_free_page(self, original_page, zoom: float = 1.0,
+                               page_layout: Optional[PageLayout] = None):
         """
         Create a version of the page with text structurally removed but backgrounds preserved
         
@@ -711,70 +1036,122 @@ class PDFVisualHandler:
         1. Drawing commands filtering (removes text render commands)
         2. Content stream manipulation 
         3. Selective element preservation
+        
+        zoom is the scale the original is rendered at (1.0 = 72 dpi); render
+        the returned page at the same scale to keep that resolution.
+        page_layout is the page's cached layout (parsed here if omitted).
         """
+        if page_layout is None:
+            page_layout = extract_page_layout(original_page)
         try:
             # Approach 1: Use the drawing commands to rebuild page without text
-            return self._rebuild_page_without_text(original_page)
+            return self._rebuild_page_without_text(original_page, zoom, page_layout)
         except Exception as e:
             print(f"  Warning: Advanced text removal failed ({e}), using fallback")
             # Fallback: Create page with only images and drawings
-            return self._create_visual_only_page(original_page)
+            return self._create_visual_only_page(original_page, zoom, page_layout)
+    
+    def _render_text_free_background(self, original_page, raster_policy: RasterPolicy,
+                                     page_layout: Optional[PageLayout] = None) -> bytes:
+        """
+        Render a page's text-free background with a raster policy
+        
+        The resolution is chosen from the original page's content, since the
+        text-free copy is itself an image.
+        
+        Returns:
+            Encoded image bytes for insert_image(stream=...)
+        """
+        if page_layout is None:
+            page_layout = extract_page_layout(original_page)
+        dpi = raster_policy.page_dpi(original_page, page_layout)
+        cleaned_page = self._create_text_free_page(original_page, dpi / 72.0, page_layout)
+        return raster_policy.render(cleaned_page, dpi)
+    
+    def _open_output_writer(self, output_path: str) -> StreamingPDFWriter:
+        """
+        Streaming writer for an output PDF
+        
+        PyMuPDF stores inserted PNG backgrounds as raw pixels, so streams are
+        deflated on save; JPEG backgrounds are kept as they are.
+        """
+        return StreamingPDFWriter(output_path, self.output_chunk_pages, save_options={'deflate': True})
     
-    def _rebuild_page_without_text(self, original_page):
+    def _raster_policy(self, quality: Optional[str] = None) -> RasterPolicy:
+        """Raster policy for one output document"""
+        return RasterPolicy(quality or self.output_quality)
+    
+    def _log_raster_summary(self, raster_policy: RasterPolicy, output_path: str):
+        """Log what the rasterized backgrounds cost for an output document"""
+        summary = raster_policy.summary()
+        output_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+        self.logger.info(
+            f"Output {output_path}: {output_bytes} bytes; {summary['pages']} rasterized pages "
+            f"at '{summary['quality']}' quality, {summary['encoded_bytes']} image bytes {summary['formats']}"
+        )
+    
+    def _rebuild_page_without_text(self, original_page, zoom: float = 1.0,
+                                   page_layout: Optional[PageLayout] = None):
         """
         Rebuild page using drawing commands, filtering out text operations
         """
         # Create new page with same dimensions
         new_doc = fitz.open()
         new_page = new_doc.new_page(width=original_page.rect.width, height=original_page.rect.height)
+        # Pages only hold a weak reference to their document; keep it alive with the page
+        new_page._owner_doc = new_doc
         
         # Get all drawing commands from the original page
         try:
             # Copy visual elements excluding text
-            original_pix = original_page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+            original_pix = original_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
             new_page.insert_image(new_page.rect, pixmap=original_pix)
             
+            # Sample block backgrounds from this render instead of re-rendering each block
+            page_pixels = self._pixmap_array(original_pix)
+            geometry = self._get_page_geometry(original_page)
+            
             # Now we need to mask out text areas more intelligently
             # Get text blocks and create masks that preserve background colors
-            text_dict = original_page.get_text("dict")
+            if page_layout is None:
+                page_layout = extract_page_layout(original_page)
             
-            for block in text_dict.get('blocks', []):
-                if block.get('type') == 0:  # Text block
-                    block_rect = fitz.Rect(block['bbox'])
-                    
-                    # Skip blocks that are within images or have special backgrounds
-                    if self._is_text_in_image_area(original_page, block_rect):
-                        print(f"    Skipping text block in image area: {block_rect}")
-                        continue
-                    
-                    # Sample the background color for better blending
-                    bg_color = self._sample_background_color(original_page, block_rect)
-                    
-                    # Use more precise masking - mask only the actual text spans, not the entire block
-                    for line in block.get('lines', []):
-                        for span in line.get('spans', []):
-                            span_rect = fitz.Rect(span.get('bbox', [0, 0, 0, 0]))
+            for block in page_layout.blocks:
+                block_rect = fitz.Rect(block.bbox)
+                
+                # Skip blocks that are within images or have special backgrounds
+                if self._is_text_in_image_area(original_page, block_rect, geometry):
+                    print(f"    Skipping text block in image area: {block_rect}")
+                    continue
+                
+                # Sample the background color for better blending
+                bg_color = self._sample_background_color(original_page, block_rect, page_pixels)
+                
+                # Use more precise masking - mask only the actual text spans, not the entire block
+                for line in block.lines:
+                    for span in line.spans:
+                        span_rect = fitz.Rect(span.bbox)
+                        
+                        # Only mask if the span has actual text
+                        if span.text.strip():
+                            # Add small padding for better coverage
+                            padded_rect = fitz.Rect(
+                                span_rect.x0 - 1,
+                                span_rect.y0 - 1,
+                                span_rect.x1 + 1,
+                                span_rect.y1 + 1
+                            )
                             
-                            # Only mask if the span has actual text
-                            if span.get('text', '').strip():
-                                # Add small padding for better coverage
-                                padded_rect = fitz.Rect(
-                                    span_rect.x0 - 1,
-                                    span_rect.y0 - 1,
-                                    span_rect.x1 + 1,
-                                    span_rect.y1 + 1
-                                )
-                                
-                                # Fill with background color instead of white
-                                shape = new_page.new_shape()
-                                shape.draw_rect(padded_rect)
-                                shape.finish(
-                                    fill=bg_color,
-                                    fill_opacity=1.0,
-                                    color=bg_color,  # Set border color same as fill to avoid visible borders
-                                    width=0  # No border width
-                                )
-                                shape.commit()
+                            # Fill with background color instead of white
+                            shape = new_page.new_shape()
+                            shape.draw_rect(padded_rect)
+                            shape.finish(
+                                fill=bg_color,
+                                fill_opacity=1.0,
+                                color=bg_color,  # Set border color same as fill to avoid visible borders
+                                width=0  # No border width
+                            )
+                            shape.commit()
             
             return new_page
             
@@ -782,63 +1159,27 @@ class PDFVisualHandler:
             print(f"    Rebuild method failed: {e}")
             raise e
     
-    def _is_text_in_image_area(self, page, text_rect):
+    def _is_text_in_image_area(self, page, text_rect, geometry: Optional[PageGeometryIndex] = None):
         """
         Check if text block is within an image area
+        
+        Args:
+            page: PyMuPDF page
+            text_rect: Text block rectangle
+            geometry: Prebuilt index from _get_page_geometry (built here if omitted)
         """
         try:
-            # Get all images on the page
-            image_list = page.get_images()
-            
-            for img_index, img in enumerate(image_list):
-                try:
-                    # Get image position - try multiple methods
-                    img_rect = None
-                    
-                    # Method 1: get_image_bbox
-                    try:
-                        img_rect = page.get_image_bbox(img[0])
-                    except:
-                        pass
-                    
-                    # Method 2: look for image in drawings if bbox fails
-                    if not img_rect:
-                        drawings = page.get_drawings()
-                        for drawing in drawings:
-                            if drawing.get('type') == 'image':
-                                img_rect = fitz.Rect(drawing['rect'])
-                                break
-                    
-                    # Check if text rect overlaps significantly with image rect
-                    if img_rect and text_rect.intersects(img_rect):
-                        intersection = text_rect & img_rect
-                        # If more than 50% of text block is within image, consider it part of image
-                        overlap_ratio = intersection.get_area() / text_rect.get_area()
-                        if overlap_ratio > 0.5:
-                            print(f"    Found text in image area: {img_rect}, overlap: {overlap_ratio:.2f}")
-                            return True
-                
-                except Exception as img_error:
-                    print(f"    Error processing image {img_index}: {img_error}")
-                    continue
-            
-            # Method 3: check for colored rectangles that might represent images
-            # This catches cases where we have visual elements that aren't detected as images
-            try:
-                drawings = page.get_drawings()
-                for drawing in drawings:
-                    if drawing.get('type') == 'rect' and drawing.get('fill'):
-                        # Check if this might be an image placeholder (colored rectangle)
-                        rect = fitz.Rect(drawing['rect'])
-                        if rect.width > 50 and rect.height > 50:  # Reasonable image size
-                            if text_rect.intersects(rect):
-                                intersection = text_rect & rect
-                                overlap_ratio = intersection.get_area() / text_rect.get_area()
-                                if overlap_ratio > 0.5:
-                                    print(f"    Found text in colored rectangle (potential image): {rect}, overlap: {overlap_ratio:.2f}")
-                                    return True
-            except Exception as drawing_error:
-                print(f"    Error checking drawings: {drawing_error}")
+            if geometry is None:
+                geometry = self._get_page_geometry(page)
+            
+            match = geometry.find_covering(text_rect)
+            if match:
+                kind, rect, overlap_ratio = match
+                if kind == 'image':
+                    print(f"    Found text in image area: {rect}, overlap: {overlap_ratio:.2f}")
+                else:
+                    print(f"    Found text in colored rectangle (potential image): {rect}, overlap: {overlap_ratio:.2f}")
+                return True
             
             return False
             
@@ -846,78 +1187,158 @@ class PDFVisualHandler:
             print(f"    Error checking image overlap: {e}")
             return False
     
-    def _sample_background_color(self, page, text_rect):
+    def _get_page_geometry(self, page) -> PageGeometryIndex:
+        """
+        Build the image/filled-rect spatial index for a page
+        
+        Build it once per page and pass it to _is_text_in_image_area for each
+        block; subclasses can query it directly.
+        """
+        return PageGeometryIndex.from_page(page)
+    
+    def _sample_background_color(self, page, text_rect, page_pixels=None):
         """
         Sample the background color around a text area to use for masking
+        
+        Args:
+            page: PyMuPDF page
+            text_rect: Area whose surroundings are sampled
+            page_pixels: Full-page render from _pixmap_array (rendered here if omitted)
+            
+        Returns:
+            RGB tuple in the 0-1 range
         """
         try:
-            # Expand the rect slightly to sample around the text
-            sample_rect = fitz.Rect(
-                max(0, text_rect.x0 - 5),
-                max(0, text_rect.y0 - 5),
-                min(page.rect.width, text_rect.x1 + 5),
-                min(page.rect.height, text_rect.y1 + 5)
-            )
-            
-            # Get a small pixmap of the area
-            mat = fitz.Matrix(0.5, 0.5)  # Lower resolution for sampling
-            sample_pix = page.get_pixmap(matrix=mat, clip=sample_rect, alpha=False)
-            
-            # Convert to PIL for color analysis
-            import PIL.Image
-            img_data = sample_pix.tobytes("ppm")
-            pil_img = PIL.Image.open(io.BytesIO(img_data))
-            
-            # Get the most common color (background)
-            colors = pil_img.getcolors(maxcolors=256*256*256)
-            if colors:
-                # Get the most frequent color
-                most_common_color = max(colors, key=lambda x: x[0])[1]
-                # Convert RGB to 0-1 range for PyMuPDF
-                return tuple(c/255.0 for c in most_common_color[:3])
-            else:
-                # Default to white if color analysis fails
-                return (1.0, 1.0, 1.0)
+            region = self._background_sample_region(page, text_rect, page_pixels)
+            return self._region_background_color(region)
                 
         except Exception as e:
             print(f"    Color sampling failed: {e}")
             # Default to light gray instead of pure white
             return (0.95, 0.95, 0.95)
     
-    def _create_visual_only_page(self, original_page):
+    def _background_sample_region(self, page, text_rect, page_pixels=None) -> np.ndarray:
+        """
+        Pixels around a text area, as sampled by _sample_background_color
+        
+        Args:
+            page: PyMuPDF page
+            text_rect: Area whose surroundings are sampled
+            page_pixels: Full-page render from _pixmap_array (rendered here if omitted)
+            
+        Returns:
+            (height, width, channels) uint8 array
+        """
+        # Expand the rect slightly to sample around the text
+        sample_rect = fitz.Rect(
+            max(0, text_rect.x0 - 5),
+            max(0, text_rect.y0 - 5),
+            min(page.rect.width, text_rect.x1 + 5),
+            min(page.rect.height, text_rect.y1 + 5)
+        )
+        
+        if page_pixels is None:
+            # Single-block caller: a low-resolution render of just this area
+            mat = fitz.Matrix(0.5, 0.5)
+            sample_pix = page.get_pixmap(matrix=mat, clip=sample_rect, alpha=False)
+            # Copy, since the array would otherwise share the pixmap's buffer
+            return self._pixmap_array(sample_pix).copy()
+        
+        # Map page coordinates onto the full-page render
+        height, width = page_pixels.shape[:2]
+        scale_x = width / page.rect.width
+        scale_y = height / page.rect.height
+        x0 = int(sample_rect.x0 * scale_x)
+        y0 = int(sample_rect.y0 * scale_y)
+        x1 = max(x0 + 1, int(round(sample_rect.x1 * scale_x)))
+        y1 = max(y0 + 1, int(round(sample_rect.y1 * scale_y)))
+        return page_pixels[y0:y1, x0:x1]
+    
+    def _region_background_color(self, region: np.ndarray) -> Tuple[float, float, float]:
+        """Background color of a sampled region (its most common color, 0-1 range)"""
+        most_common_color = self._mode_color(region)
+        if most_common_color is not None:
+            # Convert RGB to 0-1 range for PyMuPDF
+            return tuple(c/255.0 for c in most_common_color)
+        # Default to white if color analysis fails
+        return (1.0, 1.0, 1.0)
+    
+    @staticmethod
+    def _pixmap_array(pixmap) -> np.ndarray:
+        """
+        View a pixmap's samples as a (height, width, channels) array without copying
+        
+        The array shares the pixmap's buffer, so keep the pixmap referenced
+        while the array is in use.
+        """
+        samples = np.frombuffer(pixmap.samples_mv, dtype=np.uint8)
+        rows = samples.reshape(pixmap.height, pixmap.stride)
+        return rows[:, :pixmap.width * pixmap.n].reshape(pixmap.height, pixmap.width, pixmap.n)
+    
+    @staticmethod
+    def _mode_color(region: np.ndarray) -> Optional[Tuple[int, int, int]]:
+        """
+        Most frequent RGB color in an image region
+        
+        Args:
+            region: (height, width, channels) uint8 array, RGB first
+            
+        Returns:
+            (r, g, b) tuple or None for an empty region
+        """
+        if region.size == 0:
+            return None
+        if region.shape[2] < 3:
+            # Grayscale render
+            values, counts = np.unique(region[..., 0], return_counts=True)
+            gray = int(values[counts.argmax()])
+            return (gray, gray, gray)
+        
+        rgb = region[..., :3].astype(np.uint32)
+        packed = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+        values, counts = np.unique(packed, return_counts=True)
+        color = int(values[counts.argmax()])
+        return ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+    
+    def _create_visual_only_page(self, original_page, zoom: float = 1.0,
+                                 page_layout: Optional[PageLayout] = None):
         """
         Fallback method: Create page with only visual elements (images, shapes)
         """
         # Create new page
         new_doc = fitz.open()
         new_page = new_doc.new_page(width=original_page.rect.width, height=original_page.rect.height)
+        # Pages only hold a weak reference to their document; keep it alive with the page
+        new_page._owner_doc = new_doc
         
         # Copy as image and then selectively remove text with intelligent masking
-        pix = original_page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+        pix = original_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
         new_page.insert_image(new_page.rect, pixmap=pix)
+        page_pixels = self._pixmap_array(pix)
+        geometry = self._get_page_geometry(original_page)
         
         # Get text areas and mask them with background-matched colors
-        text_dict = original_page.get_text("dict")
+        if page_layout is None:
+            page_layout = extract_page_layout(original_page)
         
-        for block in text_dict.get('blocks', []):
-            if block.get('type') == 0:  # Text block
-                block_rect = fitz.Rect(block['bbox'])
-                bg_color = self._sample_background_color(original_page, block_rect)
-                
-                # Skip blocks that are within images
-                if self._is_text_in_image_area(original_page, block_rect):
-                    continue
-                
-                # Use the sampled background color for better blending
-                shape = new_page.new_shape()
-                shape.draw_rect(block_rect)
-                shape.finish(
-                    fill=bg_color,
-                    fill_opacity=1.0,
-                    color=bg_color,  # Border same as fill
-                    width=0  # No border
-                )
-                shape.commit()
+        for block in page_layout.blocks:
+            block_rect = fitz.Rect(block.bbox)
+            bg_color = self._sample_background_color(original_page, block_rect, page_pixels)
+            
+            # Skip blocks that are within images
+            if self._is_text_in_image_area(original_page, block_rect, geometry):
+                continue
+            
+            # Use the sampled background color for better blending
+            shape = new_page.new_shape()
+            shape.draw_rect(block_rect)
+            shape.finish(
+                fill=bg_color,
+                fill_opacity=1.0,
+                color=bg_color,  # Border same as fill
+                width=0  # No border
+            )
+            shape.commit()
         
         return new_page
     
@@ -991,56 +1412,43 @@ class PDFVisualHandler:
                         text_rect.y0 + max(20, text_rect.height + 10)
                     )
                 
+                # Fit the text analytically: the block's own area first (shrinking
+                # the font a little if needed), then an expanded area
+                metrics = get_font_metrics(font_name)
+                min_font_size = original_font_size * MIN_FONT_SCALE
+                fit = metrics.fit(adapted_text, text_rect, original_font_size, min_font_size)
+                
+                if fit is None:
+                    deficit = metrics.textbox_remainder(adapted_text, text_rect, original_font_size)
+                    print(f"    ⚠ Block {block_idx}: Textbox overflow - need larger area (error code: {deficit})")
+                    text_rect = fitz.Rect(
+                        text_rect.x0,
+                        text_rect.y0,
+                        text_rect.x1 + 200,  # Add more width
+                        text_rect.y1 + 50    # Add more height
+                    )
+                    fit = metrics.fit(adapted_text, text_rect, original_font_size, min_font_size)
+                    if fit is None:
+                        print(f"    ⚠ Block {block_idx}: Still overflowing after expansion")
+                        raise Exception("Textbox overflow even with expansion")
+                
                 # Insert with exact font matching
                 result = page.insert_textbox(
                     text_rect,
                     adapted_text,
                     fontname=font_name,
-                    fontsize=original_font_size,
+                    fontsize=fit.font_size,
                     color=text_color,
                     render_mode=0,
                     align=self._detect_text_alignment(block)
                 )
                 
-                # Check if text was actually inserted
-                # PyMuPDF insert_textbox returns the actual width used, negative values indicate overflow
-                if result < 0:
-                    print(f"    ⚠ Block {block_idx}: Textbox overflow - need larger area (error code: {result})")
-                    # Negative result means text overflowed - try with expanded rectangle
-                    expanded_rect = fitz.Rect(
-                        text_rect.x0,
-                        text_rect.y0,
-                        text_rect.x1 + 200,  # Add more width
-                        text_rect.y1 + 50    # Add more height
-                    )
-                    
-                    # Retry with expanded rectangle
-                    result2 = page.insert_textbox(
-                        expanded_rect,
-                        adapted_text,
-                        fontname=font_name,
-                        fontsize=original_font_size * 0.8,  # Slightly smaller font
-                        color=text_color,
-                        render_mode=0,
-                        align=self._detect_text_alignment(block)
-                    )
-                    
-                    if result2 > 0:
-                        print(f"    ✓ Block {block_idx}: Expanded textbox successful - inserted {result2} chars")
-                        return True
-                    else:
-                        print(f"    ⚠ Block {block_idx}: Still overflowing after expansion")
-                        raise Exception(f"Textbox overflow even with expansion: {result2}")
-                        
-                elif result == 0:
-                    print(f"    ⚠ Block {block_idx}: No text was inserted (result=0)")
-                    raise Exception("No text was inserted")
-                elif result > 0:
-                    print(f"    ✓ Block {block_idx}: Perfect textbox placement successful - inserted {result} chars")
+                # insert_textbox returns the unused height; negative values mean overflow
+                if result >= 0:
+                    print(f"    ✓ Block {block_idx}: Perfect textbox placement successful at {fit.font_size:.1f}pt ({len(fit.lines)} lines)")
                     return True
-                else:
-                    print(f"    ⚠ Block {block_idx}: Unexpected result: {result}")
-                    raise Exception(f"Unexpected textbox result: {result}")
+                print(f"    ⚠ Block {block_idx}: Unexpected result: {result}")
+                raise Exception(f"Unexpected textbox result: {result}")
                 
             except Exception as textbox_err:
                 print(f"    ⚠ Textbox method failed: {textbox_err}")
@@ -1217,14 +1625,18 @@ class PDFVisualHandler:
             return 12
     
     def create_visual_preserved_pdf(self, original_path: str, adapted_content: Dict[str, Any], 
-                                    output_path: str, profile: str = 'default') -> bool:
+                                    output_path: str, profile: str = 'default',
+                                    quality: Optional[str] = None) -> bool:
         """
         Main entry point for visual preservation - uses overlay approach for reliability
+        
+        quality selects the output quality tier for rasterized pages
+        (defaults to output_quality / PDF_OUTPUT_QUALITY).
         """
         # Try the anchor-based approach first, but fallback to overlays if it fails
         try:
             success = self.create_visual_preserved_pdf_with_simple_overlay(
-                original_path, adapted_content, output_path, profile
+                original_path, adapted_content, output_path, profile, quality
             )
             if success:
                 return True
@@ -1233,40 +1645,48 @@ class PDFVisualHandler:
         
         # Fallback to standard adaptation if overlay fails
         return self.create_visual_preserved_pdf_with_overlays(
-            original_path, adapted_content, output_path, profile
+            original_path, adapted_content, output_path, profile, quality
         )
     
     def create_visual_preserved_pdf_with_simple_overlay(self, original_path: str, adapted_content: Dict[str, Any], 
-                                                        output_path: str, profile: str = 'default') -> bool:
+                                                        output_path: str, profile: str = 'default',
+                                                        quality: Optional[str] = None) -> bool:
         """
         Create PDF with simple, reliable text overlay
         """
+        output_writer = None
         try:
             # Get profile configuration
             profile_config = self.profile_configs.get(profile, self.profile_configs['default'])
             
             # Open the original PDF
             original_doc = fitz.open(original_path)
-            output_doc = fitz.open()  # Create new document
+            # Finished pages are flushed to output_path in chunks to bound memory
+            output_writer = self._open_output_writer(output_path)
+            raster_policy = self._raster_policy(quality)
+            
+            layout = get_document_layout(original_path, original_doc)
             
             print(f"Creating simple overlay PDF with {original_doc.page_count} pages")
             
             # Process each page
             for page_idx in range(original_doc.page_count):
                 original_page = original_doc[page_idx]
+                page_layout = layout.pages[page_idx]
                 
                 # Copy the entire page as background
-                mat = fitz.Matrix(1, 1)  # Identity matrix (no scaling)
-                pix = original_page.get_pixmap(matrix=mat)
+                background = raster_policy.render(
+                    original_page, raster_policy.page_dpi(original_page, page_layout)
+                )
                 
                 # Create new page with same dimensions
-                new_page = output_doc.new_page(
+                new_page = output_writer.new_page(
                     width=original_page.rect.width,
                     height=original_page.rect.height
                 )
                 
-                # Insert the pixmap as the page background
-                new_page.insert_image(new_page.rect, pixmap=pix)
+                # Insert the render as the page background
+                new_page.insert_image(new_page.rect, stream=background)
                 
                 # Get adapted content for this page
                 if page_idx < len(adapted_content.get('pages', [])):
@@ -1274,20 +1694,13 @@ class PDFVisualHandler:
                     adapted_text = adapted_page.get('text', '').strip()
                     
                     if adapted_text:
-                        # Extract original text areas to know where to place adapted text
-                        original_text_dict = original_page.get_text("dict")
-                        text_blocks = []
-                        
-                        for block in original_text_dict.get('blocks', []):
-                            if block.get('type') == 0:  # Text block
-                                text_blocks.append(block)
+                        # Original text areas tell us where to place adapted text
+                        block_bboxes = page_layout.block_bboxes
                         
-                        if text_blocks:
+                        if len(block_bboxes):
                             # Calculate overall text area
-                            min_x = min(block['bbox'][0] for block in text_blocks)
-                            min_y = min(block['bbox'][1] for block in text_blocks)
-                            max_x = max(block['bbox'][2] for block in text_blocks)
-                            max_y = max(block['bbox'][3] for block in text_blocks)
+                            min_x, min_y = block_bboxes[:, :2].min(axis=0).tolist()
+                            max_x, max_y = block_bboxes[:, 2:].max(axis=0).tolist()
                             
                             text_area = fitz.Rect(min_x - 5, min_y - 5, max_x + 5, max_y + 5)
                             
@@ -1306,15 +1719,10 @@ class PDFVisualHandler:
                             
                             # Calculate appropriate font size
                             avg_font_size = 12
-                            if text_blocks:
-                                font_sizes = []
-                                for block in text_blocks:
-                                    for line in block.get('lines', []):
-                                        for span in line.get('spans', []):
-                                            if span.get('size'):
-                                                font_sizes.append(span['size'])
-                                if font_sizes:
-                                    avg_font_size = sum(font_sizes) / len(font_sizes)
+                            font_sizes = page_layout.span_columns().size
+                            font_sizes = font_sizes[font_sizes != 0]
+                            if len(font_sizes):
+                                avg_font_size = float(font_sizes.mean())
                             
                             # Place adapted text in the cleared area
                             try:
@@ -1351,17 +1759,19 @@ class PDFVisualHandler:
                 else:
                     print(f"  ⚠️ Page {page_idx}: Page not found in adapted content")
             
-            # Save the output document
-            output_doc.save(output_path)
-            output_doc.close()
+            # Flush the remaining pages
+            output_writer.close()
             original_doc.close()
             
+            self._log_raster_summary(raster_policy, output_path)
             print(f"✅ Simple overlay PDF created successfully: {output_path}")
             return True
             
         except Exception as e:
             self.logger.error(f"Error creating simple overlay PDF: {str(e)}")
             print(f"❌ Simple overlay PDF creation failed: {str(e)}")
+            if output_writer is not None:
+                output_writer.abort()
             return False
     
     def create_visual_preserved_with_overlay(self, original_path: str, adapted_content: Dict[str, Any], 
@@ -6,6 +6,12 @@ Provides advanced visual preservation features for PDF adaptation
 import fitz
 from typing import Dict, Any, List, Optional, Tuple, Callable
 from .pdf_visual_handler import PDFVisualHandler
+from .pdf_stream_writer import StreamingPDFWriter
+from .pdf_layout import PageLayout, get_document_layout, extract_page_layout
+from .text_metrics import MIN_FONT_SCALE, get_font_metrics
+from .page_sample_cache import (
+    RECT_QUANTUM, get_page_sample_cache, page_content_hash, quantize_rect, region_digest
+)
 import logging
 import os
 import functools
@@ -17,63 +23,84 @@ from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_compl
 class PDFVisualHandlerEnhanced(PDFVisualHandler):
     """Enhanced PDF handler with performance optimizations"""
     
-    def __init__(self, profile_configs: Optional[Dict[str, Dict[str, Any]]] = None):
-        super().__init__(profile_configs)
-        self._background_cache = {}
+    def __init__(self, profile_configs: Optional[Dict[str, Dict[str, Any]]] = None,
+                 service_config: Optional[Dict[str, Any]] = None):
+        super().__init__(profile_configs, service_config)
+        self.sample_cache = get_page_sample_cache()
         self._font_cache = {}
         self._adaptation_cache = {}
         self.logger = logging.getLogger(__name__)
     
-    def _sample_background_color_cached(self, page, text_rect):
-        """Cache background color sampling for performance"""
-        # Create cache key from rect coordinates
-        cache_key = f"{id(page)}_{text_rect.x0:.1f}_{text_rect.y0:.1f}_{text_rect.x1:.1f}_{text_rect.y1:.1f}"
-        
-        if cache_key in self._background_cache:
-            return self._background_cache[cache_key]
-        
-        # Perform actual sampling
-        color = self._sample_background_color(page, text_rect)
-        self._background_cache[cache_key] = color
-        return color
+    def _sample_background_color_cached(self, page, text_rect, page_pixels=None):
+        """
+        Cache background color sampling for performance
+        
+        Samples rendered here are keyed by the page's content hash and the
+        quantized rect; every sample is also keyed by a digest of the pixels
+        it looks at, so repeated headers and templates hit across pages and
+        documents. The cache is bounded and shared by the process.
+        
+        Args:
+            page: PyMuPDF page
+            text_rect: Area whose surroundings are sampled
+            page_pixels: Full-page render from _pixmap_array (rendered here if omitted)
+            
+        Returns:
+            RGB tuple in the 0-1 range
+        """
+        try:
+            page_key = None
+            if page_pixels is None:
+                rect_key = quantize_rect(text_rect)
+                text_rect = fitz.Rect(*(value * RECT_QUANTUM for value in rect_key))
+                page_key = ('background', page_content_hash(page), rect_key)
+                color = self.sample_cache.get(page_key)
+                if color is not None:
+                    return color
+            
+            region = self._background_sample_region(page, text_rect, page_pixels)
+            region_key = ('region', region_digest(region))
+            color = self.sample_cache.get(region_key)
+            if color is None:
+                color = self._region_background_color(region)
+                self.sample_cache.put(region_key, color)
+            if page_key is not None:
+                self.sample_cache.put(page_key, color)
+            return color
+            
+        except Exception as e:
+            print(f"    Color sampling failed: {e}")
+            return (0.95, 0.95, 0.95)
+    
+    def _sample_background_color(self, page, text_rect, page_pixels=None):
+        """Sample the background color around a text area (through the sample cache)"""
+        return self._sample_background_color_cached(page, text_rect, page_pixels)
+    
+    def _get_page_geometry(self, page):
+        """Image/filled-rect index for a page, shared by pages with the same content"""
+        try:
+            key = ('geometry', page_content_hash(page))
+        except Exception as e:
+            self.logger.debug(f"Could not hash page content: {e}")
+            return super()._get_page_geometry(page)
+        
+        geometry = self.sample_cache.get(key)
+        if geometry is None:
+            geometry = super()._get_page_geometry(page)
+            self.sample_cache.put(key, geometry)
+        return geometry
     
     def _get_text_metrics(self, text: str, font_name: str, font_size: float) -> Dict[str, float]:
-        """Calculate text metrics for better positioning"""
+        """Calculate text metrics for better positioning (from cached glyph widths)"""
         try:
-            # Create temporary page for measurement
-            temp_doc = fitz.open()
-            temp_page = temp_doc.new_page(width=100, height=100)
-            
-            # Insert text to measure
-            text_rect = fitz.Rect(0, 0, 100, 100)
-            temp_page.insert_textbox(
-                text_rect,
-                text,
-                fontname=font_name,
-                fontsize=font_size
-            )
-            
-            # Get the actual text dimensions
-            text_instances = temp_page.search_for(text)
-            if text_instances:
-                actual_rect = text_instances[0]
-                metrics = {
-                    'width': actual_rect.width,
-                    'height': actual_rect.height,
-                    'ascent': font_size * 0.8,  # Approximate
-                    'descent': font_size * 0.2   # Approximate
-                }
-            else:
-                # Fallback estimation
-                metrics = {
-                    'width': len(text) * font_size * 0.6,
-                    'height': font_size * 1.2,
-                    'ascent': font_size * 0.8,
-                    'descent': font_size * 0.2
-                }
-            
-            temp_doc.close()
-            return metrics
+            metrics = get_font_metrics(font_name)
+            lines = text.splitlines() or ['']
+            return {
+                'width': max(metrics.text_width(line, font_size) for line in lines),
+                'height': metrics.text_height(len(lines), font_size),
+                'ascent': metrics.ascender * font_size,
+                'descent': -metrics.descender * font_size
+            }
             
         except Exception as e:
             self.logger.warning(f"Could not calculate text metrics: {e}")
@@ -122,29 +149,12 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
         except Exception as e:
             self.logger.warning(f"Could not create gradient overlay: {e}")
     
-    def _optimize_text_layout(self, text: str, rect: fitz.Rect, font_size: float) -> List[str]:
+    def _optimize_text_layout(self, text: str, rect: fitz.Rect, font_size: float,
+                              font_name: str = 'helv') -> List[str]:
         """Optimize text layout for better readability"""
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        # Approximate character width
-        char_width = font_size * 0.6
-        max_chars_per_line = int(rect.width / char_width)
-        
-        for word in words:
-            # Check if adding this word exceeds line width
-            current_length = sum(len(w) + 1 for w in current_line)
-            if current_length + len(word) > max_chars_per_line and current_line:
-                lines.append(' '.join(current_line))
-                current_line = [word]
-            else:
-                current_line.append(word)
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return lines
+        # Break lines by measured word widths, as insert_textbox will
+        words = ' '.join(text.split())
+        return get_font_metrics(font_name).wrap(words, rect.width, font_size)
     
     def create_visual_preserved_pdf_with_advanced_features(
         self, 
@@ -163,39 +173,48 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             - preserve_images: Keep original images
             - add_reading_guides: Add visual reading guides
             - use_original_fonts: Try to match original fonts exactly
+            - output_quality: Quality tier for the page backgrounds ('high', 'medium', 'low')
         """
         options = options or {}
+        output_writer = None
         
         try:
-            # Clear caches for new document
-            self._background_cache.clear()
+            # Clear caches for new document (page samples are keyed by content and kept)
             self._font_cache.clear()
             
             profile_config = self.profile_configs.get(profile, self.profile_configs['default'])
             
             original_doc = fitz.open(original_path)
-            output_doc = fitz.open()
+            # Finished pages are flushed to output_path in chunks to bound memory
+            output_writer = StreamingPDFWriter(
+                output_path, self.output_chunk_pages,
+                save_options={'garbage': 4, 'deflate': True, 'pretty': True}
+            )
+            raster_policy = self._raster_policy(options.get('output_quality'))
+            layout = get_document_layout(original_path, original_doc)
             
             for page_idx in range(original_doc.page_count):
                 original_page = original_doc[page_idx]
                 
                 # Extract text blocks with enhanced information
-                text_blocks = self._extract_enhanced_text_blocks(original_page)
+                page_layout = layout.pages[page_idx]
+                text_blocks = self._extract_enhanced_text_blocks(original_page, page_layout)
                 
-                # Create cleaned page
-                cleaned_page = self._create_text_free_page_advanced(original_page, text_blocks)
+                # Create cleaned page at the resolution the page's content needs
+                dpi = raster_policy.page_dpi(original_page, page_layout)
+                cleaned_page = self._create_text_free_page_advanced(original_page, text_blocks, dpi / 72.0)
                 
-                # Convert to pixmap
-                pix = cleaned_page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+                # Render and encode the background
+                background = raster_policy.render(cleaned_page, dpi)
                 
                 # Create output page
-                new_page = output_doc.new_page(
+                new_page = output_writer.new_page(
                     width=original_page.rect.width,
                     height=original_page.rect.height
                 )
                 
                 # Insert background
-                new_page.insert_image(new_page.rect, pixmap=pix)
+                new_page.insert_image(new_page.rect, stream=background)
                 
                 # Apply gradient overlay if requested
                 if options.get('use_gradients') and profile_config.get('tint_color'):
@@ -215,7 +234,8 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
                                 lines = self._optimize_text_layout(
                                     adapted_text, 
                                     fitz.Rect(block['bbox']), 
-                                    block['avg_font_size']
+                                    block['avg_font_size'],
+                                    self._map_font_name(block['dominant_font'])
                                 )
                                 adapted_text = '\n'.join(lines)
                             
@@ -228,28 +248,29 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
                 if options.get('add_reading_guides') and profile_config.get('reading_guide'):
                     self._add_reading_guides(new_page, text_blocks, profile_config)
             
-            # Add metadata
-            output_doc.set_metadata({
+            # Add metadata and flush the remaining pages
+            output_writer.close(metadata={
                 'title': original_doc.metadata.get('title', 'Adapted Document'),
                 'subject': f"Adapted for {profile} profile",
                 'creator': 'PDF Visual Handler Enhanced',
                 'producer': 'PyMuPDF with Visual Preservation'
             })
-            
-            # Save with optimization
-            output_doc.save(output_path, garbage=4, deflate=True, pretty=True)
-            output_doc.close()
             original_doc.close()
+            self._log_raster_summary(raster_policy, output_path)
             
             return True
             
         except Exception as e:
             self.logger.error(f"Error in advanced visual preservation: {str(e)}")
+            if output_writer is not None:
+                output_writer.abort()
             return False
     
-    def _extract_enhanced_text_blocks(self, page) -> List[Dict[str, Any]]:
-        """Extract text blocks with enhanced information"""
-        text_dict = page.get_text("dict")
+    def _extract_enhanced_text_blocks(self, page, page_layout: Optional[PageLayout] = None) -> List[Dict[str, Any]]:
+        """Extract text blocks with enhanced information (from page_layout when given)"""
+        if page_layout is None:
+            page_layout = extract_page_layout(page)
+        text_dict = page_layout.text_dict()
         enhanced_blocks = []
         
         for block in text_dict.get('blocks', []):
@@ -302,19 +323,27 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
         lines = block.get('lines', [])
         return avg_size > 14 and len(lines) <= 2
     
-    def _create_text_free_page_advanced(self, original_page, text_blocks) -> fitz.Page:
+    def _create_text_free_page_advanced(self, original_page, text_blocks, zoom: float = 1.0) -> fitz.Page:
         """Create text-free page with advanced background preservation"""
         new_doc = fitz.open()
         new_page = new_doc.new_page(
             width=original_page.rect.width,
             height=original_page.rect.height
         )
+        # Pages only hold a weak reference to their document; keep it alive with the page
+        new_page._owner_doc = new_doc
         
         # Copy page as image
-        pix = original_page.get_pixmap(matrix=fitz.Matrix(1, 1), alpha=False)
+        pix = original_page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
         new_page.insert_image(new_page.rect, pixmap=pix)
         
         # Advanced text masking with intelligent color matching
+        try:
+            page_hash = page_content_hash(original_page)
+        except Exception as e:
+            self.logger.debug(f"Could not hash page content: {e}")
+            page_hash = None
+        
         for block in text_blocks:
             block_rect = fitz.Rect(block['bbox'])
             
@@ -328,7 +357,7 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             
             colors = []
             for point in sample_points:
-                color = self._sample_color_at_point(original_page, point)
+                color = self._sample_color_at_point(original_page, point, page_hash)
                 if color:
                     colors.append(color)
             
@@ -347,8 +376,15 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
         
         return new_page
     
-    def _sample_color_at_point(self, page, point) -> Optional[Tuple[float, float, float]]:
-        """Sample color at specific point"""
+    def _sample_color_at_point(self, page, point, page_hash: Optional[str] = None) -> Optional[Tuple[float, float, float]]:
+        """
+        Sample color at specific point
+        
+        Args:
+            page: PyMuPDF page
+            point: (x, y) in page coordinates
+            page_hash: page_content_hash(page), if the caller already has it
+        """
         try:
             x, y = point
             
@@ -356,6 +392,14 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             if x < 0 or y < 0 or x > page.rect.width or y > page.rect.height:
                 return None
             
+            # Snap to the cache grid so equal keys always sample the same pixel
+            point_key = quantize_rect((x, y))
+            x, y = (value * RECT_QUANTUM for value in point_key)
+            key = ('point', page_hash or page_content_hash(page), point_key)
+            cached = self.sample_cache.get(key, key)
+            if cached is not key:
+                return cached
+            
             # Create small rect around point
             sample_rect = fitz.Rect(x-1, y-1, x+1, y+1)
             
@@ -363,24 +407,19 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             pix = page.get_pixmap(clip=sample_rect, alpha=False)
             
             # Get color from center pixel
+            color = None
             if pix.width > 0 and pix.height > 0:
                 pixel = pix.pixel(0, 0)
-                return tuple(c/255.0 for c in pixel[:3])
+                color = tuple(c/255.0 for c in pixel[:3])
             
-            return None
+            self.sample_cache.put(key, color)
+            return color
             
         except Exception:
             return None
     
     def _place_text_enhanced(self, page, block, adapted_text, profile_config, options):
         """Enhanced text placement with additional features"""
-        # Get text metrics for better positioning
-        metrics = self._get_text_metrics(
-            adapted_text,
-            self._map_font_name(block['dominant_font']),
-            block['avg_font_size']
-        )
-        
         # Apply special formatting for headings
         if block['is_heading']:
             # Slightly larger font for headings
@@ -410,11 +449,31 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
                 bbox[3] - y_offset
             )
             
+            # Shrink the font (within limits) until the text fits the block
+            metrics = get_font_metrics(font_name)
+            min_size = font_size * MIN_FONT_SCALE
+            fit = metrics.fit(adapted_text, text_rect, font_size, min_size)
+            if fit is not None:
+                fitted_text = adapted_text
+                fitted_size = fit.font_size
+            else:
+                # Too long even at the smallest size: keep the wrapped lines the
+                # block holds at that size and clip the rest, growing the rect
+                # only if not even one line fits
+                lines = metrics.wrap(adapted_text, text_rect.width, min_size)
+                shown = 1
+                while shown < len(lines) and metrics.text_height(shown + 1, min_size) <= text_rect.height:
+                    shown += 1
+                text_rect.y1 = max(text_rect.y1, text_rect.y0 + metrics.text_height(shown, min_size))
+                self.logger.warning(f"Adapted text overflows its block; showing {shown} of {len(lines)} lines")
+                fitted_text = '\n'.join(lines[:shown])
+                fitted_size = min_size
+            
             page.insert_textbox(
                 text_rect,
-                adapted_text,
+                fitted_text,
                 fontname=font_name,
-                fontsize=font_size,
+                fontsize=fitted_size,
                 color=text_color,
                 align=self._detect_text_alignment(block)
             )
@@ -574,16 +633,16 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             Success status
         """
         try:
-            doc = fitz.open(original_path)
+            layout = get_document_layout(original_path)
             
             # Extract all text with structure
             full_text = []
             
-            for page_idx, page in enumerate(doc):
+            for page_idx, page_layout in enumerate(layout.pages):
                 page_text = f"\n--- Page {page_idx + 1} ---\n"
                 
                 # Get structured text
-                text_dict = page.get_text("dict")
+                text_dict = page_layout.text_dict()
                 
                 for block in text_dict.get('blocks', []):
                     if block.get('type') == 0:  # Text block
@@ -626,7 +685,7 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             
             # Add metadata for accessibility
             new_doc.set_metadata({
-                'title': doc.metadata.get('title', 'Screen Reader Optimized Document'),
+                'title': layout.get_metadata().get('title', 'Screen Reader Optimized Document'),
                 'subject': 'Optimized for screen reader accessibility',
                 'creator': 'PDF Visual Handler Enhanced',
                 'keywords': 'accessible, screen reader, optimized'
@@ -635,7 +694,6 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             # Save with text extraction enabled
             new_doc.save(output_path, garbage=4, deflate=True)
             new_doc.close()
-            doc.close()
             
             return True
             
@@ -660,9 +718,11 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             adapted_size = os.path.getsize(adapted_path)
             metrics['file_size_ratio'] = adapted_size / original_size
             
-            # Open both documents
+            # Open both documents; text comes from their cached layouts
             orig_doc = fitz.open(original_path)
             adapt_doc = fitz.open(adapted_path)
+            orig_layout = get_document_layout(original_path, orig_doc)
+            adapt_layout = get_document_layout(adapted_path, adapt_doc)
             
             # Check page count preservation
             if orig_doc.page_count == adapt_doc.page_count:
@@ -679,8 +739,8 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
             
             # Text alignment check
             for i in range(min(3, orig_doc.page_count)):
-                orig_blocks = orig_doc[i].get_text("dict")['blocks']
-                adapt_blocks = adapt_doc[i].get_text("dict")['blocks']
+                orig_blocks = orig_layout.pages[i].text_dict()['blocks']
+                adapt_blocks = adapt_layout.pages[i].text_dict()['blocks'] if i < adapt_layout.page_count else []
                 
                 if len(orig_blocks) > 0:
                     # Check if text blocks are in similar positions
@@ -688,8 +748,8 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
                     metrics['text_alignment'] += alignment_score / min(3, orig_doc.page_count)
             
             # Calculate readability improvement based on font size changes
-            orig_avg_font_size = self._get_average_font_size(orig_doc)
-            adapt_avg_font_size = self._get_average_font_size(adapt_doc)
+            orig_avg_font_size = self._layout_average_font_size(orig_layout)
+            adapt_avg_font_size = self._layout_average_font_size(adapt_layout)
             
             if adapt_avg_font_size > orig_avg_font_size:
                 metrics['readability_improvement'] = min(1.0, (adapt_avg_font_size - orig_avg_font_size) / orig_avg_font_size)
@@ -746,25 +806,13 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
         
         return score / matches if matches > 0 else 0.0
     
-    def _get_average_font_size(self, doc) -> float:
-        """Calculate average font size across document"""
-        total_size = 0
-        count = 0
-        
+    def _layout_average_font_size(self, layout) -> float:
+        """Calculate average font size across a document layout"""
         # Sample first few pages
-        for page_num in range(min(5, doc.page_count)):
-            page = doc[page_num]
-            text_dict = page.get_text("dict")
-            
-            for block in text_dict.get('blocks', []):
-                if block.get('type') == 0:  # Text block
-                    for line in block.get('lines', []):
-                        for span in line.get('spans', []):
-                            if span.get('size'):
-                                total_size += span['size']
-                                count += 1
+        sample = layout.store.slice_pages(0, min(5, layout.page_count))
+        sizes = sample.span_size[sample.span_size != 0]
         
-        return total_size / count if count > 0 else 12.0
+        return float(sizes.mean()) if len(sizes) else 12.0
     
     def batch_process_pdfs_with_progress(self, pdf_files: List[Dict[str, str]], 
                           profile: str,
@@ -839,23 +887,19 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
     def parallel_page_processing(self, pdf_path: str, profile: str, 
                                max_workers: int = 4) -> List[Dict[str, Any]]:
         """Process PDF pages in parallel for better performance"""
-        doc = fitz.open(pdf_path)
-        total_pages = doc.page_count
+        layout = get_document_layout(pdf_path)
         
         # Extract pages data for parallel processing
         pages_data = []
-        for page_num in range(total_pages):
-            page = doc[page_num]
+        for page_num, page_layout in enumerate(layout.pages):
             page_data = {
                 'page_num': page_num,
-                'text_dict': page.get_text("dict"),
-                'rect': page.rect,
-                'rotation': page.rotation
+                'text_dict': page_layout.text_dict(),
+                'rect': fitz.Rect(0, 0, page_layout.width, page_layout.height),
+                'rotation': page_layout.rotation
             }
             pages_data.append(page_data)
         
-        doc.close()
-        
         # Process pages in parallel
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = [
@@ -931,38 +975,41 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
     def process_large_pdf_in_chunks(self, pdf_path: str, output_path: str,
                                   profile: str, chunk_size: int = 10,
                                   options: Optional[Dict[str, Any]] = None) -> bool:
-        """Process large PDFs in chunks to manage memory"""
+        """
+        Process large PDFs in chunks to manage memory
+        
+        The source is reopened for every chunk and finished pages are streamed
+        to output_path, so peak memory follows chunk_size, not page count.
+        """
         try:
-            doc = fitz.open(pdf_path)
-            total_pages = doc.page_count
-            
-            # Create output document
-            output_doc = fitz.open()
-            
-            for start in range(0, total_pages, chunk_size):
-                end = min(start + chunk_size, total_pages)
-                
-                self.logger.info(f"Processing pages {start} to {end} of {total_pages}")
-                
-                # Process chunk
-                chunk_results = self._process_page_range(doc, start, end, profile, options)
-                
-                # Add processed pages to output
-                for result in chunk_results:
-                    if result and result.get('page'):
-                        output_doc.insert_pdf(
-                            result['page'].parent,
-                            from_page=result['page'].number,
-                            to_page=result['page'].number
-                        )
-                
-                # Force garbage collection after each chunk
-                gc.collect()
+            with fitz.open(pdf_path) as doc:
+                total_pages = doc.page_count
             
-            # Save output document
-            output_doc.save(output_path, garbage=4, deflate=True)
-            output_doc.close()
-            doc.close()
+            with StreamingPDFWriter(output_path, chunk_size,
+                                    save_options={'garbage': 4, 'deflate': True}) as output_writer:
+                for start in range(0, total_pages, chunk_size):
+                    end = min(start + chunk_size, total_pages)
+                    
+                    self.logger.info(f"Processing pages {start} to {end} of {total_pages}")
+                    
+                    doc = fitz.open(pdf_path)
+                    try:
+                        # Process chunk
+                        chunk_results = self._process_page_range(doc, start, end, profile, options)
+                        
+                        # Add processed pages to output
+                        for result in chunk_results:
+                            if result and result.get('success'):
+                                output_writer.insert_pdf(
+                                    doc,
+                                    from_page=result['page_num'],
+                                    to_page=result['page_num']
+                                )
+                    finally:
+                        doc.close()
+                    
+                    # Force garbage collection after each chunk
+                    gc.collect()
             
             return True
             
@@ -972,7 +1019,12 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
     
     def _process_page_range(self, doc, start: int, end: int, profile: str,
                           options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """Process a range of pages"""
+        """
+        Process a range of pages
+        
+        Results hold plain data only (no fitz.Page objects), so they do not
+        keep the source document's pages alive after the chunk is done.
+        """
         results = []
         profile_config = self.profile_configs.get(profile, self.profile_configs['default'])
         
@@ -987,7 +1039,6 @@ class PDFVisualHandlerEnhanced(PDFVisualHandler):
                 result = {
                     'page_num': page_num,
                     'text_blocks': text_blocks,
-                    'page': page,
                     'success': True
                 }
                 
@@ -0,0 +1,104 @@
+"""
+PPTX Text Inventory
+
+One-pass extraction of the text in a presentation. Every shape is visited
+once, descending into group shapes, and each text frame with text worth
+adapting becomes an indexed TextElement that records its slide, its path in
+the shape tree, the shape itself and its stripped text (read once). Progress
+counts, batching and write-back all work from this flat list instead of
+walking the python-pptx tree again.
+"""
+from typing import Iterator, List, NamedTuple, Tuple
+
+from pptx.shapes.group import GroupShape
+
+
+# Stripped texts shorter than this (labels, slide numbers) are not adapted
+MIN_TEXT_LENGTH = 6
+
+
+class TextElement(NamedTuple):
+    """One text frame in the inventory"""
+    index: int                    # position in the inventory (deck order)
+    slide_index: int
+    shape_path: Tuple[int, ...]   # shape positions from the slide down through groups
+    shape: object
+    text: str                     # stripped text of the frame when it was collected
+
+    @property
+    def text_frame(self):
+        return self.shape.text_frame
+
+
+class TextInventory:
+    """Text elements of a presentation, in deck order and grouped by slide"""
+
+    def __init__(self, slide_count: int, elements: List[TextElement]):
+        self.slide_count = slide_count
+        self.elements = elements
+        self._by_slide: List[List[TextElement]] = [[] for _ in range(slide_count)]
+        for element in elements:
+            self._by_slide[element.slide_index].append(element)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __iter__(self) -> Iterator[TextElement]:
+        return iter(self.elements)
+
+    def slide_elements(self, slide_index: int) -> List[TextElement]:
+        """Text elements on one slide, in shape order"""
+        return self._by_slide[slide_index]
+
+    @property
+    def slide_counts(self) -> List[int]:
+        """Number of text elements on each slide"""
+        return [len(elements) for elements in self._by_slide]
+
+    @property
+    def texts(self) -> List[str]:
+        """Texts of all elements, in deck order"""
+        return [element.text for element in self.elements]
+
+
+def iter_shapes(shapes, path: Tuple[int, ...] = ()) -> Iterator[Tuple[Tuple[int, ...], object]]:
+    """
+    Walk a shape tree depth-first, descending into group shapes
+
+    Args:
+        shapes: A slide's (or group's) shape collection
+        path: Path of the collection itself
+
+    Yields:
+        (shape_path, shape) for every shape that is not a group
+    """
+    for position, shape in enumerate(shapes):
+        shape_path = path + (position,)
+        if isinstance(shape, GroupShape):
+            yield from iter_shapes(shape.shapes, shape_path)
+        else:
+            yield shape_path, shape
+
+
+def build_text_inventory(presentation, min_length: int = MIN_TEXT_LENGTH) -> TextInventory:
+    """
+    Collect the adaptable text frames of a presentation in one pass
+
+    Args:
+        presentation: python-pptx Presentation
+        min_length: Shortest stripped text to include
+
+    Returns:
+        TextInventory of the presentation
+    """
+    elements = []
+    slide_count = 0
+    for slide_index, slide in enumerate(presentation.slides):
+        slide_count += 1
+        for shape_path, shape in iter_shapes(slide.shapes):
+            if not getattr(shape, 'has_text_frame', False):
+                continue
+            text = shape.text_frame.text.strip()
+            if len(text) >= min_length:
+                elements.append(TextElement(len(elements), slide_index, shape_path, shape, text))
+    return TextInventory(slide_count, elements)
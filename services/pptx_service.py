@@ -5,16 +5,21 @@ Consolidates all PowerPoint processing functionality from app.py
 """
 import os
 from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
 from pptx.enum.shapes import MSO_SHAPE
 from .base_service import BaseService
+from .font_measurement import REFERENCE_SIZE, find_boundary, get_text_measurer
+from .pptx_inventory import build_text_inventory
 import anthropic
 import re
-from PIL import Image, ImageDraw, ImageFont
 import io
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 class PowerPointService(BaseService):
@@ -159,7 +164,7 @@ class PowerPointService(BaseService):
     def calculate_optimal_font_size(self, text: str, max_width_pts: float, max_height_pts: float, 
                                    font_name: str = "Arial", min_size: int = 8, max_size: int = 72) -> int:
         """
-        Calculate optimal font size that fits within given bounds using binary search
+        Calculate optimal font size that fits within given bounds
         
         Args:
             text: Text content to measure
@@ -172,36 +177,35 @@ class PowerPointService(BaseService):
         Returns:
             Optimal font size in points
         """
-        try:
-            # Handle empty or very short text
-            if not text or len(text.strip()) < 2:
-                return min_size
+        return self.calculate_optimal_font_sizes(
+            [(text, max_width_pts, max_height_pts)], font_name, min_size, max_size
+        )[0]
+    
+    def calculate_optimal_font_sizes(self, items: List[Tuple[str, float, float]], font_name: str = "Arial",
+                                     min_size: int = 8, max_size: int = 72) -> List[int]:
+        """
+        Calculate optimal font sizes for several texts at once (e.g. every shape on a slide)
+        
+        Sizes for all items are predicted together from the font's advance widths,
+        then confirmed with exact measurements around the prediction, which gives
+        the same sizes as a binary search over measured sizes in fewer probes.
+        
+        Args:
+            items: (text, max_width_pts, max_height_pts) tuples
+            font_name: Font family name
+            min_size: Minimum font size to consider
+            max_size: Maximum font size to consider
             
-            # Convert points to pixels for PIL (assuming 96 DPI)
-            max_width_px = int(max_width_pts * 96 / 72)
-            max_height_px = int(max_height_pts * 96 / 72)
+        Returns:
+            Optimal font size in points for each item, in order
+        """
+        sizes = [min_size] * len(items)
+        try:
+            measurer = get_text_measurer()
             
             def get_text_dimensions(text: str, font_size: int) -> Tuple[int, int]:
-                """Get text dimensions using PIL"""
+                """Get text dimensions using PIL (fonts and line widths are cached)"""
                 try:
-                    # Try to load the specified font, fallback to default
-                    try:
-                        font = ImageFont.truetype(font_name, font_size)
-                    except (OSError, IOError):
-                        # Fallback to default font if specified font not found
-                        try:
-                            font = ImageFont.load_default()
-                        except:
-                            # Ultimate fallback - estimate based on character count
-                            avg_char_width = font_size * 0.6  # Rough estimate
-                            width = len(text) * avg_char_width
-                            height = font_size * 1.2  # Account for line height
-                            return int(width), int(height)
-                    
-                    # Create temporary image for measurement
-                    dummy_img = Image.new('RGB', (1, 1))
-                    draw = ImageDraw.Draw(dummy_img)
-                    
                     # Handle multi-line text
                     lines = text.split('\n')
                     if len(lines) > 1:
@@ -211,17 +215,24 @@ class PowerPointService(BaseService):
                         
                         for line in lines:
                             if line.strip():  # Skip empty lines
-                                bbox = draw.textbbox((0, 0), line, font=font)
-                                line_width = bbox[2] - bbox[0]
-                                line_height = bbox[3] - bbox[1]
-                                max_line_width = max(max_line_width, line_width)
-                                total_height += line_height
-                        
-                        return max_line_width, total_height
+                                line_size = measurer.text_size(font_name, font_size, line)
+                                if line_size is None:
+                                    break
+                                max_line_width = max(max_line_width, line_size[0])
+                                total_height += line_size[1]
+                        else:
+                            return max_line_width, total_height
                     else:
                         # Single line text
-                        bbox = draw.textbbox((0, 0), text, font=font)
-                        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+                        text_size = measurer.text_size(font_name, font_size, text)
+                        if text_size is not None:
+                            return text_size
+                    
+                    # No font available - estimate based on character count
+                    avg_char_width = font_size * 0.6  # Rough estimate
+                    width = len(text) * avg_char_width
+                    height = font_size * 1.2  # Account for line height
+                    return int(width), int(height)
                         
                 except Exception as e:
                     self.logger.warning(f"Error measuring text dimensions: {e}")
@@ -232,25 +243,50 @@ class PowerPointService(BaseService):
                     total_height = len(lines) * font_size * 1.2
                     return int(max_line_width), int(total_height)
             
-            # Binary search for optimal font size
-            low, high = min_size, max_size
-            best_size = min_size
+            # Empty or very short text keeps the minimum size
+            pending = [i for i, (text, _, _) in enumerate(items) if text and len(text.strip()) >= 2]
+            if not pending:
+                return sizes
             
-            while low <= high:
-                mid = (low + high) // 2
-                width, height = get_text_dimensions(text, mid)
-                
-                if width <= max_width_px and height <= max_height_px:
-                    best_size = mid
-                    low = mid + 1  # Try larger size
+            # Convert points to pixels for PIL (assuming 96 DPI)
+            max_width_px = np.array([int(items[i][1] * 96 / 72) for i in pending], dtype=float)
+            max_height_px = np.array([int(items[i][2] * 96 / 72) for i in pending], dtype=float)
+            
+            # Predict every size in one pass: widths scale linearly with the font size
+            advances = measurer.get_advances(font_name)
+            if advances is not None:
+                line_widths, line_heights = [], []
+                for i in pending:
+                    lines = items[i][0].split('\n')
+                    if len(lines) > 1:
+                        lines = [line for line in lines if line.strip()]
+                    line_widths.append(max([advances.text_width(line) for line in lines], default=0))
+                    line_heights.append(len(lines) * advances.line_height)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    scale = np.minimum(max_width_px / np.array(line_widths), max_height_px / np.array(line_heights))
+                if advances.scalable:
+                    guesses = np.floor(scale * REFERENCE_SIZE)
                 else:
-                    high = mid - 1  # Try smaller size
+                    guesses = np.where(scale >= 1, max_size, min_size)
+                guesses = np.clip(np.nan_to_num(guesses, nan=min_size, posinf=max_size), min_size, max_size)
+            else:
+                guesses = np.full(len(pending), (min_size + max_size) // 2)
             
-            return best_size
+            # Confirm each prediction with exact measurements
+            for i, width_px, height_px, guess in zip(pending, max_width_px, max_height_px, guesses):
+                text = items[i][0]
+                
+                def fits(font_size: int) -> bool:
+                    width, height = get_text_dimensions(text, font_size)
+                    return width <= width_px and height <= height_px
+                
+                sizes[i] = max(find_boundary(fits, int(guess), min_size, max_size), min_size)
+            
+            return sizes
             
         except Exception as e:
             self.logger.error(f"Error calculating optimal font size: {e}")
-            return min_size
+            return [min_size] * len(items)
     
     def apply_text_with_optimal_sizing(self, text_frame, text: str, max_width_pts: float, 
                                      max_height_pts: float, profile: str = 'default') -> tuple[bool, str]:
@@ -367,16 +403,10 @@ class PowerPointService(BaseService):
             # Convert font size to pixels for PIL measurement
             font_size_px = int(font_size * 96 / 72)
             
-            # Create font object
-            try:
-                font = ImageFont.truetype(font_name, font_size_px)
-            except (OSError, IOError):
-                font = ImageFont.load_default()
-            
-            # Measure text
-            dummy_img = Image.new('RGB', (1, 1))
-            draw = ImageDraw.Draw(dummy_img)
-            bbox = draw.textbbox((0, 0), text, font=font)
+            # Measure text (fonts and measurements are cached across calls)
+            bbox = get_text_measurer().text_bbox(font_name, font_size_px, text)
+            if bbox is None:
+                raise OSError(f"No font available to measure with ({font_name})")
             
             # Convert back to points
             width_pts = (bbox[2] - bbox[0]) * 72 / 96
@@ -824,8 +854,8 @@ class PowerPointService(BaseService):
             adapted_texts = []
             if all_texts:
                 try:
-                    from .adaptations_service import AdaptationsService
-                    adaptations_service = AdaptationsService(self.config)
+                    from .service_registry import get_adaptations_service
+                    adaptations_service = get_adaptations_service(self.config)
                     self.logger.info(f"🚀 Batch adapting {len(all_texts)} slide elements for profile '{profile}'")
                     adapted_texts = adaptations_service.process_text_batch(all_texts, profile)
                     self.logger.info(f"✅ Batch adaptation completed: {len(adapted_texts)} elements processed")
@@ -1267,266 +1297,159 @@ Format as JSON with structure:
             if processing_callback:
                 processing_callback("Analyzing presentation structure...", 10)
             
-            # Initialize adaptation service
-            from .adaptations_service import AdaptationsService
-            adaptations_service = AdaptationsService(self.config)
+            # Use the shared adaptation service for this worker process
+            from .service_registry import get_adaptations_service
+            adaptations_service = get_adaptations_service(self.config)
             
             self.logger.info(f"Processing {total_slides} slides with format preservation")
             
-            # Calculate progress ranges for better tracking
+            # Calculate progress ranges: adapted texts move progress from 10 to 75,
+            # finished slides (written back, translated, annotated) from 75 to 95
             adaptation_start = 10
-            adaptation_end = 85
-            translation_start = 85
-            translation_end = 95
+            adaptation_end = 75
+            slides_end = 95
             
-            # Count total text elements across all slides for better progress calculation
-            total_text_elements = 0
-            slide_text_counts = []
+            # Collect every substantial text frame (including those inside groups) in one pass,
+            # before formatting adds any shapes of its own
+            inventory = build_text_inventory(presentation)
+            total_text_elements = max(len(inventory), 1)
+            slide_text_counts = inventory.slide_counts
             
-            for slide in presentation.slides:
-                text_count = 0
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text_frame') and hasattr(shape.text_frame, 'text'):
-                        original_text = shape.text_frame.text.strip()
-                        if original_text and len(original_text) > 5:
-                            text_count += 1
-                total_text_elements += text_count
-                slide_text_counts.append(text_count)
-            
-            processed_elements = 0
+            profile_settings = self.PROFILE_SETTINGS.get(profile, self.PROFILE_SETTINGS['default'])
+            is_translation_only = profile_settings.get('translation_only', False)
+            
+            # Producer: adapt the whole deck on a background thread so slides with one or two
+            # text boxes share batches. Consumer (this thread): format slides while requests are
+            # in flight, then write back, translate and annotate each slide as its texts arrive.
+            # The producer only reads the inventory's texts; python-pptx objects stay on this thread.
+            events = queue.Queue()
+            if is_translation_only:
+                # Skip adaptation phase for translation-only profile
+                self.logger.info("Translation-only mode - skipping adaptation")
+                events.put(('adapted', list(range(len(inventory))), inventory.texts))
+            elif len(inventory):
+                self._start_inventory_adaptation(inventory, adaptations_service, profile, events)
             
             # Apply profile-specific slide formatting before processing
             self._apply_profile_slide_formatting(presentation, profile)
             
             # Apply global background to all existing slides immediately for profiles with background tints
-            profile_settings = self.PROFILE_SETTINGS.get(profile, self.PROFILE_SETTINGS['default'])
             if profile_settings.get('use_background_tint', False) and profile_settings.get('background_color'):
                 self.logger.info(f"🎨 Applying global background to all {total_slides} slides for {profile}")
                 for slide in presentation.slides:
                     self._apply_slide_background(slide, profile_settings['background_color'])
             
-            # Process each slide individually with detailed progress tracking
-            for slide_idx, slide in enumerate(presentation.slides):
-                slide_text_count = slide_text_counts[slide_idx]
-                
-                # Update progress at start of slide
+            slides = list(presentation.slides)
+            
+            # Apply evidence-based visual formatting to every slide BEFORE its text is written back
+            # Skip formatting for translation-only profile
+            if not is_translation_only:
                 if processing_callback:
-                    base_progress = adaptation_start + (processed_elements / total_text_elements) * (adaptation_end - adaptation_start)
-                    processing_callback(f"Processing slide {slide_idx + 1} of {total_slides} ({slide_text_count} text elements)...", base_progress)
-                
-                self.logger.info(f"Processing slide {slide_idx + 1}/{total_slides}")
-                
-                # Apply evidence-based visual formatting to the slide BEFORE processing text
-                # Skip formatting for translation-only profile
-                profile_settings = self.PROFILE_SETTINGS.get(profile, self.PROFILE_SETTINGS['default'])
-                if not profile_settings.get('translation_only', False):
+                    processing_callback(f"Formatting {total_slides} slides while text is adapted...", adaptation_start)
+                for slide in slides:
                     self._apply_evidence_based_formatting(slide, profile)
-                
-                # Extract all text content from this slide
-                slide_texts = []
-                text_shapes = []
-                
-                for shape in slide.shapes:
-                    if hasattr(shape, 'text_frame') and hasattr(shape.text_frame, 'text'):
-                        original_text = shape.text_frame.text.strip()
-                        if original_text and len(original_text) > 5:  # Only adapt substantial text
-                            slide_texts.append(original_text)
-                            text_shapes.append(shape)
-                
-                if slide_texts:
-                    try:
-                        # Check if this is translation-only mode
-                        profile_settings = self.PROFILE_SETTINGS.get(profile, self.PROFILE_SETTINGS['default'])
-                        is_translation_only = profile_settings.get('translation_only', False)
+            
+            for slide_idx, slide_text_count in enumerate(slide_text_counts):
+                if not slide_text_count:
+                    self.logger.info(f"  Slide {slide_idx + 1}: No text content to adapt")
+            
+            # Translations run on their own thread, one slide at a time, and report back through events
+            translator = None
+            if target_language and target_language.strip():
+                from .translations_service import TranslationsService
+                translations_service = TranslationsService(self.config)
+                translator = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pptx-translation')
+            
+            slides_with_text = sum(1 for count in slide_text_counts if count)
+            adapted_by_index = [None] * len(inventory)
+            remaining = list(slide_text_counts)
+            slide_notes = {}
+            adapted_count = 0
+            finished_slides = 0
+            
+            def report(message):
+                if processing_callback:
+                    progress = (adaptation_start
+                                + (adapted_count / total_text_elements) * (adaptation_end - adaptation_start)
+                                + (finished_slides / max(slides_with_text, 1)) * (slides_end - adaptation_end))
+                    processing_callback(message, progress)
+            
+            try:
+                while finished_slides < slides_with_text:
+                    event = events.get()
+                    
+                    if event[0] == 'adapted':
+                        _, indices, texts = event
+                        ready_slides = []
+                        for index, adapted_text in zip(indices, texts):
+                            adapted_by_index[index] = adapted_text
+                            slide_idx = inventory.elements[index].slide_index
+                            remaining[slide_idx] -= 1
+                            if remaining[slide_idx] == 0:
+                                ready_slides.append(slide_idx)
+                        adapted_count += len(indices)
                         
-                        if is_translation_only:
-                            # Skip adaptation phase for translation-only profile
-                            self.logger.info(f"  Slide {slide_idx + 1}: Translation-only mode - skipping adaptation")
-                            adapted_texts = slide_texts.copy()  # Use original texts
-                            
-                            if processing_callback:
-                                adapt_progress = adaptation_start + (processed_elements / total_text_elements) * (adaptation_end - adaptation_start)
-                                processing_callback(f"Preparing {len(slide_texts)} text elements for translation on slide {slide_idx + 1}...", adapt_progress)
-                        else:
-                            # Regular adaptation flow
-                            # Update progress for adaptation start
-                            if processing_callback:
-                                adapt_progress = adaptation_start + (processed_elements / total_text_elements) * (adaptation_end - adaptation_start)
-                                processing_callback(f"Adapting {len(slide_texts)} text elements on slide {slide_idx + 1}...", adapt_progress)
+                        for slide_idx in ready_slides:
+                            slide_elements = inventory.slide_elements(slide_idx)
+                            adapted_texts = [adapted_by_index[element.index] for element in slide_elements]
+                            report(f"Applying adaptations to slide {slide_idx + 1} of {total_slides} "
+                                   f"({len(slide_elements)} text elements)...")
+                            self.logger.info(f"Processing slide {slide_idx + 1}/{total_slides}")
+                            try:
+                                slide_notes[slide_idx] = self._apply_slide_adaptations(
+                                    slide_idx, slide_elements, adapted_texts, profile
+                                )
+                            except Exception as adapt_error:
+                                self.logger.error(f"  Slide {slide_idx + 1}: Adaptation failed: {adapt_error}")
+                                slide_notes[slide_idx] = None
                             
-                            self.logger.info(f"  Slide {slide_idx + 1}: Adapting {len(slide_texts)} text elements")
+                            if translator and slide_notes[slide_idx] is not None:
+                                future = translator.submit(self._translate_texts, translations_service,
+                                                           adapted_texts, target_language)
+                                future.add_done_callback(
+                                    lambda done, slide_idx=slide_idx: events.put(('translated', slide_idx, done))
+                                )
+                                continue
                             
-                            # Try to use batch processing with progress callbacks
-                            try:
-                                # Create a wrapper callback for adaptation progress
-                                def adaptation_progress_callback(current, total, message=""):
-                                    if processing_callback:
-                                        # Calculate sub-progress within the current slide's adaptation phase
-                                        base_progress = adaptation_start + (processed_elements / total_text_elements) * (adaptation_end - adaptation_start)
-                                        sub_progress = (current / total) * 5  # Use 5% of total for detailed adaptation progress
-                                        total_progress = base_progress + sub_progress
-                                        processing_callback(f"Adapting text element {current}/{total} on slide {slide_idx + 1}{': ' + message if message else ''}...", total_progress)
-                                
-                                # Check if the adaptations service supports progress callbacks
-                                if hasattr(adaptations_service, 'process_text_batch_with_progress'):
-                                    adapted_texts = adaptations_service.process_text_batch_with_progress(
-                                        slide_texts, profile, progress_callback=adaptation_progress_callback
-                                    )
-                                else:
-                                    # Fallback to regular batch processing
-                                    adapted_texts = adaptations_service.process_text_batch(slide_texts, profile)
-                                
-                            except Exception as batch_error:
-                                self.logger.warning(f"Batch processing failed for slide {slide_idx + 1}: {batch_error}")
-                                # Fallback to individual processing with progress
-                                adapted_texts = []
-                                for i, text in enumerate(slide_texts):
-                                    if processing_callback:
-                                        element_progress = adaptation_start + ((processed_elements + i) / total_text_elements) * (adaptation_end - adaptation_start)
-                                        processing_callback(f"Adapting element {i+1}/{len(slide_texts)} on slide {slide_idx + 1} (individual fallback)...", element_progress)
-                                    try:
-                                        adapted_text = adaptations_service.adapt_text(text, profile) if hasattr(adaptations_service, 'adapt_text') else text
-                                        adapted_texts.append(adapted_text)
-                                    except Exception as e:
-                                        self.logger.error(f"Individual adaptation failed: {e}")
-                                        adapted_texts.append(text)
-                        
-                        # Update progress after adaptation
-                        processed_elements += len(slide_texts)
-                        if processing_callback:
-                            post_adapt_progress = adaptation_start + (processed_elements / total_text_elements) * (adaptation_end - adaptation_start)
-                            processing_callback(f"Applying adaptations to slide {slide_idx + 1}...", post_adapt_progress)
-                        
-                        # Apply adaptations back to shapes (preserving all formatting)
-                        adaptation_notes = []  # Track adaptations for slide notes
-                        
-                        for i, (shape, adapted_text) in enumerate(zip(text_shapes, adapted_texts)):
-                            if adapted_text and adapted_text.strip():
-                                original_text = slide_texts[i]
-                                
-                                # Check for placeholder or debug text that should not appear in slides
-                                if self._is_placeholder_text(adapted_text):
-                                    self.logger.warning(f"    Shape {i+1}: Placeholder text detected, using original instead")
-                                    # Add placeholder info to notes instead of slide content
-                                    adaptation_notes.append(f"Text element {i+1}: Adaptation returned placeholder text - '{adapted_text[:50]}...'")
-                                    validated_text = original_text  # Use original text
-                                # Check for translation notes that should go in slide notes
-                                elif self._is_translation_note(adapted_text):
-                                    self.logger.info(f"    Shape {i+1}: Translation note detected, adding to slide notes")
-                                    # Add translation note to slide notes
-                                    adaptation_notes.append(f"Translation note: {adapted_text}")
-                                    validated_text = original_text  # Use original text for slide content
-                                else:
-                                    # Validate text length is within ±20% of original
-                                    validated_text = self._validate_text_length(original_text, adapted_text, max_variance=0.20)
-                                
-                                # Apply the validated text (with dyslexia font if applicable)
-                                self._replace_text_preserving_format(shape.text_frame, validated_text, profile)
-                                self.logger.info(f"    Shape {i+1}: Text adapted successfully")
-                                
-                                # Track adaptation for notes
-                                if validated_text != original_text:
-                                    change_summary = self._create_adaptation_summary(original_text, validated_text, profile)
-                                    adaptation_notes.append(f"Text element {i+1}: {change_summary}")
-                                
-                                # Micro-progress updates for applying adaptations
-                                if processing_callback and len(text_shapes) > 3:  # Only for slides with many elements
-                                    micro_progress = post_adapt_progress + (i / len(text_shapes)) * 1  # Small increment
-                                    processing_callback(f"Applied adaptation {i+1}/{len(text_shapes)} on slide {slide_idx + 1}", micro_progress)
-                            else:
-                                self.logger.warning(f"    Shape {i+1}: No adapted text received")
-                        
-                        # Apply translation if requested (before adding notes)
-                        # For translation-only mode, target_language is required
-                        translation_notes = []
-                        if is_translation_only and not target_language:
-                            self.logger.warning("Translation-only mode selected but no target language specified")
-                            translation_notes.append("Warning: Translation-only mode requires a target language")
-                        
-                        if target_language and target_language.strip():
-                            try:
-                                if processing_callback:
-                                    trans_progress = translation_start + (slide_idx / total_slides) * (translation_end - translation_start)
-                                    processing_callback(f"Translating slide {slide_idx + 1} to {target_language}...", trans_progress)
-                                
-                                from .translations_service import TranslationsService
-                                translations_service = TranslationsService(self.config)
-                                
-                                # Translate the adapted texts
-                                translated_texts = []
-                                for i, adapted_text in enumerate(adapted_texts):
-                                    if adapted_text:
-                                        translated_text = translations_service.translate_text(adapted_text, target_language)
-                                        translated_texts.append(translated_text)
-                                        
-                                        # Progress update for translation
-                                        if processing_callback and len(adapted_texts) > 2:
-                                            trans_micro_progress = trans_progress + (i / len(adapted_texts)) * 1
-                                            processing_callback(f"Translated {i+1}/{len(adapted_texts)} elements on slide {slide_idx + 1}", trans_micro_progress)
-                                    else:
-                                        translated_texts.append(adapted_text)
-                                
-                                # Apply translations to shapes with placeholder detection
-                                for i, (shape, translated_text) in enumerate(zip(text_shapes, translated_texts)):
-                                    if translated_text and translated_text.strip():
-                                        # Check for placeholder text in translations
-                                        if self._is_placeholder_text(translated_text):
-                                            self.logger.warning(f"    Translation placeholder detected for shape {i+1}: '{translated_text[:50]}...'")
-                                            # Keep the adapted text instead of placeholder translation
-                                            final_text = adapted_texts[i] if i < len(adapted_texts) else slide_texts[i]
-                                            translation_notes.append(f"Text element {i+1}: Translation returned placeholder - '{translated_text[:50]}...', using adapted text instead")
-                                        # Check for translation notes that should go in slide notes
-                                        elif self._is_translation_note(translated_text):
-                                            self.logger.info(f"    Translation note detected for shape {i+1}, adding to slide notes")
-                                            # Add translation note to slide notes
-                                            translation_notes.append(f"Translation note: {translated_text}")
-                                            # Keep the adapted text for slide content
-                                            final_text = adapted_texts[i] if i < len(adapted_texts) else slide_texts[i]
-                                        else:
-                                            final_text = translated_text
-                                            translation_notes.append(f"Text element {i+1}: Successfully translated to {target_language}")
-                                        
-                                        self._replace_text_preserving_format(shape.text_frame, final_text)
-                                
-                                self.logger.info(f"  Slide {slide_idx + 1}: Translation applied with placeholder filtering")
-                                
-                            except Exception as trans_error:
-                                self.logger.error(f"  Slide {slide_idx + 1}: Translation failed: {trans_error}")
-                                translation_notes.append(f"Translation failed: {str(trans_error)}")
-                        
-                        # Add adaptation notes to slide notes (including translation info)
-                        all_notes = adaptation_notes + translation_notes
-                        if all_notes:
-                            self._add_adaptation_notes_to_slide(slide, all_notes, profile)
-                        else:
-                            # Even if no text changes, add a note that adaptation was attempted
-                            status_info = ""
-                            if not self.config.get('anthropic_api_key'):
-                                status_info = " (No API key - rule-based adaptation only)"
-                            default_notes = [f"Slide processed for {profile} adaptation - {len(slide_texts)} text elements reviewed{status_info}"]
-                            self._add_adaptation_notes_to_slide(slide, default_notes, profile)
+                            if slide_notes[slide_idx] is not None:
+                                if is_translation_only and not target_language:
+                                    self.logger.warning("Translation-only mode selected but no target language specified")
+                                    slide_notes[slide_idx].append("Warning: Translation-only mode requires a target language")
+                                self._add_slide_processing_notes(slides[slide_idx], slide_notes[slide_idx],
+                                                                 profile, len(slide_elements))
+                            finished_slides += 1
+                            report(f"Finished slide {slide_idx + 1} ({finished_slides}/{slides_with_text} slides done)")
+                    
+                    elif event[0] == 'translated':
+                        _, slide_idx, future = event
+                        slide_elements = inventory.slide_elements(slide_idx)
+                        adapted_texts = [adapted_by_index[element.index] for element in slide_elements]
+                        report(f"Applying translation to slide {slide_idx + 1} ({target_language})...")
+                        try:
+                            slide_notes[slide_idx] += self._apply_slide_translations(
+                                slide_idx, slide_elements, adapted_texts, future.result(), target_language
+                            )
+                            self.logger.info(f"  Slide {slide_idx + 1}: Translation applied with placeholder filtering")
+                        except Exception as trans_error:
+                            self.logger.error(f"  Slide {slide_idx + 1}: Translation failed: {trans_error}")
+                            slide_notes[slide_idx].append(f"Translation failed: {str(trans_error)}")
                         
-                    except Exception as adapt_error:
-                        self.logger.error(f"  Slide {slide_idx + 1}: Adaptation failed: {adapt_error}")
-                        # Still count the elements as processed to maintain progress accuracy
-                        processed_elements += len(slide_texts)
-                        continue
-                else:
-                    self.logger.info(f"  Slide {slide_idx + 1}: No text content to adapt")
-                    # Update progress even for slides with no text
-                    if processing_callback:
-                        skip_progress = adaptation_start + (processed_elements / max(total_text_elements, 1)) * (adaptation_end - adaptation_start)
-                        processing_callback(f"Slide {slide_idx + 1} has no text to adapt, skipping...", skip_progress)
+                        self._add_slide_processing_notes(slides[slide_idx], slide_notes[slide_idx],
+                                                         profile, len(slide_elements))
+                        finished_slides += 1
+                        report(f"Finished slide {slide_idx + 1} ({finished_slides}/{slides_with_text} slides done)")
+            finally:
+                if translator:
+                    translator.shutdown(wait=False, cancel_futures=True)
             
             if processing_callback:
                 processing_callback("Saving adapted presentation...", 95)
             
             # Final background application before saving (ensure persistence)
-            final_settings = self.PROFILE_SETTINGS.get(profile, self.PROFILE_SETTINGS['default'])
-            if final_settings.get('use_background_tint', False) and final_settings.get('background_color'):
+            if profile_settings.get('use_background_tint', False) and profile_settings.get('background_color'):
                 self.logger.info(f"🎨 Final background application before saving for {profile}...")
                 for slide in presentation.slides:
-                    self._apply_slide_background(slide, final_settings['background_color'])
+                    self._apply_slide_background(slide, profile_settings['background_color'])
             
             # Save the adapted presentation
             presentation.save(output_path)
@@ -1543,6 +1466,171 @@ Format as JSON with structure:
                 processing_callback(f"Error: {str(e)}", -1)
             return False
     
+    def _start_inventory_adaptation(self, inventory, adaptations_service, profile: str,
+                                    events: queue.Queue) -> threading.Thread:
+        """
+        Adapt every text in a deck's inventory on a background thread
+        
+        Texts from all slides go to the adaptation service together, so batches
+        are packed across slide boundaries instead of one small batch per slide.
+        Packing runs over a few consecutive slides at a time, so the first
+        slides are complete after the first batches and can be written back
+        while later batches are still in flight.
+        Each batch's results are put on events as ('adapted', indices, texts) as
+        soon as they come back, and every inventory index is reported exactly once.
+        
+        Args:
+            inventory: TextInventory of the presentation
+            adaptations_service: Service used to adapt the texts
+            profile: Learning profile for text adaptation
+            events: Queue the results are put on
+            
+        Returns:
+            The started producer thread
+        """
+        texts = inventory.texts
+        reported = [False] * len(texts)
+        
+        def texts_ready(indices, adapted_texts):
+            for index in indices:
+                reported[index] = True
+            events.put(('adapted', list(indices), list(adapted_texts)))
+        
+        def produce():
+            self.logger.info(f"Adapting {len(texts)} text elements across {inventory.slide_count} slides")
+            try:
+                adapted_texts = adaptations_service.process_text_batch(
+                    texts, profile, progress_callback=texts_ready,
+                    groups=[element.slide_index for element in inventory.elements]
+                )
+                missing = [index for index, done in enumerate(reported) if not done]
+                if missing:
+                    texts_ready(missing, [adapted_texts[index] for index in missing])
+            except Exception as batch_error:
+                self.logger.warning(f"Batch processing failed: {batch_error}")
+            
+            # Fallback to individual processing for whatever has not come back, so the
+            # consumer always receives every text
+            for index, text in enumerate(texts):
+                if reported[index]:
+                    continue
+                try:
+                    adapted_text = adaptations_service.adapt_text(text, profile) if hasattr(adaptations_service, 'adapt_text') else text
+                except Exception as e:
+                    self.logger.error(f"Individual adaptation failed: {e}")
+                    adapted_text = text
+                texts_ready([index], [adapted_text])
+        
+        producer = threading.Thread(target=produce, name='pptx-adaptation', daemon=True)
+        producer.start()
+        return producer
+    
+    def _apply_slide_adaptations(self, slide_idx: int, slide_elements, adapted_texts: List[str],
+                                 profile: str) -> List[str]:
+        """
+        Write adapted texts back to a slide's text frames (preserving all formatting)
+        
+        Args:
+            slide_idx: Index of the slide
+            slide_elements: The slide's TextElements
+            adapted_texts: Adapted text for each element
+            profile: Learning profile for text adaptation
+            
+        Returns:
+            Notes describing the adaptations, for the slide notes
+        """
+        adaptation_notes = []  # Track adaptations for slide notes
+        
+        for i, (element, adapted_text) in enumerate(zip(slide_elements, adapted_texts)):
+            if adapted_text and adapted_text.strip():
+                original_text = element.text
+                
+                # Check for placeholder or debug text that should not appear in slides
+                if self._is_placeholder_text(adapted_text):
+                    self.logger.warning(f"    Shape {i+1}: Placeholder text detected, using original instead")
+                    # Add placeholder info to notes instead of slide content
+                    adaptation_notes.append(f"Text element {i+1}: Adaptation returned placeholder text - '{adapted_text[:50]}...'")
+                    validated_text = original_text  # Use original text
+                # Check for translation notes that should go in slide notes
+                elif self._is_translation_note(adapted_text):
+                    self.logger.info(f"    Shape {i+1}: Translation note detected, adding to slide notes")
+                    # Add translation note to slide notes
+                    adaptation_notes.append(f"Translation note: {adapted_text}")
+                    validated_text = original_text  # Use original text for slide content
+                else:
+                    # Validate text length is within ±20% of original
+                    validated_text = self._validate_text_length(original_text, adapted_text, max_variance=0.20)
+                
+                # Apply the validated text (with dyslexia font if applicable)
+                self._replace_text_preserving_format(element.text_frame, validated_text, profile)
+                self.logger.info(f"    Shape {i+1}: Text adapted successfully")
+                
+                # Track adaptation for notes
+                if validated_text != original_text:
+                    change_summary = self._create_adaptation_summary(original_text, validated_text, profile)
+                    adaptation_notes.append(f"Text element {i+1}: {change_summary}")
+            else:
+                self.logger.warning(f"    Shape {i+1}: No adapted text received")
+        
+        return adaptation_notes
+    
+    def _translate_texts(self, translations_service, texts: List[str], target_language: str) -> List[str]:
+        """Translate a slide's adapted texts, leaving empty ones as they are"""
+        return [translations_service.translate_text(text, target_language) if text else text
+                for text in texts]
+    
+    def _apply_slide_translations(self, slide_idx: int, slide_elements, adapted_texts: List[str],
+                                  translated_texts: List[str], target_language: str) -> List[str]:
+        """
+        Write translated texts back to a slide's text frames with placeholder detection
+        
+        Args:
+            slide_idx: Index of the slide
+            slide_elements: The slide's TextElements
+            adapted_texts: Adapted text for each element (kept when a translation is unusable)
+            translated_texts: Translated text for each element
+            target_language: Language translated to
+            
+        Returns:
+            Notes describing the translations, for the slide notes
+        """
+        translation_notes = []
+        
+        for i, (element, translated_text) in enumerate(zip(slide_elements, translated_texts)):
+            if translated_text and translated_text.strip():
+                # Check for placeholder text in translations
+                if self._is_placeholder_text(translated_text):
+                    self.logger.warning(f"    Translation placeholder detected for shape {i+1}: '{translated_text[:50]}...'")
+                    # Keep the adapted text instead of placeholder translation
+                    final_text = adapted_texts[i] if i < len(adapted_texts) else element.text
+                    translation_notes.append(f"Text element {i+1}: Translation returned placeholder - '{translated_text[:50]}...', using adapted text instead")
+                # Check for translation notes that should go in slide notes
+                elif self._is_translation_note(translated_text):
+                    self.logger.info(f"    Translation note detected for shape {i+1}, adding to slide notes")
+                    # Add translation note to slide notes
+                    translation_notes.append(f"Translation note: {translated_text}")
+                    # Keep the adapted text for slide content
+                    final_text = adapted_texts[i] if i < len(adapted_texts) else element.text
+                else:
+                    final_text = translated_text
+                    translation_notes.append(f"Text element {i+1}: Successfully translated to {target_language}")
+                
+                self._replace_text_preserving_format(element.text_frame, final_text)
+        
+        return translation_notes
+    
+    def _add_slide_processing_notes(self, slide, notes: List[str], profile: str, text_count: int):
+        """Add adaptation notes to slide notes (including translation info)"""
+        if notes:
+            self._add_adaptation_notes_to_slide(slide, notes, profile)
+        else:
+            # Even if no text changes, add a note that adaptation was attempted
+            status_info = ""
+            if not self.config.get('anthropic_api_key'):
+                status_info = " (No API key - rule-based adaptation only)"
+            default_notes = [f"Slide processed for {profile} adaptation - {text_count} text elements reviewed{status_info}"]
+            self._add_adaptation_notes_to_slide(slide, default_notes, profile)
+    
     def _replace_text_preserving_format(self, text_frame, new_text: str, profile: str = 'default'):
         """
         Replace text content while preserving ALL original formatting
@@ -2070,54 +2158,46 @@ Format as JSON with structure:
             if width <= max_width_pts and height <= max_height_pts:
                 return text, ""
             
-            # Split into sentences and try to fit as many as possible
+            def fits(test_text: str) -> bool:
+                width, height = self.measure_text_bounds(test_text, font_name, font_size)
+                return width <= max_width_pts and height <= max_height_pts
+            
+            # Split into sentences and fit as many as possible
             sentences = text.split('. ')
-            fitted_sentences = []
             
-            for i, sentence in enumerate(sentences):
-                # Build current text with this sentence
-                test_text = '. '.join(fitted_sentences + [sentence])
-                if not test_text.endswith('.') and i < len(sentences) - 1:
+            def sentence_prefix(count: int) -> str:
+                test_text = '. '.join(sentences[:count])
+                if not test_text.endswith('.') and count < len(sentences):
                     test_text += '.'
-                
-                # Measure if it fits
-                width, height = self.measure_text_bounds(test_text, font_name, font_size)
-                
-                if width <= max_width_pts and height <= max_height_pts:
-                    fitted_sentences.append(sentence)
-                else:
-                    # This sentence doesn't fit, save remaining as overflow
-                    remaining_sentences = sentences[i:]
-                    if remaining_sentences:
-                        overflow_text = '. '.join(remaining_sentences)
-                        if not overflow_text.endswith('.'):
-                            overflow_text += '.'
-                    break
+                return test_text
+            
+            guess = self._estimate_fitting_prefix(sentences, '. ', max_width_pts, max_height_pts,
+                                                  font_size, font_name)
+            fitted_count = find_boundary(lambda count: fits(sentence_prefix(count)), guess, 1, len(sentences))
+            
+            if fitted_count < len(sentences):
+                # The next sentence doesn't fit, save remaining as overflow
+                overflow_text = '. '.join(sentences[fitted_count:])
+                if not overflow_text.endswith('.'):
+                    overflow_text += '.'
             
             # Build final truncated text
-            if fitted_sentences:
-                truncated_text = '. '.join(fitted_sentences)
+            if fitted_count:
+                truncated_text = '. '.join(sentences[:fitted_count])
                 if not truncated_text.endswith('.'):
                     truncated_text += '.'
                 return truncated_text, overflow_text
             
             # If no sentences fit, try word-by-word truncation
             words = text.split()
-            fitted_words = []
+            guess = self._estimate_fitting_prefix(words, ' ', max_width_pts, max_height_pts,
+                                                  font_size, font_name)
+            fitted_count = find_boundary(lambda count: fits(' '.join(words[:count])), guess, 1, len(words))
             
-            for i, word in enumerate(words):
-                test_text = ' '.join(fitted_words + [word])
-                width, height = self.measure_text_bounds(test_text, font_name, font_size)
-                
-                if width <= max_width_pts and height <= max_height_pts:
-                    fitted_words.append(word)
-                else:
-                    remaining_words = words[i:]
-                    if remaining_words:
-                        overflow_text = ' '.join(remaining_words)
-                    break
+            if fitted_count < len(words):
+                overflow_text = ' '.join(words[fitted_count:])
             
-            truncated_text = ' '.join(fitted_words) if fitted_words else text[:50] + "..."
+            truncated_text = ' '.join(words[:fitted_count]) if fitted_count > 0 else text[:50] + "..."
             return truncated_text, overflow_text
             
         except Exception as e:
@@ -2128,6 +2208,52 @@ Format as JSON with structure:
                 return text[:max_chars-3] + "...", text[max_chars:]
             return text, ""
     
+    def _estimate_fitting_prefix(self, pieces: List[str], separator: str, max_width_pts: float,
+                                 max_height_pts: float, font_size: float, font_name: str) -> int:
+        """
+        Predict how many leading pieces, joined by separator, fit within bounds
+        
+        Uses the font's advance widths only (no measuring), so the result is a
+        starting point for find_boundary rather than an answer.
+        
+        Args:
+            pieces: Sentences or words, in order
+            separator: String the pieces are joined with
+            max_width_pts: Maximum width in points
+            max_height_pts: Maximum height in points
+            font_size: Font size in points
+            font_name: Font name
+            
+        Returns:
+            Predicted number of pieces that fit
+        """
+        advances = get_text_measurer().get_advances(font_name)
+        if advances is None or not pieces:
+            return len(pieces) // 2
+        
+        # Widest line and line count of every prefix, at the reference size
+        separator_width = advances.text_width(separator)
+        widths, line_counts = [], []
+        widest = current = 0.0
+        line_count = 1
+        for index, piece in enumerate(pieces):
+            segments = piece.split('\n')
+            if index:
+                current += separator_width
+            current += advances.text_width(segments[0])
+            for segment in segments[1:]:
+                widest = max(widest, current)
+                current = advances.text_width(segment)
+                line_count += 1
+            widths.append(max(widest, current))
+            line_counts.append(line_count)
+        
+        # Same pixel size as measure_text_bounds, then back to points
+        scale = advances.scale(int(font_size * 96 / 72)) * 72 / 96
+        fitting = ((np.array(widths) * scale <= max_width_pts) &
+                   (np.array(line_counts) * advances.line_height * scale <= max_height_pts))
+        return len(pieces) if fitting.all() else int(np.argmin(fitting))
+    
     def _convert_to_bullets(self, text: str) -> str:
         """
         Convert long text into bullet points for better readability
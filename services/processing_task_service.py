@@ -4,27 +4,61 @@ Processing Task Service
 Manages processing task state and metadata with Redis persistence.
 This service handles the lifecycle of file processing tasks across
 different operations (upload, assessment, adaptation, etc.)
+
+It also schedules the background work for those tasks: jobs are submitted
+by name with JSON-serializable parameters, persisted in a priority queue
+through the SessionStoreService, and run by a bounded pool of worker threads
+in whichever process (web or dedicated worker) has the handler registered.
 """
-from typing import Dict, Any, Optional, List
+import os
+import socket
+import threading
+import traceback
+import uuid
+from typing import Dict, Any, Optional, List, Callable, Union
 from datetime import datetime
 from .base_service import BaseService
 from .session_store_service import SessionStoreService
 
 
+JOB_PRIORITIES = {
+    'high': 0,
+    'normal': 5,
+    'low': 9
+}
+
+
 class ProcessingTaskService(BaseService):
     """Service for managing processing task state and metadata"""
     
     def _initialize(self):
         """Initialize processing task service with session store"""
-        # Initialize session store for persistence
-        session_config = {
-            'redis_url': self.config.get('redis_url', 'redis://redis:6379/0'),
-            'session_ttl_hours': self.config.get('task_ttl_hours', 24)
-        }
-        self.session_store = SessionStoreService(session_config)
+        # Initialize session store for persistence (or share the host app's)
+        self.session_store = self.config.get('session_store')
+        if self.session_store is None:
+            session_config = {
+                'redis_url': self.config.get('redis_url', 'redis://redis:6379/0'),
+                'session_ttl_hours': self.config.get('task_ttl_hours', 24)
+            }
+            self.session_store = SessionStoreService(session_config)
         
         # In-memory cache for performance
-        self.task_cache = {}
+        self.task_cache = self.config.get('task_cache', {})
+        
+        # Job scheduling
+        self.job_handlers = {}
+        self.num_job_workers = self.config.get('job_workers', 2)
+        self.max_queued_jobs = self.config.get('max_queued_jobs', 50)
+        # Running jobs renew their lease every job_heartbeat_seconds; the same
+        # loop requeues jobs whose lease has not been renewed for job_lease_seconds
+        self.job_lease_seconds = self.config.get('job_lease_seconds', 300)
+        self.job_heartbeat_seconds = self.config.get('job_heartbeat_seconds', self.job_lease_seconds / 3)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._job_threads = []
+        self._lease_thread = None
+        self._running_jobs = set()
+        self._running_jobs_lock = threading.Lock()
+        self._stop_workers = threading.Event()
     
     def create_task(self, file_id: str, task_data: Dict[str, Any]) -> bool:
         """
@@ -75,13 +109,15 @@ class ProcessingTaskService(BaseService):
         
         return None
     
-    def update_task(self, file_id: str, updates: Dict[str, Any]) -> bool:
+    def update_task(self, file_id: str, updates: Dict[str, Any], defer: bool = False) -> bool:
         """
         Update processing task data
         
         Args:
             file_id: Unique file identifier
             updates: Fields to update
+            defer: Write through the session store's write-behind progress
+                channel (coalesced, rate-limited) instead of immediately
             
         Returns:
             bool: Success status
@@ -100,6 +136,8 @@ class ProcessingTaskService(BaseService):
             self.task_cache[file_id].update(updates)
         
         # Update persistent storage
+        if defer:
+            return self.session_store.queue_file_update(file_id, updates)
         success = self.session_store.update_file_metadata(file_id, updates)
         
         if success:
@@ -172,7 +210,7 @@ class ProcessingTaskService(BaseService):
         if message:
             updates['message'] = message
         
-        return self.update_task(file_id, updates)
+        return self.update_task(file_id, updates, defer=True)
     
     def set_status(self, file_id: str, status: str, message: Optional[str] = None) -> bool:
         """
@@ -252,4 +290,202 @@ class ProcessingTaskService(BaseService):
         if cleaned > 0:
             self.logger.info(f"Cleaned {cleaned} old tasks from cache")
         
-        return cleaned
\ No newline at end of file
+        return cleaned
+    
+    def register_job_handler(self, job_type: str, handler: Callable[..., Any]):
+        """
+        Register the function that runs jobs of a given type
+        
+        Args:
+            job_type: Job type name used in submit_job
+            handler: Callable invoked with the job's params as keyword arguments
+        """
+        self.job_handlers[job_type] = handler
+    
+    def submit_job(self, file_id: str, job_type: str, params: Dict[str, Any],
+                   priority: Union[str, int] = 'normal') -> bool:
+        """
+        Queue a background job for a task, subject to admission control
+        
+        Args:
+            file_id: Task the job belongs to
+            job_type: Registered job type
+            params: JSON-serializable keyword arguments for the handler
+            priority: 'high', 'normal', 'low' or an int (lower runs first)
+            
+        Returns:
+            bool: True if the job was accepted, False if rejected
+        """
+        queued = self.session_store.job_queue_length()
+        if queued >= self.max_queued_jobs:
+            self.logger.warning(f"Rejecting job {job_type} for {file_id}: {queued} jobs already queued")
+            self.update_task(file_id, {
+                'status': 'rejected',
+                'message': 'The server is busy. Please try again in a few minutes.'
+            })
+            return False
+        
+        job_id = str(uuid.uuid4())
+        job = {
+            'job_type': job_type,
+            'file_id': file_id,
+            'params': params,
+            'submitted_at': datetime.now().isoformat()
+        }
+        priority_value = JOB_PRIORITIES.get(priority, priority) if isinstance(priority, str) else priority
+        
+        if not self.session_store.enqueue_job(job_id, job, priority_value):
+            self.logger.error(f"Failed to queue job {job_type} for {file_id}")
+            return False
+        
+        self.update_task(file_id, {
+            'status': 'queued',
+            'job_id': job_id,
+            'message': 'Waiting for an available worker...'
+        })
+        self.logger.info(f"Queued job {job_id} ({job_type}) for {file_id}")
+        return True
+    
+    def run_next_job(self, timeout: float = 1.0) -> bool:
+        """
+        Claim and run one queued job
+        
+        Args:
+            timeout: Seconds to wait for a job
+            
+        Returns:
+            bool: True if a job was run
+        """
+        job = self.session_store.dequeue_job(self.worker_id, timeout)
+        if not job:
+            return False
+        
+        job_id = job['job_id']
+        file_id = job.get('file_id')
+        handler = self.job_handlers.get(job.get('job_type'))
+        with self._running_jobs_lock:
+            self._running_jobs.add(job_id)
+        
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type {job.get('job_type')}")
+            
+            self.logger.info(f"Worker {self.worker_id} running job {job_id} ({job['job_type']})")
+            if file_id:
+                self.update_task(file_id, {'status': 'processing'})
+            handler(**job.get('params', {}))
+            
+        except Exception as e:
+            self.logger.error(f"Job {job_id} failed: {e}")
+            traceback.print_exc()
+            if file_id:
+                self.set_status(file_id, 'error', f'Processing error: {str(e)}')
+        finally:
+            with self._running_jobs_lock:
+                self._running_jobs.discard(job_id)
+            self.session_store.ack_job(job_id)
+        
+        return True
+    
+    def start_job_workers(self, num_workers: Optional[int] = None) -> int:
+        """
+        Start the bounded pool of background job workers
+        
+        Jobs abandoned by a previous process (past their lease) are requeued
+        first, so work survives worker restarts. A lease thread then renews
+        the leases of this process's running jobs and keeps requeuing
+        expired ones, so a crashed worker's jobs do not wait for a restart.
+        
+        Args:
+            num_workers: Pool size (defaults to the job_workers config)
+            
+        Returns:
+            Number of worker threads running
+        """
+        if num_workers is None:
+            num_workers = self.num_job_workers
+        
+        self.session_store.requeue_stale_jobs(self.job_lease_seconds)
+        self._stop_workers.clear()
+        
+        self._job_threads = [thread for thread in self._job_threads if thread.is_alive()]
+        while len(self._job_threads) < num_workers:
+            thread = threading.Thread(
+                target=self._job_worker_loop,
+                name=f"job-worker-{len(self._job_threads)}",
+                daemon=True
+            )
+            thread.start()
+            self._job_threads.append(thread)
+        
+        if num_workers > 0 and (self._lease_thread is None or not self._lease_thread.is_alive()):
+            self._lease_thread = threading.Thread(target=self._lease_loop, name="job-leases", daemon=True)
+            self._lease_thread.start()
+        
+        self.logger.info(f"Started {len(self._job_threads)} job workers ({self.worker_id})")
+        return len(self._job_threads)
+    
+    def stop_job_workers(self, timeout: float = 5.0):
+        """
+        Ask job workers to exit after their current job
+        
+        Args:
+            timeout: Seconds to wait for each worker thread
+        """
+        self._stop_workers.set()
+        for thread in self._job_threads:
+            thread.join(timeout)
+        self._job_threads = [thread for thread in self._job_threads if thread.is_alive()]
+        if self._lease_thread is not None:
+            self._lease_thread.join(timeout)
+            self._lease_thread = None
+        self.session_store.flush_pending_updates()
+    
+    def renew_job_leases(self) -> int:
+        """
+        Renew the leases of the jobs this process is running
+        
+        Returns:
+            Number of leases renewed
+        """
+        with self._running_jobs_lock:
+            job_ids = list(self._running_jobs)
+        renewed = 0
+        for job_id in job_ids:
+            if self.session_store.renew_job_lease(job_id, self.worker_id):
+                renewed += 1
+            else:
+                self.logger.warning(f"Lost the lease on job {job_id}; another worker may run it again")
+        return renewed
+    
+    def get_job_stats(self) -> Dict[str, Any]:
+        """
+        Get job scheduler statistics
+        
+        Returns:
+            Queue length, worker count and admission limit
+        """
+        return {
+            'queued_jobs': self.session_store.job_queue_length(),
+            'max_queued_jobs': self.max_queued_jobs,
+            'workers': len([thread for thread in self._job_threads if thread.is_alive()]),
+            'worker_id': self.worker_id,
+            'job_types': sorted(self.job_handlers.keys())
+        }
+    
+    def _job_worker_loop(self):
+        """Worker thread body: run jobs until asked to stop"""
+        while not self._stop_workers.is_set():
+            try:
+                self.run_next_job(timeout=1.0)
+            except Exception as e:
+                self.logger.error(f"Job worker error: {e}")
+    
+    def _lease_loop(self):
+        """Lease thread body: heartbeat running jobs and recover expired ones"""
+        while not self._stop_workers.wait(self.job_heartbeat_seconds):
+            try:
+                self.renew_job_leases()
+                self.session_store.requeue_stale_jobs(self.job_lease_seconds)
+            except Exception as e:
+                self.logger.error(f"Job lease error: {e}")
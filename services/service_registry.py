@@ -0,0 +1,60 @@
+"""
+Service Registry
+
+Process-wide registry for services that are expensive to construct and safe
+to share between requests. Pipelines ask the registry for an instance instead
+of building their own, so warm caches and loaded resources (API clients, the
+scientific dictionary) survive across documents within a worker process.
+"""
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from .adaptations_service import AdaptationsService
+
+
+_lock = threading.Lock()
+_owner_pid = os.getpid()
+_adaptations_services: Dict[Tuple[Optional[str], Optional[str]], AdaptationsService] = {}
+
+
+def _check_process():
+    """Drop inherited instances after a fork (caller holds the lock)"""
+    global _owner_pid
+    pid = os.getpid()
+    if pid != _owner_pid:
+        # Clients and locks copied from the parent process are not safe to reuse
+        _adaptations_services.clear()
+        _owner_pid = pid
+
+
+def get_adaptations_service(config: Optional[Dict[str, Any]] = None) -> AdaptationsService:
+    """
+    Get the shared AdaptationsService for this worker process
+
+    Instances are keyed by API key and model so that callers with different
+    credentials never share a client. The first caller's config is used to
+    build the instance.
+
+    Args:
+        config: Service configuration (as passed to AdaptationsService)
+
+    Returns:
+        Shared AdaptationsService instance
+    """
+    config = config or {}
+    key = (config.get('anthropic_api_key'), config.get('adaptation_model'))
+
+    with _lock:
+        _check_process()
+        service = _adaptations_services.get(key)
+        if service is None:
+            service = AdaptationsService(config)
+            _adaptations_services[key] = service
+        return service
+
+
+def reset_registry():
+    """Discard all shared instances (mainly for tests)"""
+    with _lock:
+        _adaptations_services.clear()
@@ -7,6 +7,9 @@ which handles actual file storage.
 """
 import os
 import json
+import time
+import heapq
+import threading
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from .base_service import BaseService
@@ -20,6 +23,61 @@ except ImportError:
     redis = None
 
 
+# Pop the best-scored job and record its lease in one step, so a job is never
+# off the queue without also being in the running set.
+# KEYS: queue, data, running; ARGV: lease JSON. Returns {job_id, job JSON},
+# {job_id} when the job's data is gone, or nil when the queue is empty.
+CLAIM_JOB_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return nil
+end
+local job_id = popped[1]
+local value = redis.call('HGET', KEYS[2], job_id)
+if not value then
+    return {job_id}
+end
+redis.call('HSET', KEYS[3], job_id, ARGV[1])
+return {job_id, value}
+"""
+
+# Extend a running job's lease if the worker still holds it.
+# KEYS: running; ARGV: job_id, worker_id, now. Returns 1 if renewed.
+RENEW_LEASE_SCRIPT = """
+local value = redis.call('HGET', KEYS[1], ARGV[1])
+if not value then
+    return 0
+end
+local lease = cjson.decode(value)
+if lease['worker_id'] ~= ARGV[2] then
+    return 0
+end
+lease['heartbeat_at'] = tonumber(ARGV[3])
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(lease))
+return 1
+"""
+
+# Move running jobs not renewed since the cutoff back to the queue, checking
+# each lease and requeuing it in the same step so a renewal cannot be lost.
+# KEYS: running, data, queue; ARGV: cutoff, score. Returns the number requeued.
+REQUEUE_STALE_SCRIPT = """
+local requeued = 0
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    local lease = cjson.decode(entries[i + 1])
+    local seen = lease['heartbeat_at'] or lease['started_at'] or 0
+    if seen < tonumber(ARGV[1]) then
+        redis.call('HDEL', KEYS[1], entries[i])
+        if redis.call('HEXISTS', KEYS[2], entries[i]) == 1 then
+            redis.call('ZADD', KEYS[3], ARGV[2], entries[i])
+            requeued = requeued + 1
+        end
+    end
+end
+return requeued
+"""
+
+
 class SessionStoreService(BaseService):
     """Service for managing persistent session and file metadata storage"""
     
@@ -30,6 +88,34 @@ class SessionStoreService(BaseService):
         self.ttl_hours = self.config.get('session_ttl_hours', 24)
         self.prefix = "matcha:sessions:"
         
+        # Job queue keys live outside the session prefix so list_all_files ignores them
+        self.job_prefix = "matcha:jobs:"
+        self.job_queue_key = f"{self.job_prefix}queue"
+        self.job_data_key = f"{self.job_prefix}data"
+        self.job_running_key = f"{self.job_prefix}running"
+        # Redis has no blocking pop inside scripts, so claims poll at this interval
+        self.job_poll_interval = self.config.get('job_poll_interval', 0.2)
+        
+        # In-memory job queue used when Redis is unavailable
+        self.memory_job_heap = []
+        self.memory_jobs = {}
+        self.memory_running_jobs = {}
+        self.memory_job_condition = threading.Condition()
+        
+        # Write-behind progress channel: latest pending fields per file, flushed
+        # at most progress_flush_rate times per second per file
+        self.progress_flush_interval = 1.0 / max(0.1, self.config.get('progress_flush_rate', 2))
+        self._pending_updates = {}
+        self._last_flush = {}
+        self._written_status = {}
+        self._pending_lock = threading.Lock()
+        # Per-file locks held from taking pending fields until they are written,
+        # so a flush of older progress cannot land after a newer status write
+        self._write_locks = {}
+        self._flush_wakeup = threading.Event()
+        self._flusher_thread = None
+        self._flusher_pid = None
+        
         if not REDIS_AVAILABLE:
             self.logger.warning("Redis package not installed. Using in-memory fallback.")
             self.redis_available = False
@@ -41,6 +127,9 @@ class SessionStoreService(BaseService):
             self.redis_available = True
             # Test connection
             self.redis_client.ping()
+            self._claim_job_script = self.redis_client.register_script(CLAIM_JOB_SCRIPT)
+            self._renew_lease_script = self.redis_client.register_script(RENEW_LEASE_SCRIPT)
+            self._requeue_stale_script = self.redis_client.register_script(REQUEUE_STALE_SCRIPT)
             self.logger.info(f"Successfully connected to Redis at {redis_url}")
         except Exception as e:
             self.logger.warning(f"Redis not available: {e}. Using in-memory fallback.")
@@ -63,11 +152,18 @@ class SessionStoreService(BaseService):
             if 'timestamp' not in metadata:
                 metadata['timestamp'] = datetime.now().isoformat()
             
+            # A full store supersedes any progress still waiting to be written
+            with self._pending_lock:
+                self._pending_updates.pop(file_id, None)
+                self._written_status[file_id] = metadata.get('status')
+            
             if self.redis_available:
                 key = f"{self.prefix}{file_id}"
-                value = json.dumps(metadata)
-                ttl = timedelta(hours=self.ttl_hours)
-                self.redis_client.setex(key, ttl, value)
+                pipe = self.redis_client.pipeline()
+                pipe.delete(key)
+                pipe.hset(key, mapping=self._encode_fields(metadata))
+                pipe.expire(key, timedelta(hours=self.ttl_hours))
+                pipe.execute()
             else:
                 # Fallback to in-memory storage
                 self.memory_store[file_id] = metadata
@@ -91,15 +187,20 @@ class SessionStoreService(BaseService):
         """
         try:
             if self.redis_available:
-                key = f"{self.prefix}{file_id}"
-                value = self.redis_client.get(key)
-                if value:
-                    return json.loads(value)
+                metadata = self._read_redis_metadata(file_id)
             else:
                 # Fallback to in-memory storage
-                return self.memory_store.get(file_id)
+                metadata = self.memory_store.get(file_id)
             
-            return None
+            if metadata is None:
+                return None
+            
+            # Overlay progress that has not been flushed yet
+            with self._pending_lock:
+                pending = self._pending_updates.get(file_id)
+                if pending:
+                    metadata = dict(metadata, **pending)
+            return metadata
             
         except Exception as e:
             self.logger.error(f"Error retrieving file metadata: {e}")
@@ -117,11 +218,16 @@ class SessionStoreService(BaseService):
             bool: Success status
         """
         try:
-            metadata = self.get_file_metadata(file_id)
-            if metadata:
-                metadata.update(updates)
-                metadata['last_updated'] = datetime.now().isoformat()
-                return self.store_file_metadata(file_id, metadata)
+            with self._write_lock(file_id):
+                with self._pending_lock:
+                    pending = self._pending_updates.pop(file_id, {})
+                    if 'status' in updates:
+                        self._written_status[file_id] = updates['status']
+                pending.update(updates)
+                written = self._write_updates(file_id, pending)
+            
+            if written:
+                return True
             
             self.logger.warning(f"No metadata found for file {file_id}")
             return False
@@ -130,6 +236,158 @@ class SessionStoreService(BaseService):
             self.logger.error(f"Error updating file metadata: {e}")
             return False
     
+    def queue_file_update(self, file_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Update file metadata through the write-behind progress channel
+        
+        Updates are merged in memory and written at most progress_flush_rate
+        times per second per file; readers in this process see them at once
+        through get_file_metadata. Status changes are written immediately;
+        repeating the current status (e.g. 'processing' on every tick) is not
+        a change.
+        
+        Args:
+            file_id: Unique file identifier
+            updates: Dictionary of fields to update
+            
+        Returns:
+            bool: Success status (queued updates count as successful)
+        """
+        with self._pending_lock:
+            status_changed = 'status' in updates and updates['status'] != self._written_status.get(file_id)
+        if status_changed:
+            return self.update_file_metadata(file_id, updates)
+        
+        with self._pending_lock:
+            self._pending_updates.setdefault(file_id, {}).update(updates)
+            due = time.time() - self._last_flush.get(file_id, 0) >= self.progress_flush_interval
+        
+        if due:
+            self.flush_pending_updates(file_id)
+            return True
+        
+        self._ensure_flusher()
+        self._flush_wakeup.set()
+        return True
+    
+    def flush_pending_updates(self, file_id: Optional[str] = None) -> int:
+        """
+        Write queued progress updates now
+        
+        Args:
+            file_id: Only flush this file (default: all files)
+            
+        Returns:
+            Number of files flushed
+        """
+        with self._pending_lock:
+            file_ids = list(self._pending_updates) if file_id is None else [file_id]
+        
+        flushed = 0
+        for pending_id in file_ids:
+            with self._write_lock(pending_id):
+                with self._pending_lock:
+                    pending = self._pending_updates.pop(pending_id, None)
+                    if not pending:
+                        continue
+                    self._last_flush[pending_id] = time.time()
+                try:
+                    self._write_updates(pending_id, pending)
+                    flushed += 1
+                except Exception as e:
+                    self.logger.error(f"Error flushing progress for {pending_id}: {e}")
+        return flushed
+    
+    def _write_lock(self, file_id: str) -> threading.Lock:
+        """Lock serialising metadata writes for one file"""
+        with self._pending_lock:
+            lock = self._write_locks.get(file_id)
+            if lock is None:
+                lock = self._write_locks[file_id] = threading.Lock()
+            return lock
+    
+    def _write_updates(self, file_id: str, updates: Dict[str, Any]) -> bool:
+        """Write fields onto existing metadata in one round trip"""
+        updates = dict(updates)
+        updates['last_updated'] = datetime.now().isoformat()
+        
+        if not self.redis_available:
+            metadata = self.memory_store.get(file_id)
+            if metadata is None:
+                return False
+            metadata.update(updates)
+            return True
+        
+        key = f"{self.prefix}{file_id}"
+        pipe = self.redis_client.pipeline()
+        pipe.exists(key)
+        pipe.hset(key, mapping=self._encode_fields(updates))
+        pipe.expire(key, timedelta(hours=self.ttl_hours))
+        try:
+            existed = pipe.execute()[0]
+        except redis.ResponseError:
+            # Metadata written as a single JSON document by an older version
+            metadata = self._read_redis_metadata(file_id) or {}
+            metadata.update(updates)
+            return self.store_file_metadata(file_id, metadata)
+        
+        if not existed:
+            # HSET created a partial record for an unknown file; drop it
+            self.redis_client.delete(key)
+            return False
+        return True
+    
+    def _read_redis_metadata(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Read a metadata hash (or a legacy JSON document) from Redis"""
+        key = f"{self.prefix}{file_id}"
+        try:
+            fields = self.redis_client.hgetall(key)
+        except redis.ResponseError:
+            value = self.redis_client.get(key)
+            return json.loads(value) if value else None
+        if not fields:
+            return None
+        return {field: json.loads(value) for field, value in fields.items()}
+    
+    @staticmethod
+    def _encode_fields(values: Dict[str, Any]) -> Dict[str, str]:
+        """JSON-encode each field for storage in a Redis hash"""
+        return {field: json.dumps(value) for field, value in values.items()}
+    
+    def _ensure_flusher(self):
+        """Start the background flusher (again after a fork)"""
+        pid = os.getpid()
+        if self._flusher_pid == pid and self._flusher_thread and self._flusher_thread.is_alive():
+            return
+        with self._pending_lock:
+            if self._flusher_pid == pid and self._flusher_thread and self._flusher_thread.is_alive():
+                return
+            self._flusher_pid = pid
+            self._flusher_thread = threading.Thread(
+                target=self._flush_loop, name="progress-flusher", daemon=True
+            )
+            self._flusher_thread.start()
+    
+    def _flush_loop(self):
+        """Flusher thread body: write each file's pending fields when due"""
+        while True:
+            self._flush_wakeup.wait()
+            self._flush_wakeup.clear()
+            while True:
+                now = time.time()
+                with self._pending_lock:
+                    if not self._pending_updates:
+                        break
+                    due_at = {
+                        file_id: self._last_flush.get(file_id, 0) + self.progress_flush_interval
+                        for file_id in self._pending_updates
+                    }
+                due = [file_id for file_id, when in due_at.items() if when <= now]
+                for file_id in due:
+                    self.flush_pending_updates(file_id)
+                if not due:
+                    time.sleep(max(0.0, min(due_at.values()) - now))
+    
     def file_exists(self, file_id: str) -> bool:
         """
         Check if file metadata exists
@@ -162,6 +420,12 @@ class SessionStoreService(BaseService):
             bool: Success status
         """
         try:
+            with self._pending_lock:
+                self._pending_updates.pop(file_id, None)
+                self._last_flush.pop(file_id, None)
+                self._written_status.pop(file_id, None)
+                self._write_locks.pop(file_id, None)
+            
             if self.redis_available:
                 key = f"{self.prefix}{file_id}"
                 result = self.redis_client.delete(key)
@@ -254,6 +518,208 @@ class SessionStoreService(BaseService):
             
         return cleaned
     
+    def enqueue_job(self, job_id: str, job: Dict[str, Any], priority: int = 5) -> bool:
+        """
+        Add a job to the persistent priority queue
+        
+        Args:
+            job_id: Unique job identifier
+            job: JSON-serializable job description
+            priority: Lower values are dequeued first; FIFO within a priority
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            # Priority dominates; enqueue time breaks ties (fits below 1e10)
+            score = priority * 1e10 + time.time()
+            if self.redis_available:
+                pipe = self.redis_client.pipeline()
+                pipe.hset(self.job_data_key, job_id, json.dumps(job))
+                pipe.zadd(self.job_queue_key, {job_id: score})
+                pipe.execute()
+            else:
+                with self.memory_job_condition:
+                    self.memory_jobs[job_id] = job
+                    heapq.heappush(self.memory_job_heap, (score, job_id))
+                    self.memory_job_condition.notify()
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error enqueuing job {job_id}: {e}")
+            return False
+    
+    def dequeue_job(self, worker_id: str, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Claim the highest-priority queued job, waiting up to timeout seconds
+        
+        Popping the job and adding it to the running set is one atomic step
+        (a Lua script on Redis), so a job is always either queued or running.
+        It stays in the running set until ack_job is called, so it can be
+        recovered with requeue_stale_jobs if the worker dies.
+        
+        Args:
+            worker_id: Identifier of the claiming worker
+            timeout: Seconds to wait for a job
+            
+        Returns:
+            Job description (with 'job_id') or None if the queue stayed empty
+        """
+        try:
+            if self.redis_available:
+                deadline = time.monotonic() + timeout
+                while True:
+                    now = time.time()
+                    claimed = self._claim_job_script(
+                        keys=[self.job_queue_key, self.job_data_key, self.job_running_key],
+                        args=[json.dumps({'worker_id': worker_id, 'started_at': now, 'heartbeat_at': now})]
+                    )
+                    if claimed:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    time.sleep(min(self.job_poll_interval, remaining))
+                if len(claimed) < 2:
+                    return None
+                job_id, value = claimed
+                job = json.loads(value)
+            else:
+                with self.memory_job_condition:
+                    if not self.memory_job_heap:
+                        self.memory_job_condition.wait(timeout)
+                    if not self.memory_job_heap:
+                        return None
+                    _, job_id = heapq.heappop(self.memory_job_heap)
+                    job = self.memory_jobs.get(job_id)
+                    if job is None:
+                        return None
+                    now = time.time()
+                    self.memory_running_jobs[job_id] = {
+                        'worker_id': worker_id,
+                        'started_at': now,
+                        'heartbeat_at': now
+                    }
+            
+            job['job_id'] = job_id
+            return job
+            
+        except Exception as e:
+            self.logger.error(f"Error dequeuing job: {e}")
+            return None
+    
+    def ack_job(self, job_id: str) -> bool:
+        """
+        Remove a finished job from the running set and job data
+        
+        Args:
+            job_id: Unique job identifier
+            
+        Returns:
+            bool: Success status
+        """
+        try:
+            if self.redis_available:
+                pipe = self.redis_client.pipeline()
+                pipe.hdel(self.job_running_key, job_id)
+                pipe.hdel(self.job_data_key, job_id)
+                pipe.execute()
+            else:
+                with self.memory_job_condition:
+                    self.memory_running_jobs.pop(job_id, None)
+                    self.memory_jobs.pop(job_id, None)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error acknowledging job {job_id}: {e}")
+            return False
+    
+    def renew_job_lease(self, job_id: str, worker_id: str) -> bool:
+        """
+        Record that a running job is still being worked on
+        
+        Args:
+            job_id: Unique job identifier
+            worker_id: Worker that claimed the job
+            
+        Returns:
+            bool: False if the job is no longer leased to worker_id
+        """
+        try:
+            now = time.time()
+            if self.redis_available:
+                return bool(self._renew_lease_script(
+                    keys=[self.job_running_key], args=[job_id, worker_id, repr(now)]
+                ))
+            with self.memory_job_condition:
+                info = self.memory_running_jobs.get(job_id)
+                if info is None or info['worker_id'] != worker_id:
+                    return False
+                info['heartbeat_at'] = now
+                return True
+                
+        except Exception as e:
+            self.logger.error(f"Error renewing lease for job {job_id}: {e}")
+            return False
+    
+    def requeue_stale_jobs(self, lease_seconds: float, priority: int = 0) -> int:
+        """
+        Put running jobs whose lease has expired back on the queue
+        
+        A lease expires when the job has not been renewed (renew_job_lease)
+        for lease_seconds.
+        
+        Args:
+            lease_seconds: Time without renewal after which a running job is considered abandoned
+            priority: Priority for recovered jobs (default: front of the queue)
+            
+        Returns:
+            Number of jobs requeued
+        """
+        requeued = 0
+        cutoff = time.time() - lease_seconds
+        try:
+            if self.redis_available:
+                requeued = self._requeue_stale_script(
+                    keys=[self.job_running_key, self.job_data_key, self.job_queue_key],
+                    args=[repr(cutoff), repr(priority * 1e10 + time.time())]
+                )
+            else:
+                with self.memory_job_condition:
+                    for job_id, info in list(self.memory_running_jobs.items()):
+                        if info.get('heartbeat_at', info['started_at']) < cutoff:
+                            del self.memory_running_jobs[job_id]
+                            if job_id in self.memory_jobs:
+                                heapq.heappush(self.memory_job_heap, (priority * 1e10 + time.time(), job_id))
+                                requeued += 1
+                    if requeued:
+                        self.memory_job_condition.notify_all()
+            
+            if requeued:
+                self.logger.info(f"Requeued {requeued} stale jobs")
+                
+        except Exception as e:
+            self.logger.error(f"Error requeuing stale jobs: {e}")
+            
+        return requeued
+    
+    def job_queue_length(self) -> int:
+        """
+        Get the number of jobs waiting in the queue
+        
+        Returns:
+            Number of queued (not running) jobs
+        """
+        try:
+            if self.redis_available:
+                return self.redis_client.zcard(self.job_queue_key)
+            with self.memory_job_condition:
+                return len(self.memory_job_heap)
+                
+        except Exception as e:
+            self.logger.error(f"Error reading job queue length: {e}")
+            return 0
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Check the health of the session store
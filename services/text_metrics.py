@@ -0,0 +1,242 @@
+"""
+Text Metrics
+
+Font metrics for placing text on PDF pages without trial insertions. Glyph
+advance widths of each font are cached once per process, and line breaking
+follows the same rules as fitz.Page.insert_textbox, so whether (and at what
+size) text fits a rectangle is a pure calculation: no temporary documents,
+no throwaway insert_textbox calls and no font resources added to pages by
+attempts that overflow.
+"""
+import functools
+from typing import Dict, List, Optional, Tuple, NamedTuple
+
+import fitz  # PyMuPDF
+
+
+# PyMuPDF treats differences below this as zero when fitting a textbox
+EPSILON = 1e-5
+
+# Built-in CJK fonts; insert_textbox gives every character one em of width
+_CJK_FONTS = {'china-s', 'china-ss', 'china-t', 'china-ts', 'japan', 'japan-s', 'korea', 'korea-s'}
+
+# Font sizes are fitted to this precision (points)
+FIT_PRECISION = 0.05
+
+# Smallest size adapted text is shrunk to, relative to the original font size
+MIN_FONT_SCALE = 0.8
+
+
+class TextFit(NamedTuple):
+    """Result of fitting text into a rectangle"""
+    font_size: float
+    lines: Tuple[str, ...]
+    remainder: float  # unused height, as insert_textbox returns it
+
+
+class FontMetrics:
+    """
+    Advance widths and vertical metrics of one font
+
+    Widths are kept at font size 1 and scaled, so one table serves every size.
+    """
+
+    def __init__(self, fontname: str = 'helv'):
+        """
+        Load a font's metrics
+
+        Args:
+            fontname: Base-14 or built-in font name as passed to insert_textbox
+        """
+        self.fontname = fontname.lstrip('/')
+        key = self.fontname.lower()
+        self.font = fitz.Font(self.fontname)
+        self.ascender = self.font.ascender
+        self.descender = self.font.descender
+        self.uniform = key in _CJK_FONTS
+        # Base-14 fonts are simple fonts: codes above 255 are written as '?'
+        self.simple = key in fitz.Base14_fontdict
+        self._advances: Dict[str, float] = {}
+        self.space_width = self.char_width(' ')
+
+    def char_width(self, char: str) -> float:
+        """Advance width of one character at font size 1"""
+        width = self._advances.get(char)
+        if width is None:
+            code = ord(char)
+            if self.simple and code > 255:
+                code = ord('?')
+            width = self._advances[char] = self.font.glyph_advance(code)
+        return width
+
+    def line_height_factor(self, lineheight: Optional[float] = None) -> float:
+        """Line spacing in multiples of the font size (insert_textbox's rule)"""
+        if lineheight:
+            return lineheight
+        if self.ascender - self.descender <= 1:
+            return 1.2
+        return self.ascender - self.descender
+
+    def text_width(self, text: str, fontsize: float) -> float:
+        """
+        Width of a single line of text
+
+        Args:
+            text: Text without line breaks
+            fontsize: Font size in points
+
+        Returns:
+            Width in points
+        """
+        if self.uniform:
+            return len(text) * fontsize
+        return sum([self.char_width(c) for c in text]) * fontsize
+
+    def wrap(self, text: str, width: float, fontsize: float, expandtabs: int = 1) -> List[str]:
+        """
+        Break text into lines the way insert_textbox does
+
+        Words are placed greedily; words longer than a line are split between
+        characters.
+
+        Args:
+            text: Text to wrap (may contain line breaks)
+            width: Available line width in points
+            fontsize: Font size in points
+            expandtabs: Tab size, as for insert_textbox
+
+        Returns:
+            Lines of text
+        """
+        pixlen = functools.partial(self.text_width, fontsize=fontsize)
+        blen = fontsize if self.uniform else self.space_width * fontsize
+
+        lines = []
+        for paragraph in text.splitlines():
+            lbuff = ''
+            rest = width
+            for word in paragraph.expandtabs(expandtabs).split(' '):
+                pl_w = pixlen(word)
+                if rest >= pl_w:
+                    lbuff += word + ' '
+                    rest -= pl_w + blen
+                    continue
+
+                if lbuff:
+                    lines.append(lbuff.rstrip())
+                lbuff = ''
+                rest = width
+
+                if pl_w <= width:
+                    lbuff = word + ' '
+                    rest = width - pl_w - blen
+                    continue
+
+                # Long word: split across lines character by character
+                for c in word:
+                    if pixlen(lbuff) <= width - pixlen(c):
+                        lbuff += c
+                    else:
+                        lines.append(lbuff)
+                        lbuff = c
+                lbuff += ' '
+                rest = width - pixlen(lbuff)
+
+            lines.append(lbuff.rstrip())
+
+        # insert_textbox drops one trailing line break, i.e. an empty last line
+        if len(lines) > 1 and not lines[-1]:
+            lines.pop()
+        return lines or ['']
+
+    def text_height(self, line_count: int, fontsize: float, lineheight: Optional[float] = None) -> float:
+        """Height insert_textbox needs for line_count lines"""
+        return fontsize * self.line_height_factor(lineheight) * line_count - self.descender * fontsize
+
+    def textbox_remainder(self, text: str, rect, fontsize: float,
+                          lineheight: Optional[float] = None) -> float:
+        """
+        Predict the return value of insert_textbox (unrotated)
+
+        Args:
+            text: Text to place
+            rect: Target rectangle
+            fontsize: Font size in points
+            lineheight: Line height factor override
+
+        Returns:
+            Unused height (>= 0) if the text fits, otherwise the negative deficit
+        """
+        rect = fitz.Rect(rect)
+        if not text:
+            return rect.height
+        lines = self.wrap(text, rect.width, fontsize)
+        return self._remainder(len(lines), rect.height, fontsize, lineheight)
+
+    def fit(self, text: str, rect, max_size: float, min_size: float,
+            lineheight: Optional[float] = None) -> Optional[TextFit]:
+        """
+        Largest font size in [min_size, max_size] at which text fits rect
+
+        The height text needs never shrinks as the font grows, so the size is
+        found by bisection on the pure fitting test.
+
+        Args:
+            text: Text to place
+            rect: Target rectangle
+            max_size: Preferred (largest) font size
+            min_size: Smallest acceptable font size
+            lineheight: Line height factor override
+
+        Returns:
+            TextFit, or None if the text does not fit even at min_size
+        """
+        rect = fitz.Rect(rect)
+        if rect.is_empty or rect.is_infinite or max_size <= 0:
+            return None
+        min_size = min(min_size, max_size)
+
+        def attempt(size):
+            lines = self.wrap(text, rect.width, size)
+            remainder = self._remainder(len(lines), rect.height, size, lineheight)
+            return TextFit(size, tuple(lines), remainder) if remainder >= 0 else None
+
+        best = attempt(max_size)
+        if best is not None:
+            return best
+        best = attempt(min_size)
+        if best is None:
+            return None
+
+        low, high = min_size, max_size
+        while high - low > FIT_PRECISION:
+            middle = (low + high) / 2
+            result = attempt(middle)
+            if result is None:
+                high = middle
+            else:
+                low, best = middle, result
+        return best
+
+    def _remainder(self, line_count: int, height: float, fontsize: float,
+                   lineheight: Optional[float]) -> float:
+        more = self.text_height(line_count, fontsize, lineheight) - height
+        if more > EPSILON:
+            return -more
+        more = abs(more)
+        return 0 if more < EPSILON else more
+
+
+@functools.lru_cache(maxsize=64)
+def get_font_metrics(fontname: str = 'helv') -> FontMetrics:
+    """
+    Shared metrics for a font (glyph tables are built once per process)
+
+    Args:
+        fontname: Font name as passed to insert_textbox
+
+    Returns:
+        FontMetrics for the font
+    """
+    return FontMetrics(fontname)
+
@@ -0,0 +1,87 @@
+"""
+Test Adaptation Cache
+
+Tests for the LRU/TTL/byte-budget behaviour of the adaptation cache.
+"""
+import unittest
+from unittest.mock import patch
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.adaptations_service import AdaptationCache
+
+
+class TestAdaptationCache(unittest.TestCase):
+    """Test cases for AdaptationCache"""
+
+    def test_get_set_and_normalization(self):
+        """Keys are whitespace and case insensitive"""
+        cache = AdaptationCache()
+        cache.set("Hello   World", "dyslexia", "Hi world")
+
+        self.assertEqual(cache.get("hello world", "Dyslexia"), "Hi world")
+        self.assertIsNone(cache.get("hello world", "adhd"))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['hit_count'], 1)
+        self.assertEqual(stats['miss_count'], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        """Least recently used entries are evicted once the byte budget is exceeded"""
+        probe = AdaptationCache()
+        entry_size = probe._entry_size(probe.get_key("a", "esl"), "x" * 100)
+        cache = AdaptationCache(max_bytes=entry_size * 3)
+
+        cache.set("a", "esl", "x" * 100)
+        cache.set("b", "esl", "x" * 100)
+        cache.set("c", "esl", "x" * 100)
+        # Touch "a" so "b" becomes least recently used
+        cache.get("a", "esl")
+        cache.set("d", "esl", "x" * 100)
+
+        self.assertIsNotNone(cache.get("a", "esl"))
+        self.assertIsNone(cache.get("b", "esl"))
+        self.assertIsNotNone(cache.get("d", "esl"))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['eviction_count'], 1)
+        self.assertLessEqual(stats['cache_bytes'], stats['max_bytes'])
+
+    def test_ttl_expiry(self):
+        """Entries past their TTL are treated as misses"""
+        cache = AdaptationCache(ttl_seconds=10)
+        with patch('services.adaptations_service.time.time', return_value=1000.0):
+            cache.set("text", "adhd", "adapted")
+        with patch('services.adaptations_service.time.time', return_value=1005.0):
+            self.assertEqual(cache.get("text", "adhd"), "adapted")
+        with patch('services.adaptations_service.time.time', return_value=1011.0):
+            self.assertIsNone(cache.get("text", "adhd"))
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['expired_count'], 1)
+        self.assertEqual(stats['cache_size'], 0)
+        self.assertEqual(stats['cache_bytes'], 0)
+
+    def test_overwrite_does_not_leak_bytes(self):
+        """Re-setting a key replaces its size accounting"""
+        cache = AdaptationCache()
+        cache.set("text", "esl", "short")
+        cache.set("text", "esl", "a much longer adaptation")
+
+        key = cache.get_key("text", "esl")
+        self.assertEqual(cache.get_stats()['cache_bytes'],
+                         cache._entry_size(key, "a much longer adaptation"))
+
+    def test_oversized_entry_is_skipped(self):
+        """A single entry larger than the budget is not stored"""
+        cache = AdaptationCache(max_bytes=64)
+        cache.set("small", "esl", "ok")
+        cache.set("big", "esl", "x" * 1000)
+
+        self.assertEqual(cache.get("small", "esl"), "ok")
+        self.assertIsNone(cache.get("big", "esl"))
+
+
+if __name__ == '__main__':
+    unittest.main()
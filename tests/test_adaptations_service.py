@@ -7,9 +7,16 @@ import unittest
 from unittest.mock import Mock, patch
 import sys
 import os
+import tempfile
+import threading
+import time
+import re
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from services import AdaptationsService
+from services.service_registry import get_adaptations_service, reset_registry
+from services.batch_planner import MAX_MAX_TOKENS
+from services.adaptation_store import AdaptationStore
 
 
 class TestAdaptationsService(unittest.TestCase):
@@ -174,6 +181,257 @@ class TestAdaptationsService(unittest.TestCase):
             count = self.service._count_syllables(word)
             self.assertEqual(count, expected, f"Syllable count for '{word}' should be {expected}")
 
+    @patch('anthropic.Anthropic')
+    def test_batch_uses_persistent_store(self, mock_anthropic):
+        """Batches only send cache misses and read through the persistent store"""
+        mock_client = Mock()
+        mock_response = Mock()
+        mock_response.content = [Mock(text="### TEXT 1 ###\nFirst simple.\n\n### TEXT 2 ###\nSecond simple.")]
+        mock_client.messages.create.return_value = mock_response
+        mock_anthropic.return_value = mock_client
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = {
+                'anthropic_api_key': 'test-key',
+                'adaptation_store': 'sqlite',
+                'adaptation_store_path': os.path.join(temp_dir, 'cache.sqlite3')
+            }
+            service = AdaptationsService(config)
+            texts = ["First complicated sentence here.", "Second complicated sentence here."]
+            
+            self.assertEqual(service._process_single_batch(texts, 'dyslexia'),
+                             ["First simple.", "Second simple."])
+            
+            # A fresh service (e.g. after a worker restart) reads from the store
+            restarted = AdaptationsService(config)
+            self.assertEqual(restarted._process_single_batch(texts, 'dyslexia'),
+                             ["First simple.", "Second simple."])
+            mock_client.messages.create.assert_called_once()
+            self.assertEqual(restarted.get_cache_stats()['persistent']['hit_count'], 2)
+
+    @patch('anthropic.Anthropic')
+    def test_concurrent_batches_keep_order(self, mock_anthropic):
+        """Batches run in parallel under the in-flight limit and results stay ordered"""
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'peak': 0}
+        
+        def fake_create(**kwargs):
+            prompt = kwargs['messages'][0]['content']
+            with lock:
+                state['in_flight'] += 1
+                state['peak'] = max(state['peak'], state['in_flight'])
+            time.sleep(0.05)
+            with lock:
+                state['in_flight'] -= 1
+            texts = re.findall(r'### TEXT (\d+) ###\n(.*?)\n', prompt)
+            body = ''.join(f"### TEXT {n} ###\nSimple {text}\n" for n, text in texts)
+            return Mock(content=[Mock(text=body)])
+        
+        mock_client = Mock()
+        mock_client.messages.create.side_effect = fake_create
+        mock_anthropic.return_value = mock_client
+        
+        service = AdaptationsService({'anthropic_api_key': 'test-key', 'max_concurrent_batches': 3})
+        texts = [f"Complicated sentence number {i}." for i in range(12)]
+        
+        adapted = service.process_text_batch(texts, 'adhd', max_batch_size=2)
+        
+        self.assertEqual(adapted, [f"Simple {text}" for text in texts])
+        self.assertEqual(mock_client.messages.create.call_count, 6)
+        self.assertGreater(state['peak'], 1)
+        self.assertLessEqual(state['peak'], 3)
+
+    @patch('anthropic.Anthropic')
+    def test_batches_are_reported_as_they_complete(self, mock_anthropic):
+        """A slow first batch does not hold back progress for later batches"""
+        later_reported = threading.Event()
+        
+        def fake_create(**kwargs):
+            prompt = kwargs['messages'][0]['content']
+            if 'number 0.' in prompt:
+                later_reported.wait(timeout=2)
+            texts = re.findall(r'### TEXT (\d+) ###\n(.*?)\n', prompt)
+            body = ''.join(f"### TEXT {n} ###\nSimple {text}\n" for n, text in texts)
+            return Mock(content=[Mock(text=body)])
+        
+        mock_client = Mock()
+        mock_client.messages.create.side_effect = fake_create
+        mock_anthropic.return_value = mock_client
+        
+        service = AdaptationsService({'anthropic_api_key': 'test-key', 'max_concurrent_batches': 2})
+        texts = [f"Complicated sentence number {i}." for i in range(6)]
+        reported = []
+        
+        def progress(indices, results):
+            reported.append(indices)
+            if 0 not in indices:
+                later_reported.set()
+        
+        adapted = service.process_text_batch(texts, 'adhd', max_batch_size=2, progress_callback=progress)
+        
+        self.assertEqual(adapted, [f"Simple {text}" for text in texts])
+        self.assertEqual(reported[0], [2, 3])
+        self.assertEqual(sorted(index for indices in reported for index in indices), list(range(6)))
+
+    @patch('anthropic.Anthropic')
+    def test_concurrent_identical_requests_are_coalesced(self, mock_anthropic):
+        """Identical in-flight requests share one API call"""
+        started = threading.Event()
+        release = threading.Event()
+        
+        def fake_create(**kwargs):
+            started.set()
+            release.wait(timeout=5)
+            return Mock(content=[Mock(text="A short simple footer.")])
+        
+        mock_client = Mock()
+        mock_client.messages.create.side_effect = fake_create
+        mock_anthropic.return_value = mock_client
+        
+        service = AdaptationsService({'anthropic_api_key': 'test-key'})
+        text = "Copyright notice repeated on every single slide of the deck."
+        results = []
+        
+        def adapt(variant):
+            results.append(service._adapt_text(variant, 'esl'))
+        
+        first = threading.Thread(target=adapt, args=(text,))
+        first.start()
+        self.assertTrue(started.wait(timeout=5))
+        # Same normalized text with different whitespace and case
+        others = [threading.Thread(target=adapt, args=(text.upper() + "  ",)) for _ in range(3)]
+        for thread in others:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [first] + others:
+            thread.join(timeout=5)
+        
+        self.assertEqual(results, ["A short simple footer."] * 4)
+        mock_client.messages.create.assert_called_once()
+        self.assertEqual(service._inflight, {})
+
+    @patch('anthropic.Anthropic')
+    def test_truncated_response_is_retried_and_not_cached(self, mock_anthropic):
+        """Responses stopped at max_tokens are retried with a larger budget, never cached"""
+        truncated = Mock(content=[Mock(text="Cells make energy and")], stop_reason='max_tokens')
+        complete = Mock(content=[Mock(text="Cells make energy.")], stop_reason='end_turn')
+        mock_client = Mock()
+        mock_client.messages.create.side_effect = [truncated, complete]
+        mock_anthropic.return_value = mock_client
+        
+        service = AdaptationsService({'anthropic_api_key': 'test-key'})
+        text = "Mitochondria produce the energy that the cell needs."
+        
+        self.assertEqual(service._adapt_text(text, 'adhd'), "Cells make energy.")
+        budgets = [call.kwargs['max_tokens'] for call in mock_client.messages.create.call_args_list]
+        self.assertEqual(budgets[1], MAX_MAX_TOKENS)
+        self.assertLess(budgets[0], budgets[1])
+        self.assertEqual(service._get_cached_adaptation(text, 'adhd'), "Cells make energy.")
+        
+        # Truncated even at the largest budget: the original is kept and nothing is cached
+        mock_client.messages.create.side_effect = None
+        mock_client.messages.create.return_value = truncated
+        other = "Chloroplasts turn sunlight into chemical energy for the plant."
+        self.assertEqual(service._adapt_text(other, 'adhd'), other)
+        self.assertIsNone(service._get_cached_adaptation(other, 'adhd'))
+        
+        # A truncated batch falls back to one request per text
+        mock_client.messages.create.return_value = Mock(
+            content=[Mock(text="### TEXT 1 ###\nSimple one.\n### TEXT 2 ###\nSimple")], stop_reason='max_tokens'
+        )
+        texts = ["First complicated sentence here.", "Second complicated sentence here."]
+        self.assertEqual(service._request_batch(texts, 'adhd'), texts)
+        for batch_text in texts:
+            self.assertIsNone(service._get_cached_adaptation(batch_text, 'adhd'))
+
+    def test_deduplicate_texts(self):
+        """Repeated texts collapse to one representative with fan-out positions"""
+        texts = ["Learning Objectives", "Photosynthesis uses light.", "Learning  Objectives", "Page 1"]
+        unique_texts, positions = self.service.deduplicate_texts(texts)
+        
+        self.assertEqual(unique_texts, ["Learning Objectives", "Photosynthesis uses light.", "Page 1"])
+        self.assertEqual(positions, [0, 1, 0, 2])
+        stats = self.service.get_cache_stats()['deduplication']
+        self.assertEqual(stats['duplicates_collapsed'], 1)
+        self.assertGreater(stats['input_tokens_saved'], 0)
+        self.assertGreater(stats['output_tokens_saved'], stats['input_tokens_saved'])
+    
+    @patch('anthropic.Anthropic')
+    def test_batch_adapts_duplicates_once(self, mock_anthropic):
+        """Duplicates are sent once and results fan back out in order"""
+        mock_client = Mock()
+        mock_client.messages.create.return_value = Mock(
+            content=[Mock(text="### TEXT 1 ###\nSimple footer\n### TEXT 2 ###\nSimple body")]
+        )
+        mock_anthropic.return_value = mock_client
+        
+        service = AdaptationsService({'anthropic_api_key': 'test-key'})
+        footer = "Copyright Example School District"
+        body = "Mitochondria produce energy for the cell."
+        
+        adapted = service.process_text_batch([footer, body, footer, footer], 'adhd')
+        
+        self.assertEqual(adapted, ["Simple footer", "Simple body", "Simple footer", "Simple footer"])
+        mock_client.messages.create.assert_called_once()
+        prompt = mock_client.messages.create.call_args.kwargs['messages'][0]['content']
+        self.assertEqual(prompt.count(footer), 1)
+
+    def test_batch_progress_reports_every_position(self):
+        """The progress callback sees each input index once, duplicates included"""
+        texts = ["Learning Objectives", "Photosynthesis uses light.", "Learning Objectives", "Cells divide."]
+        reported = []
+        
+        adapted = self.service.process_text_batch(
+            texts, 'adhd', max_batch_size=1,
+            progress_callback=lambda indices, results: reported.append((indices, results))
+        )
+        
+        self.assertEqual(len(reported), 3)
+        self.assertEqual(sorted(index for indices, _ in reported for index in indices), [0, 1, 2, 3])
+        for indices, results in reported:
+            self.assertEqual(results, [adapted[index] for index in indices])
+        self.assertIn([0, 2], [indices for indices, _ in reported])
+
+    def test_incomplete_store_backend_fails_on_creation(self):
+        """A store backend missing _get/_set cannot be instantiated"""
+        class WriteOnlyStore(AdaptationStore):
+            def _set(self, key, adapted_text):
+                pass
+        
+        with self.assertRaises(TypeError):
+            WriteOnlyStore()
+        with self.assertRaises(TypeError):
+            AdaptationStore()
+
+
+class TestServiceRegistry(unittest.TestCase):
+    """Test cases for the shared AdaptationsService registry"""
+    
+    def setUp(self):
+        reset_registry()
+    
+    def tearDown(self):
+        reset_registry()
+    
+    def test_same_config_shares_instance(self):
+        """Callers with the same credentials get the same warm instance"""
+        first = get_adaptations_service({})
+        second = get_adaptations_service({'output_folder': 'elsewhere'})
+        
+        self.assertIs(first, second)
+        first.cache.set("shared text", "esl", "adapted")
+        self.assertEqual(second.cache.get("shared text", "esl"), "adapted")
+    
+    @patch('anthropic.Anthropic')
+    def test_different_api_keys_are_isolated(self, mock_anthropic):
+        """Different API keys never share a client"""
+        keyless = get_adaptations_service({})
+        keyed = get_adaptations_service({'anthropic_api_key': 'test-key'})
+        
+        self.assertIsNot(keyless, keyed)
+        self.assertIs(keyed, get_adaptations_service({'anthropic_api_key': 'test-key'}))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Test Batch Planner
+
+Tests for token estimation and bin-packing of adaptation requests.
+"""
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.batch_planner import (
+    estimate_tokens, predict_output_tokens, choose_max_tokens, plan_batches,
+    MIN_MAX_TOKENS, MAX_MAX_TOKENS
+)
+
+
+class TestBatchPlanner(unittest.TestCase):
+    """Test cases for the batch planner"""
+
+    def test_estimate_tokens_by_script(self):
+        """CJK and symbol-heavy text cost more tokens per character than English"""
+        english = "The cell membrane controls what enters the cell."
+        chinese = "细胞膜控制物质进出细胞。"
+        formula = "H2SO4 + 2NaOH → Na2SO4 + 2H2O"
+
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertLess(estimate_tokens(english), len(english) / 3)
+        self.assertGreaterEqual(estimate_tokens(chinese), len(chinese) - 1)
+        self.assertGreater(estimate_tokens(formula), len(formula) // 4)
+
+    def test_output_prediction_depends_on_profile(self):
+        """ESL adaptations are expected to expand more than ADHD ones"""
+        text = "Photosynthesis converts light energy into chemical energy."
+        self.assertGreater(predict_output_tokens(text, 'esl'), predict_output_tokens(text, 'adhd'))
+
+    def test_choose_max_tokens_is_clamped(self):
+        """max_tokens follows the prediction within sensible bounds"""
+        self.assertEqual(choose_max_tokens(["Hi"], 'adhd'), MIN_MAX_TOKENS)
+        self.assertEqual(choose_max_tokens(["word " * 20000], 'esl'), MAX_MAX_TOKENS)
+
+        medium = ["A fairly long paragraph of explanatory text. " * 40] * 3
+        self.assertGreater(choose_max_tokens(medium, 'esl'), MIN_MAX_TOKENS)
+        self.assertLess(choose_max_tokens(medium, 'esl'), MAX_MAX_TOKENS)
+
+    def test_plan_batches_packs_small_texts_together(self):
+        """Many short texts share requests instead of one request each"""
+        texts = [f"Slide title {i}" for i in range(25)]
+        batches = plan_batches(texts, 'dyslexia', max_batch_size=10)
+
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(25)))
+
+    def test_plan_batches_respects_budgets(self):
+        """Budgets are honoured and oversized texts get their own request"""
+        texts = ["short text"] * 4 + ["long " * 2000] + ["medium text " * 100] * 3
+        batches = plan_batches(texts, 'esl', max_batch_size=10,
+                               max_input_tokens=500, max_output_tokens=800)
+
+        for batch in batches:
+            self.assertEqual(batch, sorted(batch))
+            if len(batch) > 1:
+                input_total = sum(estimate_tokens(texts[i]) for i in batch)
+                self.assertLessEqual(input_total, 500)
+        self.assertIn([4], batches)
+        self.assertEqual([batch[0] for batch in batches], sorted(batch[0] for batch in batches))
+
+    def test_plan_batches_packs_groups_in_order(self):
+        """Grouped texts are packed a few groups at a time, so early slides finish first"""
+        texts = []
+        groups = []
+        for slide in range(40):
+            body_sentences = 2 + (slide * 7) % 28
+            texts.append(f"Slide {slide}: Topic heading")
+            texts.append(f"Body {slide}. " + "Photosynthesis converts light energy. " * body_sentences)
+            groups.extend([slide, slide])
+
+        batches = plan_batches(texts, 'dyslexia', groups=groups)
+        last_batch = {}
+        for number, batch in enumerate(batches):
+            for index in batch:
+                last_batch[groups[index]] = number
+
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(80)))
+        self.assertLessEqual(len(batches), len(plan_batches(texts, 'dyslexia')) + 1)
+        completion = [last_batch[slide] for slide in range(40)]
+        self.assertEqual(completion, sorted(completion))
+        self.assertLessEqual(completion[0], 1)
+        self.assertEqual([batch[0] for batch in batches], sorted(batch[0] for batch in batches))
+
+
+if __name__ == '__main__':
+    unittest.main()
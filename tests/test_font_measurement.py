@@ -0,0 +1,127 @@
+"""
+Test Font Measurement
+
+Tests for the cached font loading and text measurement used by PPTX fitting.
+"""
+import unittest
+import sys
+import os
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from services.font_measurement import TextMeasurer, find_boundary, get_text_measurer
+from services.pptx_service import PowerPointService
+
+
+def binary_search_size(text, max_width_pts, max_height_pts, font_name, min_size=8, max_size=72):
+    """Reference fitting for single-line text: binary search over measured sizes"""
+    measurer = get_text_measurer()
+    low, high, best = min_size, max_size, min_size
+    while low <= high:
+        mid = (low + high) // 2
+        width, height = measurer.text_size(font_name, mid, text)
+        if width <= int(max_width_pts * 96 / 72) and height <= int(max_height_pts * 96 / 72):
+            best, low = mid, mid + 1
+        else:
+            high = mid - 1
+    return best
+
+
+class TestTextMeasurer(unittest.TestCase):
+    """Test cases for TextMeasurer"""
+
+    def setUp(self):
+        self.measurer = TextMeasurer(font_cache_size=8, measure_cache_size=64)
+
+    def test_matches_pil_textbbox(self):
+        """Measurements equal a direct ImageDraw.textbbox call"""
+        draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        font = ImageFont.load_default()
+        for text in ("Hello world", "Two\nlines", ""):
+            self.assertEqual(self.measurer.text_bbox('NoSuchFont', 14, text),
+                             tuple(draw.textbbox((0, 0), text, font=font)))
+        left, top, right, bottom = self.measurer.text_bbox('NoSuchFont', 14, "Hello")
+        self.assertEqual(self.measurer.text_size('NoSuchFont', 14, "Hello"), (right - left, bottom - top))
+
+    def test_fonts_loaded_once_per_size(self):
+        """Each (font, size) is loaded once, including the fallback"""
+        with patch.object(ImageFont, 'truetype', side_effect=OSError) as truetype:
+            for _ in range(3):
+                self.measurer.text_size('Arial', 12, "one")
+                self.measurer.text_size('Arial', 12, "two")
+                self.measurer.text_size('Arial', 14, "one")
+        self.assertEqual(truetype.call_count, 2)
+        stats = self.measurer.get_stats()
+        self.assertEqual(stats['fonts_loaded'], 2)
+        self.assertEqual(stats['measure_misses'], 3)
+        self.assertEqual(stats['measure_hits'], 6)
+
+    def test_no_font_available(self):
+        """Without any usable font, measurements are None"""
+        with patch.object(ImageFont, 'truetype', side_effect=OSError), \
+                patch.object(ImageFont, 'load_default', side_effect=Exception):
+            self.assertIsNone(self.measurer.text_size('Arial', 12, "text"))
+
+
+class TestFindBoundary(unittest.TestCase):
+    """Test cases for find_boundary"""
+
+    def test_matches_linear_scan(self):
+        """The largest fitting value is found from any guess"""
+        for limit in range(-1, 13):
+            for guess in range(-3, 15):
+                calls = []
+
+                def fits(n):
+                    calls.append(n)
+                    return n <= limit
+
+                expected = min(limit, 10) if limit >= 0 else -1
+                self.assertEqual(find_boundary(fits, guess, 0, 10), expected)
+                self.assertLessEqual(len(calls), 8)
+        self.assertEqual(find_boundary(lambda n: True, 0, 1, 0), 0)
+
+
+class TestFontSizeFitting(unittest.TestCase):
+    """Test cases for PowerPointService font fitting built on the advance tables"""
+
+    def setUp(self):
+        self.service = PowerPointService({'output_folder': './test_outputs', 'upload_folder': './uploads'})
+        self.fonts = ['Arial']
+        try:
+            ImageFont.truetype('DejaVuSans.ttf', 12)
+            self.fonts.append('DejaVuSans.ttf')
+        except OSError:
+            pass
+
+    def test_sizes_match_binary_search(self):
+        """Predicted-then-confirmed sizes equal a binary search over measurements"""
+        texts = ["Photosynthesis", "The water cycle moves water through the environment",
+                 "Plants make food from sunlight, water and carbon dioxide. " * 3]
+        boxes = [(40, 20), (200, 30), (400, 100), (720, 540), (90, 300)]
+        for font_name in self.fonts:
+            items = [(text, width, height) for text in texts for width, height in boxes]
+            sizes = self.service.calculate_optimal_font_sizes(items, font_name)
+            for (text, width, height), size in zip(items, sizes):
+                self.assertEqual(size, binary_search_size(text, width, height, font_name))
+                self.assertEqual(size, self.service.calculate_optimal_font_size(text, width, height, font_name))
+
+    def test_truncation_keeps_fitting_prefix(self):
+        """Smart truncation keeps the longest fitting run of sentences"""
+        sentences = ["Sentence number %d is here" % i for i in range(12)]
+        text = '. '.join(sentences) + '.'
+        for font_name in self.fonts:
+            truncated, overflow = self.service._smart_truncate_text(text, 300, 60, 10, font_name)
+            count = truncated.count('Sentence')
+            self.assertTrue(0 < count < len(sentences))
+            self.assertEqual(truncated, '. '.join(sentences[:count]) + '.')
+            self.assertEqual(overflow, '. '.join(sentences[count:]) + '.')
+            longer = '. '.join(sentences[:count + 1]) + '.'
+            width, height = self.service.measure_text_bounds(longer, font_name, 10)
+            self.assertTrue(width > 300 or height > 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test Output Quality
+
+Tests for the raster policy used when PDF page backgrounds are rasterized.
+"""
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+import numpy as np
+from PIL import Image
+import io
+
+from services.output_quality import RasterPolicy, QUALITY_SETTINGS, MIN_RASTER_DPI
+
+
+def make_flat_page():
+    """Create a page with a couple of plain filled shapes"""
+    doc = fitz.open()
+    page = doc.new_page(width=600, height=800)
+    page.draw_rect(fitz.Rect(50, 50, 300, 300), fill=(0.2, 0.5, 0.7))
+    page.draw_rect(fitz.Rect(100, 400, 500, 700), fill=(0.9, 0.1, 0.1), color=(0, 0, 0))
+    return doc, page
+
+
+def make_photo_page():
+    """Create a page with a smoothly shaded (photographic) image"""
+    y, x = np.mgrid[0:200, 0:200] / 200.0
+    channels = [np.sin(x * 7) * np.cos(y * 5), np.sin((x + y) * 4), np.cos(x * y * 9)]
+    pixels = ((np.stack(channels, axis=-1) + 1) * 127.5).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    doc = fitz.open()
+    page = doc.new_page(width=600, height=800)
+    page.insert_image(fitz.Rect(100, 100, 500, 500), stream=buffer.getvalue())
+    return doc, page
+
+
+class TestRasterPolicy(unittest.TestCase):
+    """Test cases for RasterPolicy"""
+
+    def test_dpi_follows_page_complexity(self):
+        """Flat pages stay near 72 dpi; image pages get the tier's dpi"""
+        flat_doc, flat_page = make_flat_page()
+        photo_doc, photo_page = make_photo_page()
+        for quality, settings in QUALITY_SETTINGS.items():
+            policy = RasterPolicy(quality)
+            self.assertLess(policy.page_dpi(flat_page), MIN_RASTER_DPI + 5)
+            self.assertEqual(policy.page_dpi(photo_page), settings['dpi'])
+
+    def test_flat_render_is_lossless_palette_png(self):
+        """Renders with few colors are stored as exact palette PNGs"""
+        doc, page = make_flat_page()
+        pixmap = page.get_pixmap(alpha=False)
+        data = RasterPolicy('low').encode(pixmap)
+
+        image = Image.open(io.BytesIO(data))
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(image.mode, 'P')
+        expected = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, 3)
+        np.testing.assert_array_equal(np.asarray(image.convert('RGB')), expected)
+
+    def test_tiers_trade_size_for_fidelity(self):
+        """Compressed tiers use JPEG, high stays lossless, lower tiers are smaller"""
+        doc, page = make_photo_page()
+        sizes = {}
+        for quality in ('high', 'medium', 'low'):
+            policy = RasterPolicy(quality)
+            data = policy.render(page)
+            sizes[quality] = len(data)
+            self.assertEqual(policy.summary()['encoded_bytes'], len(data))
+            expected_format = 'png' if quality == 'high' else 'jpeg'
+            self.assertEqual(policy.summary()['formats'], {expected_format: 1})
+        self.assertGreater(sizes['high'], sizes['medium'])
+        self.assertGreater(sizes['medium'], sizes['low'])
+
+    def test_unknown_quality_falls_back_to_high(self):
+        """Unknown tier names use the high tier, as ConversionService does"""
+        self.assertEqual(RasterPolicy('ultra').quality, 'high')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test Page Geometry Index
+
+Tests for the per-page spatial index used to skip text inside images.
+"""
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+from PIL import Image
+import io
+
+from services.page_geometry import PageGeometryIndex
+from services.pdf_visual_handler import PDFVisualHandler
+
+
+def make_page_with_image(image_rect):
+    """Create a page with a single embedded image"""
+    buffer = io.BytesIO()
+    Image.new('RGB', (20, 20), (200, 30, 30)).save(buffer, format='PNG')
+    doc = fitz.open()
+    page = doc.new_page(width=600, height=800)
+    page.insert_image(image_rect, stream=buffer.getvalue())
+    return doc, page
+
+
+class TestPageGeometryIndex(unittest.TestCase):
+    """Test cases for PageGeometryIndex"""
+
+    def test_overlap_queries(self):
+        """Only rectangles mostly covered by an indexed area match"""
+        index = PageGeometryIndex(fitz.Rect(0, 0, 600, 800), cell_size=50)
+        index.add_image(fitz.Rect(100, 100, 300, 300))
+        index.add_fill(fitz.Rect(400, 500, 580, 780))
+
+        kind, rect, ratio = index.find_covering(fitz.Rect(120, 120, 200, 140))
+        self.assertEqual(kind, 'image')
+        self.assertAlmostEqual(ratio, 1.0)
+
+        self.assertEqual(index.find_covering(fitz.Rect(450, 600, 500, 620))[0], 'fill')
+        # Less than half inside the image
+        self.assertIsNone(index.find_covering(fitz.Rect(250, 120, 400, 140)))
+        self.assertIsNone(index.find_covering(fitz.Rect(10, 10, 60, 20)))
+        self.assertIsNone(index.find_covering(fitz.Rect(10, 10, 10, 20)))
+
+    def test_handler_uses_prebuilt_index(self):
+        """The handler's image-area check answers from the index it is given"""
+        doc, page = make_page_with_image(fitz.Rect(50, 50, 250, 250))
+        index = PageGeometryIndex.from_page(page)
+        index.add_image(fitz.Rect(50, 50, 250, 250))
+
+        handler = PDFVisualHandler()
+        self.assertTrue(handler._is_text_in_image_area(page, fitz.Rect(60, 60, 200, 80), index))
+        self.assertFalse(handler._is_text_in_image_area(page, fitz.Rect(300, 300, 400, 320), index))
+        doc.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Test Page Sample Cache
+
+Tests for the content-keyed cache of background samples and page geometry.
+"""
+import unittest
+import sys
+import os
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+from services.page_sample_cache import PageSampleCache, page_content_hash
+from services.pdf_visual_handler import PDFVisualHandler
+from services.pdf_visual_handler_enhanced import PDFVisualHandlerEnhanced
+
+
+HEADER_RECT = fitz.Rect(50, 40, 400, 70)
+
+
+def make_worksheet(bodies):
+    """Create a document whose pages share a header band and differ in body text"""
+    doc = fitz.open()
+    for body in bodies:
+        page = doc.new_page(width=600, height=800)
+        page.draw_rect(fitz.Rect(0, 0, 600, 100), fill=(0.85, 0.9, 1.0))
+        page.insert_text((60, 60), "Worksheet 3: Fractions", fontsize=16)
+        page.insert_textbox(fitz.Rect(50, 150, 550, 400), body, fontsize=11)
+    return doc
+
+
+class TestPageSampleCache(unittest.TestCase):
+    """Test cases for PageSampleCache and the enhanced handler's use of it"""
+
+    def setUp(self):
+        self.handler = PDFVisualHandlerEnhanced()
+        self.handler.sample_cache = PageSampleCache(max_entries=64)
+
+    def test_content_hash_ignores_identity(self):
+        """Identical pages hash the same across documents; different pages do not"""
+        first = make_worksheet(["Question one", "Question two"])
+        second = make_worksheet(["Question one"])
+        self.assertEqual(page_content_hash(first[0]), page_content_hash(second[0]))
+        self.assertNotEqual(page_content_hash(first[0]), page_content_hash(first[1]))
+
+    def test_cache_is_bounded(self):
+        """The least recently used entries are evicted"""
+        cache = PageSampleCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+    def test_template_samples_reused_across_pages(self):
+        """A header repeated on every page is only analysed once"""
+        doc = make_worksheet(["Question one about halves", "Question two about quarters"])
+        colors = []
+        with patch.object(PDFVisualHandler, '_mode_color', wraps=PDFVisualHandler._mode_color) as mode_color:
+            for page in doc:
+                pixmap = page.get_pixmap(alpha=False)
+                page_pixels = self.handler._pixmap_array(pixmap)
+                colors.append(self.handler._sample_background_color(page, HEADER_RECT, page_pixels))
+        self.assertEqual(mode_color.call_count, 1)
+        self.assertEqual(colors[0], colors[1])
+        self.assertEqual(colors[0], PDFVisualHandler()._sample_background_color(doc[1], HEADER_RECT, page_pixels))
+
+    def test_rendered_samples_and_geometry_reused(self):
+        """Samples rendered from a page and its geometry hit for an identical page"""
+        first_doc, second_doc = make_worksheet(["Same body"]), make_worksheet(["Same body"])
+        first, second = first_doc[0], second_doc[0]
+
+        color = self.handler._sample_background_color(first, HEADER_RECT)
+        geometry = self.handler._get_page_geometry(first)
+        with patch.object(fitz.Page, 'get_pixmap') as get_pixmap:
+            self.assertEqual(self.handler._sample_background_color(second, HEADER_RECT), color)
+        get_pixmap.assert_not_called()
+        self.assertIs(self.handler._get_page_geometry(second), geometry)
+
+        point_color = self.handler._sample_color_at_point(first, (10, 10))
+        self.assertEqual(self.handler._sample_color_at_point(second, (10, 10)), point_color)
+        self.assertAlmostEqual(point_color[2], 1.0, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Test PDF Layout Model
+
+Tests for the single-pass document layout and its content-hash cache.
+"""
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+import numpy as np
+import pickle
+
+from services.pdf_layout import (
+    DocumentLayout, DocumentLayoutCache, extract_document_layout, extract_page_layout, get_layout_cache
+)
+from services.pdf_visual_handler import PDFVisualHandler
+
+
+def write_sample_pdf(path, pages=2):
+    """Write a PDF with wrapped text, a second text block and a filled shape"""
+    doc = fitz.open()
+    for page_idx in range(pages):
+        page = doc.new_page(width=600, height=800)
+        page.draw_rect(fitz.Rect(40, 40, 560, 140), fill=(0.9, 0.9, 1.0))
+        page.insert_textbox(fitz.Rect(50, 50, 300, 300),
+                            f"Page {page_idx} paragraph that is long enough to wrap onto a few lines.",
+                            fontsize=11)
+        page.insert_text((50, 400), "Line A\nLine B", fontsize=12)
+    doc.set_metadata({'title': 'Sample'})
+    doc.save(path)
+    doc.close()
+
+
+class TestPDFLayout(unittest.TestCase):
+    """Test cases for the layout model and cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.temp_dir, 'sample.pdf')
+        write_sample_pdf(self.pdf_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_layout_matches_page_parse(self):
+        """Text and text blocks match what get_text returns"""
+        with fitz.open(self.pdf_path) as doc:
+            for page in doc:
+                page_layout = extract_page_layout(page)
+                expected = [block for block in page.get_text("dict")['blocks'] if block['type'] == 0]
+                self.assertEqual(page_layout.text_dict()['blocks'], expected)
+                self.assertEqual(page_layout.text, page.get_text())
+                self.assertEqual(len(page_layout.drawings), 1)
+
+    def test_layout_is_immutable(self):
+        """Layouts are shared between stages, so they cannot be modified"""
+        layout = DocumentLayoutCache().get(self.pdf_path)
+        with self.assertRaises(AttributeError):
+            layout.pages[0].blocks = ()
+        self.assertIsInstance(layout.pages[0].blocks, tuple)
+        self.assertEqual(layout.get_metadata()['title'], 'Sample')
+
+    def test_cache_is_keyed_by_content(self):
+        """Identical files share a layout; changed files are parsed again"""
+        cache = DocumentLayoutCache(max_entries=2)
+        first = cache.get(self.pdf_path)
+        copy_path = os.path.join(self.temp_dir, 'copy.pdf')
+        shutil.copyfile(self.pdf_path, copy_path)
+        self.assertIs(cache.get(copy_path), first)
+        self.assertEqual((cache.hit_count, cache.miss_count), (1, 1))
+
+        write_sample_pdf(self.pdf_path, pages=3)
+        self.assertEqual(cache.get(self.pdf_path).page_count, 3)
+        self.assertEqual(cache.miss_count, 2)
+
+    def test_span_columns_are_views(self):
+        """Per-page and per-block span columns share the store's arrays"""
+        layout = DocumentLayoutCache().get(self.pdf_path)
+        page_layout = layout.pages[1]
+        columns = page_layout.span_columns()
+        self.assertTrue(np.shares_memory(columns.bbox, layout.store.span_bbox))
+        self.assertFalse(columns.size.flags.writeable)
+
+        spans = [span for block in page_layout.blocks for line in block.lines for span in line.spans]
+        self.assertEqual(columns.size.tolist(), [span.size for span in spans])
+        self.assertEqual([columns.fonts[i] for i in columns.font_ids], [span.font for span in spans])
+
+        block = page_layout.blocks[-1]
+        block_columns = block.span_columns()
+        self.assertTrue(np.shares_memory(block_columns.bbox, columns.bbox))
+        self.assertEqual([tuple(bbox) for bbox in block_columns.bbox.tolist()],
+                         [span.bbox for line in block.lines for span in line.spans])
+
+    def test_binary_round_trip(self):
+        """Serialized layouts load back unchanged, whole or one page at a time"""
+        with fitz.open(self.pdf_path) as doc:
+            layout = extract_document_layout(doc, 'abc')
+        loaded = DocumentLayout.from_bytes(layout.to_bytes())
+        self.assertEqual(loaded.file_hash, 'abc')
+        self.assertEqual(loaded.get_metadata(), layout.get_metadata())
+        for original, copy in zip(layout.pages, loaded.pages):
+            self.assertEqual(copy.text_dict(), original.text_dict())
+            self.assertEqual(copy.drawings, original.drawings)
+
+        page_copy = pickle.loads(pickle.dumps(layout.pages[1]))
+        self.assertEqual(page_copy.number, 1)
+        self.assertEqual(page_copy.store.page_count, 1)
+        self.assertEqual(page_copy.text, layout.pages[1].text)
+
+    def test_cache_dir_shares_layouts(self):
+        """A second cache with the same directory loads instead of parsing"""
+        cache_dir = os.path.join(self.temp_dir, 'layouts')
+        first = DocumentLayoutCache(cache_dir=cache_dir).get(self.pdf_path)
+        cache = DocumentLayoutCache(cache_dir=cache_dir)
+        layout = cache.get(self.pdf_path)
+        self.assertEqual((cache.disk_hit_count, cache.miss_count), (1, 0))
+        self.assertEqual(layout.pages[0].text_dict(), first.pages[0].text_dict())
+
+    def test_cache_dir_is_pruned(self):
+        """Saving prunes expired layout files, then the least recently used over the cap"""
+        cache_dir = os.path.join(self.temp_dir, 'layouts')
+        os.makedirs(cache_dir)
+        expired = os.path.join(cache_dir, 'expired.layout')
+        recent = os.path.join(cache_dir, 'recent.layout')
+        for path in (expired, recent):
+            with open(path, 'wb') as f:
+                f.write(b'x' * 1000)
+        os.utime(expired, (1, 1))
+
+        cache = DocumentLayoutCache(cache_dir=cache_dir, disk_max_age_seconds=3600)
+        layout = cache.get(self.pdf_path)
+        saved = os.path.join(cache_dir, f"{layout.file_hash}.layout")
+        self.assertEqual(sorted(os.listdir(cache_dir)), sorted([os.path.basename(recent), os.path.basename(saved)]))
+
+        # Over the byte cap the older entry goes and the new layout stays
+        os.utime(recent, (time.time() - 60, time.time() - 60))
+        cache.disk_max_bytes = os.path.getsize(saved)
+        self.assertEqual(cache._prune_disk(), 1)
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(saved)])
+
+    def test_anchor_pipeline_parses_each_page_once(self):
+        """The anchor pipeline reuses the cached layout for every stage"""
+        handler = PDFVisualHandler()
+        handler.render_workers = 1
+        handler.text_removal_mode = 'raster'
+        content = {'pages': [{'text': 'Adapted'} for _ in range(2)]}
+        output_path = os.path.join(self.temp_dir, 'out.pdf')
+        get_layout_cache().clear()
+
+        calls = []
+        original_get_text = fitz.Page.get_text
+
+        def counting_get_text(page, *args, **kwargs):
+            calls.append(page.number)
+            return original_get_text(page, *args, **kwargs)
+
+        fitz.Page.get_text = counting_get_text
+        try:
+            self.assertTrue(handler.create_visual_preserved_pdf_with_anchors(
+                self.pdf_path, content, output_path, 'default'))
+        finally:
+            fitz.Page.get_text = original_get_text
+
+        self.assertEqual(sorted(calls), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Test Streaming PDF Writer
+
+Tests for chunked, incrementally saved PDF output.
+"""
+import unittest
+import os
+import random
+import tempfile
+import time
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+from services.pdf_stream_writer import StreamingPDFWriter
+
+
+class TestStreamingPDFWriter(unittest.TestCase):
+    """Test cases for StreamingPDFWriter"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.temp_dir.name, 'out.pdf')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_pages_are_flushed_in_chunks(self):
+        """Pages arrive in order, a chunk at a time, with metadata applied"""
+        writer = StreamingPDFWriter(self.output_path, chunk_pages=4)
+        for page_number in range(10):
+            page = writer.new_page(300, 400)
+            page.insert_text((20, 40), f"Page {page_number}")
+            if page_number == 4:
+                # The first chunk has already been written
+                self.assertTrue(os.path.exists(self.output_path))
+        writer.close(metadata={'title': 'Streamed'})
+
+        self.assertEqual(writer.flush_count, 3)
+        with fitz.open(self.output_path) as doc:
+            self.assertEqual(doc.page_count, 10)
+            self.assertEqual(doc.metadata['title'], 'Streamed')
+            for page_number in range(10):
+                self.assertIn(f"Page {page_number}", doc[page_number].get_text())
+
+    def test_insert_pdf_and_abort(self):
+        """Copied pages count towards chunks; aborting removes partial output"""
+        source = fitz.open()
+        for _ in range(3):
+            source.new_page()
+
+        with StreamingPDFWriter(self.output_path, chunk_pages=2) as writer:
+            for page_number in range(3):
+                writer.insert_pdf(source, page_number, page_number)
+        with fitz.open(self.output_path) as doc:
+            self.assertEqual(doc.page_count, 3)
+
+        os.remove(self.output_path)
+        with self.assertRaises(RuntimeError):
+            with StreamingPDFWriter(self.output_path, chunk_pages=1) as writer:
+                writer.new_page(100, 100)
+                writer.new_page(100, 100)
+                raise RuntimeError("page failed")
+        self.assertFalse(os.path.exists(self.output_path))
+        source.close()
+
+    def test_shared_image_is_not_duplicated(self):
+        """Copying a deck page by page keeps one copy of a shared image"""
+        source_path = os.path.join(self.temp_dir.name, 'deck.pdf')
+        # Noise does not compress, so a duplicated image shows in the file size
+        image = fitz.Pixmap(fitz.csRGB, 200, 200, random.Random(0).randbytes(200 * 200 * 3), False)
+        image_data = image.tobytes('png')
+        source = fitz.open()
+        image_xref = 0
+        for page_number in range(30):
+            page = source.new_page()
+            if image_xref:
+                page.insert_image(page.rect, xref=image_xref)
+            else:
+                image_xref = page.insert_image(page.rect, stream=image_data)
+            page.insert_text((50, 50), f"Slide {page_number}")
+        source.save(source_path, garbage=3, deflate=True)
+        source.close()
+        source_size = os.path.getsize(source_path)
+
+        with fitz.open(source_path) as source:
+            with StreamingPDFWriter(self.output_path, chunk_pages=8,
+                                    save_options={'deflate': True}) as writer:
+                for page_number in range(source.page_count):
+                    writer.copy_page(source, page_number)
+
+        self.assertLess(os.path.getsize(self.output_path), source_size * 1.5)
+        with fitz.open(self.output_path) as doc:
+            self.assertEqual(doc.page_count, 30)
+            self.assertEqual(len({image[0] for page in doc for image in page.get_images()}), 1)
+            self.assertIn("Slide 29", doc[29].get_text())
+
+    def test_long_deck_is_written_in_linear_time(self):
+        """A 300-page deck with a shared logo streams without a whole-file rewrite"""
+        source_path = os.path.join(self.temp_dir.name, 'long.pdf')
+        noise = random.Random(1)
+        image = fitz.Pixmap(fitz.csRGB, 200, 200, noise.randbytes(200 * 200 * 3), False)
+        image_data = image.tobytes('png')
+        source = fitz.open()
+        image_xref = 0
+        for page_number in range(300):
+            page = source.new_page()
+            logo_rect = fitz.Rect(400, 20, 560, 180)
+            if image_xref:
+                page.insert_image(logo_rect, xref=image_xref)
+            else:
+                image_xref = page.insert_image(logo_rect, stream=image_data)
+            # Distinct icons give the deck thousands of objects
+            for icon in range(5):
+                icon_image = fitz.Pixmap(fitz.csRGB, 8, 8, noise.randbytes(8 * 8 * 3), False)
+                page.insert_image(fitz.Rect(20 + icon * 30, 20, 45 + icon * 30, 45), pixmap=icon_image)
+            for line in range(10):
+                page.insert_text((50, 220 + line * 18), f"Slide {page_number} line {line}", fontsize=10)
+        source.save(source_path, garbage=3, deflate=True)
+        source.close()
+
+        started = time.perf_counter()
+        with fitz.open(source_path) as source:
+            with StreamingPDFWriter(self.output_path, chunk_pages=20,
+                                    save_options={'deflate': True}) as writer:
+                for page_number in range(source.page_count):
+                    page = writer.copy_page(source, page_number)
+                    page.add_redact_annot(fitz.Rect(40, 200, 400, 420))
+                    page.apply_redactions(images=fitz.PDF_REDACT_IMAGE_NONE)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 3)
+        with fitz.open(self.output_path) as doc:
+            self.assertEqual(doc.page_count, 300)
+            self.assertEqual(len({image[0] for page in doc for image in page.get_images()}), 1 + 300 * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,14 @@ Tests for the migrated PDF visual preservation functionality.
 """
 import unittest
 import os
+import random
+import re
 import tempfile
 from unittest.mock import Mock, patch, MagicMock
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.pdf_visual_handler import PDFVisualHandler
+from services.pdf_visual_handler import PDFVisualHandler, _render_cleaned_page_range, _default_render_workers
 
 
 class TestPDFVisualHandler(unittest.TestCase):
@@ -100,8 +102,8 @@ class TestPDFVisualHandler(unittest.TestCase):
                 'dyslexia'
             )
             
-            # Should call save
-            mock_doc.save.assert_called_once_with(output_path)
+            # Should call save (deflating the rendered backgrounds)
+            mock_doc.save.assert_called_once_with(output_path, deflate=True)
             self.assertTrue(success)
             
         finally:
@@ -242,5 +244,171 @@ class TestPDFVisualHandler(unittest.TestCase):
         mock_page.insert_textbox.assert_called()
 
 
+class TestAnchorPagePipeline(unittest.TestCase):
+    """Test cases for rendering cleaned pages outside the assembling process"""
+
+    def setUp(self):
+        import fitz
+        self.fitz = fitz
+        self.handler = PDFVisualHandler()
+        doc = fitz.open()
+        for page_number in range(3):
+            page = doc.new_page()
+            page.draw_rect(fitz.Rect(40, 40, 400, 300), color=(0.8, 0.9, 1.0), fill=(0.8, 0.9, 1.0))
+            page.insert_text((60, 80), f"Page {page_number} heading", fontsize=14)
+        handle, self.pdf_path = tempfile.mkstemp(suffix='.pdf')
+        os.close(handle)
+        doc.save(self.pdf_path)
+        doc.close()
+
+    def tearDown(self):
+        os.remove(self.pdf_path)
+
+    def test_worker_render_matches_in_process_render(self):
+        """Range rendering returns the same cleaned background as in-process rendering"""
+        rendered = dict(_render_cleaned_page_range(self.pdf_path, [1, 2]))
+        self.assertEqual(sorted(rendered), [1, 2])
+
+        doc = self.fitz.open(self.pdf_path)
+        cleaned = self.handler._create_text_free_page(doc[1])
+        expected = cleaned.get_pixmap(matrix=self.fitz.Matrix(1, 1), alpha=False)
+        actual = self.fitz.Pixmap(rendered[1])
+        self.assertEqual((actual.width, actual.height), (expected.width, expected.height))
+        self.assertEqual(actual.samples, expected.samples)
+        doc.close()
+
+    def test_redaction_removes_text_but_keeps_vectors(self):
+        """Redaction mode strips text without rasterizing the page"""
+        source = self.fitz.open(self.pdf_path)
+        output = self.fitz.open()
+        output.insert_pdf(source, from_page=0, to_page=0)
+        page = output[0]
+
+        self.assertEqual(self.handler._redact_page_text(page), 1)
+        self.assertEqual(page.get_text().strip(), '')
+        self.assertEqual(len(page.get_drawings()), 1)
+        self.assertEqual(page.get_images(), [])
+        # The original document is untouched
+        self.assertIn('Page 0 heading', source[0].get_text())
+        output.close()
+        source.close()
+
+    def test_redacted_deck_keeps_shared_image_once(self):
+        """Redaction output copies a logo shared by every page only once"""
+        fitz = self.fitz
+        # Noise does not compress, so a duplicated logo shows in the file size
+        logo = fitz.Pixmap(fitz.csRGB, 200, 200, random.Random(0).randbytes(200 * 200 * 3), False)
+        logo_data = logo.tobytes('png')
+        source = fitz.open()
+        logo_xref = 0
+        for page_number in range(12):
+            page = source.new_page()
+            logo_rect = fitz.Rect(400, 20, 560, 180)
+            if logo_xref:
+                page.insert_image(logo_rect, xref=logo_xref)
+            else:
+                logo_xref = page.insert_image(logo_rect, stream=logo_data)
+            page.insert_text((60, 300), f"Slide {page_number} body text", fontsize=14)
+        deck_path = self.pdf_path.replace('.pdf', '_deck.pdf')
+        output_path = self.pdf_path.replace('.pdf', '_out.pdf')
+        source.save(deck_path, garbage=3, deflate=True)
+        source.close()
+
+        service = Mock()
+        service.process_text_batch.side_effect = lambda texts, profile, **kwargs: [f"Adapted {text}" for text in texts]
+        self.handler.text_removal_mode = 'redact'
+        self.handler.output_chunk_pages = 5
+        try:
+            with patch('services.service_registry.get_adaptations_service', return_value=service) as get_service:
+                self.assertTrue(self.handler.create_visual_preserved_pdf_with_anchors(
+                    deck_path, {}, output_path, 'default'
+                ))
+            get_service.assert_called_once_with(self.handler.service_config)
+            self.assertLess(os.path.getsize(output_path), os.path.getsize(deck_path) * 1.5)
+            with fitz.open(output_path) as doc:
+                self.assertEqual(doc.page_count, 12)
+                self.assertEqual(len({image[0] for page in doc for image in page.get_images()}), 1)
+                self.assertIn('Adapted Slide 11', doc[11].get_text())
+        finally:
+            for path in (deck_path, output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @patch('anthropic.Anthropic')
+    def test_footer_repeated_across_pages_is_adapted_once(self, mock_anthropic):
+        """Block texts of all pages are batched together, so a running footer is sent once"""
+        from services.adaptations_service import AdaptationsService
+        fitz = self.fitz
+        footer = "Copyright Example School District"
+        source = fitz.open()
+        for page_number in range(6):
+            page = source.new_page()
+            page.insert_text((60, 120), f"Page {page_number} explains photosynthesis.", fontsize=14)
+            page.insert_text((60, 800), footer, fontsize=9)
+        deck_path = self.pdf_path.replace('.pdf', '_footer.pdf')
+        output_path = self.pdf_path.replace('.pdf', '_footer_out.pdf')
+        source.save(deck_path)
+        source.close()
+
+        prompts = []
+
+        def fake_create(**kwargs):
+            prompt = kwargs['messages'][0]['content']
+            prompts.append(prompt)
+            texts = re.findall(r'### TEXT (\d+) ###\n(.*?)\n', prompt)
+            body = ''.join(f"### TEXT {n} ###\nSimple {text}\n" for n, text in texts)
+            return Mock(content=[Mock(text=body)], stop_reason='end_turn')
+
+        mock_client = Mock()
+        mock_client.messages.create.side_effect = fake_create
+        mock_anthropic.return_value = mock_client
+        service = AdaptationsService({'anthropic_api_key': 'test-key'})
+        try:
+            with patch('services.service_registry.get_adaptations_service', return_value=service):
+                self.assertTrue(self.handler.create_visual_preserved_pdf_with_anchors(
+                    deck_path, {}, output_path, 'default'
+                ))
+            self.assertEqual(sum(prompt.count(footer) for prompt in prompts), 1)
+            self.assertEqual(service.get_cache_stats()['deduplication']['duplicates_collapsed'], 5)
+            with fitz.open(output_path) as doc:
+                for page_number in range(6):
+                    self.assertIn('Simple Copyright', doc[page_number].get_text())
+        finally:
+            for path in (deck_path, output_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_pipeline_uses_owning_service_config(self):
+        """The anchor pipeline adapts text with the owning service's keyed instance"""
+        from services.pdf_service import PDFService
+        from services.service_registry import get_adaptations_service, reset_registry
+        
+        reset_registry()
+        config = {'anthropic_api_key': 'test-key'}
+        with patch('anthropic.Anthropic'):
+            pdf_service = PDFService(config)
+            handler_service = get_adaptations_service(pdf_service.visual_handler.service_config)
+        self.assertIs(handler_service, pdf_service.adaptations_service)
+        reset_registry()
+
+    def test_render_pool_is_shared_between_web_workers(self):
+        """The default pool size divides the CPUs between web worker processes"""
+        with patch('os.cpu_count', return_value=8):
+            with patch.dict(os.environ, {'WEB_CONCURRENCY': '4'}):
+                self.assertEqual(_default_render_workers(), 2)
+            with patch.dict(os.environ, {'WEB_CONCURRENCY': '16'}):
+                self.assertEqual(_default_render_workers(), 1)
+            with patch.dict(os.environ, {'SERVER_SOFTWARE': 'gunicorn/21.2.0'}):
+                os.environ.pop('WEB_CONCURRENCY', None)
+                self.assertEqual(_default_render_workers(), 1)
+            with patch.dict(os.environ, {'PDF_RENDER_WORKERS': '3'}):
+                self.assertEqual(PDFVisualHandler().render_workers, 3)
+
+    def test_single_worker_renders_in_process(self):
+        """No worker processes are used when render_workers is 1"""
+        self.handler.render_workers = 1
+        self.assertEqual(self.handler._submit_page_renders(self.pdf_path, 3), {})
+        self.assertIsNone(self.handler._collect_page_render({}, 0))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
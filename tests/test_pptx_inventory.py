@@ -0,0 +1,134 @@
+"""
+Test PPTX Inventory
+
+Tests for the one-pass text inventory and its use when adapting presentations.
+"""
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from services.pptx_inventory import build_text_inventory
+from services.pptx_service import PowerPointService
+
+
+def make_presentation():
+    """Two slides: a title and body, and a group holding two text boxes plus a short label"""
+    presentation = Presentation()
+    blank = presentation.slide_layouts[6]
+
+    slide = presentation.slides.add_slide(blank)
+    slide.shapes.add_textbox(Inches(1), Inches(1), Inches(6), Inches(1)).text_frame.text = "The Water Cycle"
+    slide.shapes.add_textbox(Inches(1), Inches(2), Inches(6), Inches(3)).text_frame.text = \
+        "Water evaporates, condenses into clouds and falls as rain."
+
+    slide = presentation.slides.add_slide(blank)
+    slide.shapes.add_textbox(Inches(8), Inches(6), Inches(1), Inches(1)).text_frame.text = "p. 2"
+    group = slide.shapes.add_group_shape()
+    group.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.text = "Evaporation"
+    inner = group.shapes.add_group_shape()
+    inner.shapes.add_textbox(Inches(1), Inches(3), Inches(4), Inches(1)).text_frame.text = "Condensation"
+    return presentation
+
+
+class TestTextInventory(unittest.TestCase):
+    """Test cases for build_text_inventory"""
+
+    def test_collects_grouped_text_once(self):
+        """Text frames in (nested) groups are indexed; short labels are skipped"""
+        inventory = build_text_inventory(make_presentation())
+
+        self.assertEqual(inventory.texts, [
+            "The Water Cycle",
+            "Water evaporates, condenses into clouds and falls as rain.",
+            "Evaporation",
+            "Condensation",
+        ])
+        self.assertEqual(inventory.slide_counts, [2, 2])
+        self.assertEqual([element.index for element in inventory], [0, 1, 2, 3])
+        self.assertEqual([element.shape_path for element in inventory.slide_elements(1)], [(1, 0), (1, 1, 0)])
+        self.assertEqual(inventory.elements[3].text_frame.text, "Condensation")
+
+
+class TestPreservingAdaptation(unittest.TestCase):
+    """Test cases for adapt_presentation_preserving_format driven by the inventory"""
+
+    def test_adapts_grouped_text(self):
+        """The whole deck is adapted in one call and grouped frames receive their text"""
+        service = PowerPointService({'output_folder': './test_outputs', 'upload_folder': './uploads'})
+        first_slide_applied = threading.Event()
+        apply_slide = service._apply_slide_adaptations
+
+        def record_apply(slide_idx, *args):
+            notes = apply_slide(slide_idx, *args)
+            if slide_idx == 0:
+                first_slide_applied.set()
+            return notes
+
+        def process_text_batch(texts, profile, progress_callback=None, groups=None):
+            self.assertEqual(groups, [0, 0, 1, 1])
+            # Slide 2's batch is still "in flight" until slide 1 has been written back
+            progress_callback([0, 1], [text.upper() for text in texts[:2]])
+            self.assertTrue(first_slide_applied.wait(timeout=5))
+            progress_callback([2, 3], [text.upper() for text in texts[2:]])
+            return [text.upper() for text in texts]
+
+        adaptations = MagicMock()
+        adaptations.process_text_batch.side_effect = process_text_batch
+        progress = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'in.pptx')
+            output_path = os.path.join(directory, 'out.pptx')
+            make_presentation().save(input_path)
+            with patch('services.service_registry.get_adaptations_service', return_value=adaptations), \
+                    patch.object(service, '_apply_slide_adaptations', side_effect=record_apply):
+                self.assertTrue(service.adapt_presentation_preserving_format(
+                    input_path, output_path, 'dyslexia',
+                    processing_callback=lambda message, value: progress.append((message, value))))
+            texts = build_text_inventory(Presentation(output_path)).texts
+
+        self.assertEqual(texts, [
+            "THE WATER CYCLE",
+            "WATER EVAPORATES, CONDENSES INTO CLOUDS AND FALLS AS RAIN.",
+            "EVAPORATION",
+            "CONDENSATION",
+        ])
+        adaptations.process_text_batch.assert_called_once()
+        slide_messages = [message for message, _ in progress if message.startswith('Finished slide')]
+        self.assertEqual(len(slide_messages), 2)
+        self.assertIn('2/2 slides done', slide_messages[-1])
+        values = [value for _, value in progress]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(values[-1], 100)
+
+    def test_translation_runs_per_slide(self):
+        """Translations are applied on top of the adaptations, slide by slide"""
+        service = PowerPointService({'output_folder': './test_outputs', 'upload_folder': './uploads'})
+        translations = MagicMock()
+        translations.translate_text.side_effect = lambda text, language: f"[{language}] {text}"
+
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'in.pptx')
+            output_path = os.path.join(directory, 'out.pptx')
+            make_presentation().save(input_path)
+            with patch('services.translations_service.TranslationsService', return_value=translations):
+                self.assertTrue(service.adapt_presentation_preserving_format(
+                    input_path, output_path, 'translation', target_language='es'))
+            output = Presentation(output_path)
+            texts = build_text_inventory(output).texts
+            notes = output.slides[1].notes_slide.notes_text_frame.text
+
+        self.assertEqual(texts[0], "[es] The Water Cycle")
+        self.assertEqual(texts[3], "[es] Condensation")
+        self.assertEqual(translations.translate_text.call_count, 4)
+        self.assertIn("Successfully translated to es", notes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,271 @@
+"""
+Test Processing Task Service
+
+Tests for task state and the background job scheduler using the in-memory
+session store fallback.
+"""
+import unittest
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ProcessingTaskService, SessionStoreService
+from services.document_jobs import register_document_jobs, PDF_JOB, PPTX_JOB
+
+
+class TestProcessingTaskService(unittest.TestCase):
+    """Test cases for Processing Task Service"""
+
+    def setUp(self):
+        """Set up a service backed by the in-memory store"""
+        self.session_store = SessionStoreService({'redis_url': 'redis://localhost:1/0'})
+        self.assertFalse(self.session_store.redis_available)
+        self.service = ProcessingTaskService({
+            'session_store': self.session_store,
+            'max_queued_jobs': 3
+        })
+
+    def tearDown(self):
+        self.service.stop_job_workers()
+
+    def test_jobs_run_in_priority_order(self):
+        """High-priority jobs run before earlier normal ones"""
+        ran = []
+        self.service.register_job_handler('record', lambda name: ran.append(name))
+
+        for file_id, priority in [('a', 'low'), ('b', 'normal'), ('c', 'high')]:
+            self.service.create_task(file_id, {'status': 'upload'})
+            self.assertTrue(self.service.submit_job(file_id, 'record', {'name': file_id}, priority))
+            self.assertEqual(self.service.get_task(file_id)['status'], 'queued')
+
+        while self.service.run_next_job(timeout=0.01):
+            pass
+
+        self.assertEqual(ran, ['c', 'b', 'a'])
+        self.assertEqual(self.session_store.job_queue_length(), 0)
+        self.assertEqual(self.session_store.memory_jobs, {})
+
+    def test_admission_control_rejects_when_full(self):
+        """Submissions beyond max_queued_jobs are rejected"""
+        self.service.register_job_handler('noop', lambda: None)
+        for i in range(3):
+            self.service.create_task(f'f{i}', {})
+            self.assertTrue(self.service.submit_job(f'f{i}', 'noop', {}))
+
+        self.service.create_task('overflow', {})
+        self.assertFalse(self.service.submit_job('overflow', 'noop', {}))
+        self.assertEqual(self.service.get_task('overflow')['status'], 'rejected')
+
+    def test_failed_job_marks_task_error(self):
+        """Handler exceptions are recorded on the task and the job is acknowledged"""
+        def explode():
+            raise RuntimeError("boom")
+
+        self.service.register_job_handler('explode', explode)
+        self.service.create_task('bad', {})
+        self.service.submit_job('bad', 'explode', {})
+
+        self.assertTrue(self.service.run_next_job(timeout=0.01))
+        task = self.service.get_task('bad')
+        self.assertEqual(task['status'], 'error')
+        self.assertIn('boom', task['message'])
+        self.assertEqual(self.session_store.memory_running_jobs, {})
+
+    def test_stale_running_jobs_are_requeued(self):
+        """Jobs claimed by a dead worker return to the queue after their lease"""
+        self.service.create_task('orphan', {})
+        self.service.submit_job('orphan', 'noop', {})
+        job = self.session_store.dequeue_job('dead-worker', timeout=0.01)
+        self.assertIsNotNone(job)
+        self.assertEqual(self.session_store.job_queue_length(), 0)
+
+        self.assertEqual(self.session_store.requeue_stale_jobs(lease_seconds=3600), 0)
+        self.assertEqual(self.session_store.requeue_stale_jobs(lease_seconds=0), 1)
+        self.assertEqual(self.session_store.job_queue_length(), 1)
+
+    def test_long_job_keeps_its_lease(self):
+        """Running jobs are renewed past the lease; orphans are swept without a restart"""
+        self.service.job_lease_seconds = 0.2
+        self.service.job_heartbeat_seconds = 0.05
+        release = threading.Event()
+        runs = []
+
+        def long_job(name):
+            runs.append(name)
+            release.wait(2)
+
+        self.service.register_job_handler('long', long_job)
+        self.service.create_task('orphan', {})
+        self.service.submit_job('orphan', 'long', {'name': 'orphan'})
+        self.assertIsNotNone(self.session_store.dequeue_job('dead-worker', timeout=0.01))
+        self.service.create_task('slow', {})
+        self.service.submit_job('slow', 'long', {'name': 'slow'})
+
+        self.service.start_job_workers(2)
+        deadline = time.time() + 5
+        while len(runs) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        # Several leases long: the orphan was recovered once, the slow job never restarted
+        time.sleep(0.5)
+        release.set()
+        self.service.stop_job_workers()
+
+        self.assertEqual(sorted(runs), ['orphan', 'slow'])
+        self.assertEqual(self.session_store.job_queue_length(), 0)
+
+    def test_worker_pool_is_bounded(self):
+        """No more jobs run at once than there are workers"""
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0, 'done': 0}
+
+        def slow_job():
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+                state['done'] += 1
+
+        self.service.max_queued_jobs = 10
+        self.service.register_job_handler('slow', slow_job)
+        for i in range(6):
+            self.service.create_task(f's{i}', {})
+            self.service.submit_job(f's{i}', 'slow', {})
+
+        self.assertEqual(self.service.start_job_workers(2), 2)
+        deadline = time.time() + 5
+        while state['done'] < 6 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(state['done'], 6)
+        self.assertLessEqual(state['peak'], 2)
+
+
+class FakePDFService:
+    """Stands in for PDFService.process_with_template_system"""
+
+    def __init__(self, succeed=True):
+        self.succeed = succeed
+        self.output_quality = None
+
+    def process_with_template_system(self, file_path, file_id, filename, profile,
+                                     export_format='pdf', target_language=None,
+                                     processing_callback=None, output_path_callback=None,
+                                     output_quality=None, result_callback=None):
+        self.output_quality = output_quality
+        processing_callback(file_id, 'Adapting PDF content...', 30)
+        if not self.succeed:
+            processing_callback(file_id, 'PDF processing failed: bad file', -1)
+            return None
+        details = {'adapted_content': {'pages': [{'text': 'Adapted'}]}}
+        if target_language:
+            details['translated_output_path'] = output_path_callback(
+                file_id, f"translated_{target_language}_{os.path.splitext(filename)[0]}.pdf"
+            )
+        result_callback(file_id, details)
+        return output_path_callback(file_id, f"adapted_{filename}")
+
+
+class FakePowerPointService:
+    """Records which PowerPointService entry point a job used"""
+
+    def __init__(self):
+        self.calls = []
+
+    def process_presentation_efficiently(self, file_path, file_id, filename, profile,
+                                         target_language=None, progress_callback=None):
+        self.calls.append('adapt')
+        progress_callback('Adapting slides...', 50)
+        return f"/out/{file_id}_adapted_{filename}"
+
+    def translate_presentation(self, file_path, file_id, filename, target_language):
+        self.calls.append('copy')
+        return f"/out/{file_id}_translated_{filename}"
+
+    def translate_presentation_in_place(self, file_path, file_id, filename, target_language):
+        self.calls.append('replace')
+        return f"/out/{file_id}_translated_{filename}"
+
+
+class TestDocumentJobs(unittest.TestCase):
+    """Test cases for the shared document job handlers"""
+
+    def setUp(self):
+        self.session_store = SessionStoreService({'redis_url': 'redis://localhost:1/0'})
+        self.service = ProcessingTaskService({'session_store': self.session_store})
+        self.pptx_service = FakePowerPointService()
+        self.progress = []
+        original_update = self.service.update_task
+
+        def record_update(file_id, updates, **kwargs):
+            if 'progress' in updates:
+                self.progress.append(updates['progress']['percentage'])
+            return original_update(file_id, updates, **kwargs)
+
+        self.service.update_task = record_update
+
+    def run_job(self, file_id, job_type, params, pdf_service=None):
+        register_document_jobs(self.service, {'output_folder': '/out'},
+                               pdf_service or FakePDFService(), self.pptx_service)
+        self.service.create_task(file_id, {'status': 'upload'})
+        self.service.submit_job(file_id, job_type, params)
+        self.assertTrue(self.service.run_next_job(timeout=0.01))
+        return self.service.get_task(file_id)
+
+    def test_pdf_job_reports_progress_and_output(self):
+        """PDF jobs record progress and the adapted file path"""
+        task = self.run_job('pdf1', PDF_JOB, {
+            'file_path': '/in/a.pdf', 'file_id': 'pdf1', 'filename': 'a.pdf', 'profile': 'adhd'
+        })
+        self.assertEqual(task['status'], 'completed')
+        self.assertEqual(task['adapted_path'], os.path.join('/out', 'pdf1_adapted_a.pdf'))
+        self.assertIn(30, self.progress)
+
+    def test_pdf_job_passes_output_quality(self):
+        """The requested quality tier reaches the PDF service and is reported"""
+        pdf_service = FakePDFService()
+        task = self.run_job('pdf3', PDF_JOB, {
+            'file_path': '/in/d.pdf', 'file_id': 'pdf3', 'filename': 'd.pdf', 'profile': 'adhd',
+            'output_quality': 'low'
+        }, pdf_service=pdf_service)
+        self.assertEqual(pdf_service.output_quality, 'low')
+        self.assertEqual(task['output_quality'], 'low')
+        self.assertIn('output_bytes', task)
+
+    def test_pdf_job_records_content_and_translation(self):
+        """PDF jobs store the adapted content and the translated file for downloads"""
+        task = self.run_job('pdf4', PDF_JOB, {
+            'file_path': '/in/e.pdf', 'file_id': 'pdf4', 'filename': 'e.pdf', 'profile': 'esl',
+            'target_language': 'spanish'
+        })
+        self.assertEqual(task['adapted_content'], {'pages': [{'text': 'Adapted'}]})
+        self.assertEqual(task['translated_output_path'],
+                         os.path.join('/out', 'pdf4_translated_spanish_e.pdf'))
+        self.assertEqual(task['translated_filename'], 'translated_spanish_e.pdf')
+        self.assertEqual(task['translated_language'], 'Spanish')
+        self.assertTrue(task['has_translation'])
+
+    def test_failed_pdf_job_keeps_error_message(self):
+        """A failed template-system run marks the task as errored with its message"""
+        task = self.run_job('pdf2', PDF_JOB, {
+            'file_path': '/in/b.pdf', 'file_id': 'pdf2', 'filename': 'b.pdf', 'profile': 'esl'
+        }, pdf_service=FakePDFService(succeed=False))
+        self.assertEqual(task['status'], 'error')
+        self.assertIn('bad file', task['message'])
+
+    def test_pptx_job_picks_translation_mode(self):
+        """PowerPoint jobs adapt, or translate by copy or in place"""
+        base = {'file_path': '/in/c.pptx', 'filename': 'c.pptx', 'profile': 'dyslexia'}
+        self.run_job('p1', PPTX_JOB, dict(base, file_id='p1'))
+        self.run_job('p2', PPTX_JOB, dict(base, file_id='p2', target_language='es'))
+        task = self.run_job('p3', PPTX_JOB, dict(base, file_id='p3', target_language='fr',
+                                                 translation_mode='replace'))
+        self.assertEqual(self.pptx_service.calls, ['adapt', 'copy', 'replace'])
+        self.assertEqual(task['status'], 'completed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Test Session Store Service
+
+Tests for the write-behind progress channel using the in-memory fallback,
+and for the Redis job queue when fakeredis is installed.
+"""
+import unittest
+import json
+import threading
+import time
+import sys
+import os
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import SessionStoreService
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401 - fakeredis needs it to run Lua scripts
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+class TestProgressChannel(unittest.TestCase):
+    """Test cases for coalesced progress updates"""
+
+    def setUp(self):
+        """Set up an in-memory store that counts backend writes"""
+        self.store = SessionStoreService({
+            'redis_url': 'redis://localhost:1/0',
+            'progress_flush_rate': 10
+        })
+        self.assertFalse(self.store.redis_available)
+        self.writes = []
+        original_write = self.store._write_updates
+
+        def counting_write(file_id, updates):
+            self.writes.append(dict(updates))
+            return original_write(file_id, updates)
+
+        self.store._write_updates = counting_write
+        self.store.store_file_metadata('task', {'status': 'processing'})
+
+    def test_progress_ticks_are_coalesced(self):
+        """A burst of ticks becomes one immediate write and one trailing write"""
+        for percentage in range(50):
+            self.store.queue_file_update('task', {'progress': {'percentage': percentage}})
+
+        # Readers see the latest value before it is flushed
+        self.assertEqual(self.store.get_file_metadata('task')['progress']['percentage'], 49)
+        self.assertEqual(len(self.writes), 1)
+
+        deadline = time.time() + 2
+        while len(self.writes) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(self.writes), 2)
+        self.assertEqual(self.writes[-1]['progress']['percentage'], 49)
+        self.assertEqual(self.store.memory_store['task']['progress']['percentage'], 49)
+
+    def test_status_changes_are_written_immediately(self):
+        """Status transitions bypass the throttle and carry pending fields"""
+        self.store.queue_file_update('task', {'message': 'first'})
+        self.store.queue_file_update('task', {'message': 'second', 'status': 'processing'})
+        self.assertEqual(len(self.writes), 1)
+
+        self.store.queue_file_update('task', {'status': 'completed'})
+        self.assertEqual(len(self.writes), 2)
+        self.assertEqual(self.writes[-1]['message'], 'second')
+        self.assertEqual(self.store.memory_store['task']['status'], 'completed')
+
+    def test_flush_and_unknown_files(self):
+        """Explicit flushes write pending fields; unknown files are not created"""
+        self.store.queue_file_update('task', {'message': 'a'})
+        self.store.queue_file_update('task', {'message': 'b'})
+        self.assertEqual(self.store.flush_pending_updates(), 1)
+        self.assertEqual(self.store.memory_store['task']['message'], 'b')
+
+        self.assertFalse(self.store.update_file_metadata('missing', {'message': 'x'}))
+        self.assertNotIn('missing', self.store.memory_store)
+
+    def test_flush_does_not_overwrite_final_status(self):
+        """A flush of older progress racing the final status write lands first"""
+        write = self.store._write_updates
+        flush_writing = threading.Event()
+        release_flush = threading.Event()
+
+        def slow_progress_write(file_id, updates):
+            if updates.get('progress', {}).get('percentage') == 50:
+                flush_writing.set()
+                release_flush.wait(2)
+            return write(file_id, updates)
+
+        self.store._write_updates = slow_progress_write
+        self.store.queue_file_update('task', {'progress': {'percentage': 10}})
+        self.store.queue_file_update('task', {'progress': {'percentage': 50}, 'message': 'Adapting...'})
+
+        flusher = threading.Thread(target=self.store.flush_pending_updates, args=('task',))
+        flusher.start()
+        self.assertTrue(flush_writing.wait(2))
+        finisher = threading.Thread(target=self.store.update_file_metadata, args=('task', {
+            'status': 'completed', 'message': 'Done', 'progress': {'percentage': 100}
+        }))
+        finisher.start()
+        time.sleep(0.05)
+        release_flush.set()
+        flusher.join(2)
+        finisher.join(2)
+
+        metadata = self.store.memory_store['task']
+        self.assertEqual(metadata['status'], 'completed')
+        self.assertEqual(metadata['message'], 'Done')
+        self.assertEqual(metadata['progress']['percentage'], 100)
+
+
+@unittest.skipUnless(FAKEREDIS_AVAILABLE, "fakeredis with Lua support is not installed")
+class TestRedisJobQueue(unittest.TestCase):
+    """Test cases for the Redis-backed job queue"""
+
+    def setUp(self):
+        """Set up a store on an in-process fake Redis server"""
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        with patch('services.session_store_service.redis.from_url', return_value=self.redis):
+            self.store = SessionStoreService({'job_poll_interval': 0.01})
+        self.assertTrue(self.store.redis_available)
+
+    def test_claim_moves_job_to_running_set(self):
+        """A claimed job is off the queue and leased to the worker in one step"""
+        self.store.enqueue_job('low', {'job_type': 'noop'}, priority=9)
+        self.store.enqueue_job('high', {'job_type': 'noop'}, priority=0)
+
+        job = self.store.dequeue_job('worker-a', timeout=0.05)
+        self.assertEqual(job['job_id'], 'high')
+        self.assertEqual(self.redis.zrange(self.store.job_queue_key, 0, -1), ['low'])
+        lease = json.loads(self.redis.hget(self.store.job_running_key, 'high'))
+        self.assertEqual(lease['worker_id'], 'worker-a')
+
+        self.store.ack_job('high')
+        self.assertFalse(self.redis.hexists(self.store.job_running_key, 'high'))
+        self.assertFalse(self.redis.hexists(self.store.job_data_key, 'high'))
+
+    def test_empty_queue_and_missing_data(self):
+        """Claims time out on an empty queue and drop jobs whose data is gone"""
+        self.assertIsNone(self.store.dequeue_job('worker-a', timeout=0.05))
+
+        self.store.enqueue_job('orphan', {'job_type': 'noop'})
+        self.redis.hdel(self.store.job_data_key, 'orphan')
+        self.assertIsNone(self.store.dequeue_job('worker-a', timeout=0.05))
+        self.assertEqual(self.store.job_queue_length(), 0)
+        self.assertFalse(self.redis.hexists(self.store.job_running_key, 'orphan'))
+
+    def test_abandoned_claim_is_requeued(self):
+        """A job claimed by a worker that died is recovered from the running set"""
+        self.store.enqueue_job('job', {'job_type': 'noop'})
+        self.assertEqual(self.store.dequeue_job('worker-a', timeout=0.05)['job_id'], 'job')
+
+        self.assertEqual(self.store.requeue_stale_jobs(lease_seconds=0), 1)
+        self.assertEqual(self.store.dequeue_job('worker-b', timeout=0.05)['job_id'], 'job')
+
+    def test_renewed_lease_is_not_requeued(self):
+        """Only the claiming worker can renew, and renewed jobs stay running"""
+        self.store.enqueue_job('job', {'job_type': 'noop'})
+        self.store.dequeue_job('worker-a', timeout=0.05)
+        time.sleep(0.05)
+
+        self.assertFalse(self.store.renew_job_lease('job', 'worker-b'))
+        self.assertTrue(self.store.renew_job_lease('job', 'worker-a'))
+        self.assertEqual(self.store.requeue_stale_jobs(lease_seconds=0.04), 0)
+        self.assertEqual(self.store.job_queue_length(), 0)
+        self.assertFalse(self.store.renew_job_lease('missing', 'worker-a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Test Text Metrics
+
+Tests for the cached font metrics used to fit text without trial insertions.
+"""
+import unittest
+import sys
+import os
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+
+from services.text_metrics import FIT_PRECISION, MIN_FONT_SCALE, get_font_metrics
+from services.pdf_visual_handler_enhanced import PDFVisualHandlerEnhanced
+
+
+SAMPLE_TEXTS = [
+    "Short line",
+    "A paragraph with enough words to wrap onto several lines inside a narrow box.",
+    "First paragraph.\nSecond paragraph with a few more words in it.\n",
+    "Averyveryverylongwordthatcannotfitonasinglelineatall and then some words",
+    "Accents café naïve, quotes “like this” and a dash — plus 漢字",
+    "Tabs\tand  double  spaces ",
+]
+
+
+class TestFontMetrics(unittest.TestCase):
+    """Test cases for FontMetrics"""
+
+    def test_remainder_matches_insert_textbox(self):
+        """Predicted fits agree with what insert_textbox returns"""
+        doc = fitz.open()
+        page = doc.new_page()
+        for fontname in ('helv', 'tibo', 'cour'):
+            metrics = get_font_metrics(fontname)
+            for text in SAMPLE_TEXTS:
+                for width, height, size in ((60, 40, 9), (200, 60, 11), (120, 300, 14), (400, 20, 12)):
+                    rect = fitz.Rect(20, 20, 20 + width, 20 + height)
+                    expected = page.insert_textbox(rect, text, fontname=fontname, fontsize=size)
+                    self.assertAlmostEqual(metrics.textbox_remainder(text, rect, size), expected, places=6)
+
+    def test_fit_finds_largest_size(self):
+        """fit returns a size that fits, with nothing fitting just above it"""
+        metrics = get_font_metrics('helv')
+        rect = fitz.Rect(0, 0, 150, 60)
+        text = SAMPLE_TEXTS[1]
+
+        fit = metrics.fit(text, rect, 20, 4)
+        self.assertIsNotNone(fit)
+        self.assertGreaterEqual(metrics.textbox_remainder(text, rect, fit.font_size), 0)
+        self.assertLess(metrics.textbox_remainder(text, rect, fit.font_size + FIT_PRECISION), 0)
+        self.assertEqual(list(fit.lines), metrics.wrap(text, rect.width, fit.font_size))
+
+        self.assertEqual(metrics.fit("Short", rect, 12, 8).font_size, 12)
+        self.assertIsNone(metrics.fit(text * 10, rect, 12, 10))
+
+    def test_text_metrics_use_no_documents(self):
+        """Measuring text does not open temporary documents"""
+        handler = PDFVisualHandlerEnhanced()
+        with patch('fitz.open') as mock_open:
+            metrics = handler._get_text_metrics("Hello world", 'helv', 12)
+        mock_open.assert_not_called()
+        self.assertAlmostEqual(metrics['width'], fitz.get_text_length("Hello world", 'helv', 12), places=4)
+        self.assertGreater(metrics['height'], 12)
+
+    def test_overflowing_block_is_wrapped_and_clipped(self):
+        """Text too long for its block is wrapped at the smallest size and stays inside it"""
+        handler = PDFVisualHandlerEnhanced()
+        doc = fitz.open()
+        page = doc.new_page()
+        block = {
+            'is_heading': False, 'avg_font_size': 12, 'dominant_font': 'Helvetica',
+            'bbox': (50, 100, 250, 160)
+        }
+
+        handler._place_text_enhanced(page, block, SAMPLE_TEXTS[1] * 8, {'highlight_color': None}, {})
+
+        spans = [span for text_block in page.get_text('dict')['blocks']
+                 for line in text_block['lines'] for span in line['spans']]
+        self.assertGreater(len(spans), 1)
+        for span in spans:
+            self.assertAlmostEqual(span['size'], 12 * MIN_FONT_SCALE, places=3)
+            self.assertGreaterEqual(span['bbox'][0], 50)
+            self.assertLessEqual(span['bbox'][2], 250)
+            self.assertLessEqual(span['bbox'][3], 160)
+        self.assertTrue(page.get_text().startswith("A paragraph with"))
+        doc.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Test Upload Route
+
+Tests that adaptation uploads are queued with the options chosen in the form.
+"""
+import unittest
+import os
+import io
+import sys
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('ANTHROPIC_API_KEY', 'test-key')
+
+import app as matcha_app
+from services.document_jobs import PDF_JOB
+
+
+class TestUploadRoute(unittest.TestCase):
+    """Test cases for queuing uploads"""
+
+    def setUp(self):
+        self.client = matcha_app.app.test_client()
+
+    def upload_pdf(self, **form):
+        upload_result = {
+            'success': True, 'file_id': 'up1', 'filename': 'notes.pdf',
+            'file_path': '/uploads/up1_notes.pdf', 'file_type': 'pdf'
+        }
+        data = dict({'profile': 'adhd', 'action': 'adapt',
+                     'file': (io.BytesIO(b'%PDF-1.4'), 'notes.pdf')}, **form)
+        with patch.object(matcha_app.upload_service, 'process_upload', return_value=upload_result), \
+                patch.object(matcha_app.processing_task_service, 'submit_job',
+                             return_value=True) as submit_job:
+            response = self.client.post('/upload', data=data, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        submit_job.assert_called_once()
+        return submit_job.call_args[0]
+
+    def test_pdf_upload_passes_output_quality(self):
+        """The quality tier picked in the form reaches the PDF job"""
+        file_id, job_type, params = self.upload_pdf(output_quality='low')
+        self.assertEqual((file_id, job_type), ('up1', PDF_JOB))
+        self.assertEqual(params['output_quality'], 'low')
+
+    def test_pdf_upload_defaults_output_quality(self):
+        """An empty quality field leaves the tier to PDF_OUTPUT_QUALITY"""
+        _, job_type, params = self.upload_pdf()
+        self.assertEqual(job_type, PDF_JOB)
+        self.assertIsNone(params['output_quality'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Matcha worker
+
+Standalone process that pulls document jobs from the shared Redis queue and
+runs them, so the web tier only handles uploads and status requests. Run one
+or more of these alongside the web processes (started with JOB_WORKERS=0):
+
+    python worker.py --concurrency 2
+"""
+import os
+import sys
+import signal
+import time
+import argparse
+import logging
+
+# Apply httpx patch before importing anthropic to fix compatibility issues
+import anthropic_patch
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from services import ProcessingTaskService, SessionStoreService
+from services.document_jobs import register_document_jobs
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_service_config():
+    """Service configuration matching the web app's"""
+    output_folder = os.path.join(BASE_DIR, 'outputs')
+    upload_folder = os.path.join(BASE_DIR, 'uploads')
+    return {
+        'output_folder': output_folder,
+        'upload_folder': upload_folder,
+        'anthropic_api_key': os.getenv('ANTHROPIC_API_KEY'),
+        'upload_dir': upload_folder,
+        'output_dir': output_folder,
+        'temp_dir': os.path.join(BASE_DIR, 'temp'),
+        'adaptation_store': os.getenv('ADAPTATION_STORE', 'auto')
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run Matcha document processing workers')
+    parser.add_argument('--concurrency', type=int,
+                        default=int(os.getenv('WORKER_CONCURRENCY', 2)),
+                        help='Jobs to run at once in this process (default: WORKER_CONCURRENCY or 2)')
+    parser.add_argument('--redis-url', default=os.getenv('REDIS_URL', 'redis://redis:6379/0'),
+                        help='Redis URL of the shared job queue')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    logger = logging.getLogger('MatchaWorker')
+
+    if not os.getenv('ANTHROPIC_API_KEY'):
+        logger.error("ANTHROPIC_API_KEY environment variable is required")
+        return 1
+
+    session_store = SessionStoreService({'redis_url': args.redis_url, 'session_ttl_hours': 24})
+    if not session_store.redis_available:
+        # An in-memory queue would never see jobs submitted by the web tier
+        logger.error(f"Redis is not reachable at {args.redis_url}; workers need the shared queue")
+        return 1
+
+    config = build_service_config()
+    for folder in (config['output_folder'], config['upload_folder'], config['temp_dir']):
+        os.makedirs(folder, exist_ok=True)
+
+    task_service = ProcessingTaskService({
+        'session_store': session_store,
+        'job_workers': args.concurrency,
+        'job_lease_seconds': int(os.getenv('JOB_LEASE_SECONDS', 300))
+    })
+    register_document_jobs(task_service, config)
+
+    stopping = []
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, finishing current jobs...")
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    task_service.start_job_workers(args.concurrency)
+    logger.info(f"Worker {task_service.worker_id} running {args.concurrency} job slots")
+
+    while not stopping:
+        time.sleep(1)
+
+    task_service.stop_job_workers(timeout=float(os.getenv('WORKER_SHUTDOWN_TIMEOUT', 30)))
+    logger.info("Worker stopped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())